@@ -1,17 +1,78 @@
+import os
+
+import numpy as np
 import streamlit as st
-import pandas as pd
-import time
+
+import perf
+from audit_rules import RuleEngine
+from employee_store import DEFAULT_URL, EmployeeSnapshot, migrate_legacy_excel, open_store
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(page_title="Tablero SGC", layout="wide")
 st.title("Tablero de Control SGC - Auditoría Interna 🚀")
 
+EXCEL_LEGADO = "empleados.xlsx"
+REGLAS_AUDITORIA = "reglas_auditoria.json"
+FILAS_POR_PAGINA = 50
+# Cada cuánto revisa cada sesión si otro usuario cambió los datos (segundos)
+INTERVALO_MONITOR = float(os.environ.get("SGC_MONITOR_SEGUNDOS", "5"))
+
+
+@st.cache_resource
+def get_store():
+    # Un almacén por proceso; la URL permite cambiar de backend sin tocar la app
+    store = open_store(os.environ.get("EMPLEADOS_STORE", DEFAULT_URL))
+    # Primera ejecución: se migra el Excel existente una sola vez (queda registrado en el almacén)
+    migrate_legacy_excel(store, EXCEL_LEGADO)
+    return store
+
+
+@st.cache_resource
+def get_snapshot():
+    # Una sola copia del personal para todas las sesiones del proceso
+    return EmployeeSnapshot(get_store())
+
+
+@st.cache_resource
+def get_rule_engine():
+    # Umbrales, pesos y severidades configurables sin tocar el código
+    if os.path.exists(REGLAS_AUDITORIA):
+        return RuleEngine.from_json(REGLAS_AUDITORIA)
+    return RuleEngine()
+
+
+@st.cache_resource(max_entries=2)
+def evaluar_personal(version, _df):
+    # Una evaluación por versión de los datos, compartida por todas las sesiones
+    return get_rule_engine().evaluate(_df)
+
+
+@st.cache_resource(max_entries=2)
+def tendencia_mensual(version):
+    # Lee los acumulados mensuales (no la bitácora); una consulta por versión de los datos
+    return get_store().monthly_trend(12)
+
+
+def es_admin():
+    # Mismo criterio que dashboard.py: sólo los usuarios de [admins] en secrets ven los tiempos
+    try:
+        return st.session_state.get("usuario") in st.secrets.get("admins", [])
+    except FileNotFoundError:  # sin secrets.toml nadie es admin
+        return False
+
+
+# Con SGC_PERF=1 cada ejecución mide sus secciones (bitácora; el panel de la barra lateral, sólo admins)
+perf.begin("app")
+with perf.span("conexion"):
+    store = get_store()
+    snapshot = get_snapshot()
+
 # ==============================================================================
 # 📝 SECCIÓN 1: ALTA Y MODIFICACIÓN
 # ==============================================================================
 st.sidebar.header("📝 Gestión de Personal")
 
-with st.sidebar.form("formulario_gestion"):
+with st.sidebar.form("formulario_gestion"), perf.span("alta"):
     st.markdown("### Agregar o Actualizar")
     nombre_input = st.text_input("Nombre Completo")
     depto_input = st.selectbox("Departamento", ["Calidad", "RRHH", "Administracion", "Hematologia", "Inmunologia", "Santa Anita", "Mensajeria", "Recepcion", "Otro"])
@@ -23,31 +84,14 @@ with st.sidebar.form("formulario_gestion"):
     if boton_guardar:
         if nombre_input:
             try:
-                df = pd.read_excel("empleados.xlsx", engine="openpyxl")
+                # Una sola fila, en una transacción: sin reescribir todo el personal
+                creado = store.upsert(nombre_input, depto_input, retardos_input, faltas_input)
+                snapshot.expire()
                 nombre_limpio = nombre_input.strip()
-                
-                # Buscamos si ya existe
-                filtro = df['Nombre'] == nombre_limpio
-                
-                if filtro.any():
-                    # ACTUALIZAR
-                    indice = df.index[filtro][0]
-                    df.at[indice, 'Departamento'] = depto_input
-                    df.at[indice, 'Retardos'] = retardos_input
-                    df.at[indice, 'Faltas'] = faltas_input
-                    mensaje = f"🔄 Datos de '{nombre_limpio}' actualizados."
-                else:
-                    # CREAR NUEVO
-                    nuevo = {"Nombre": nombre_limpio, "Departamento": depto_input, "Retardos": retardos_input, "Faltas": faltas_input}
-                    df = pd.concat([df, pd.DataFrame([nuevo])], ignore_index=True)
-                    mensaje = f"✅ Nuevo empleado '{nombre_limpio}' creado."
-
-                df.to_excel("empleados.xlsx", index=False, engine="openpyxl")
-                st.success(mensaje)
-                time.sleep(1)
+                mensaje = (f"✅ Nuevo empleado '{nombre_limpio}' creado." if creado
+                           else f"🔄 Datos de '{nombre_limpio}' actualizados.")
+                st.toast(mensaje)
                 st.rerun()
-            except PermissionError:
-                st.error("⛔ ERROR: Cierra el Excel.")
             except Exception as e:
                 st.error(f"❌ Error: {e}")
 
@@ -55,66 +99,86 @@ with st.sidebar.form("formulario_gestion"):
 # 🗑️ SECCIÓN 2: ELIMINAR CIRÚRGICO (POR ID)
 # ==============================================================================
 st.sidebar.markdown("---")
-with st.sidebar.expander("🗑️ Zona de Peligro (Eliminar)"):
+with st.sidebar.expander("🗑️ Zona de Peligro (Eliminar)"), perf.span("baja"):
     st.warning("Selecciona el registro exacto a eliminar:")
     
     try:
-        # Cargamos el DF para listar las opciones
-        df_borrar = pd.read_excel("empleados.xlsx", engine="openpyxl")
+        # Búsqueda por prefijo del nombre (índice): no se carga todo el personal
+        buscar = st.text_input("Buscar por nombre", key="buscar_borrar")
+        candidatos = store.search(buscar)
         
-        # Creamos una lista inteligente: "ID | Nombre (Depto)"
-        # Esto permite diferenciar dos "Pacos" por su número de fila (Index)
-        opciones_borrar = [f"{i} | {row['Nombre']} ({row['Departamento']})" for i, row in df_borrar.iterrows()]
+        # Lista inteligente: "ID | Nombre (Depto)". El ID es la llave del registro,
+        # así se distinguen dos "Pacos" aunque cambie el orden de la tabla
+        opciones_borrar = dict(zip(candidatos.index, candidatos.index.astype(str) + " | " + candidatos["Nombre"]
+                                   + " (" + candidatos["Departamento"].fillna("") + ")"))
         
-        seleccion = st.selectbox("Selecciona registro:", opciones_borrar)
+        seleccion = st.selectbox("Selecciona registro:", list(opciones_borrar), format_func=opciones_borrar.get)
         
         if st.button("🔥 Eliminar Este Registro"):
-            if seleccion:
+            if seleccion is not None:
                 try:
-                    # 1. Extraemos el ID (el número antes de la barra "|")
-                    id_a_borrar = int(seleccion.split(" | ")[0])
-                    nombre_borrado = seleccion.split(" | ")[1]
-                    
-                    # 2. Borramos esa fila específica usando el ID
-                    df_limpio = df_borrar.drop(id_a_borrar)
-                    
-                    # 3. Guardamos
-                    df_limpio.to_excel("empleados.xlsx", index=False, engine="openpyxl")
-                    
-                    st.success(f"👋 Registro eliminado: {nombre_borrado}")
-                    time.sleep(1)
-                    st.rerun()
-                except PermissionError:
-                    st.error("⛔ El Excel está abierto. Ciérralo.")
+                    nombre_borrado = candidatos.at[seleccion, "Nombre"]
+                    if store.delete(seleccion):
+                        snapshot.expire()
+                        st.toast(f"👋 Registro eliminado: {nombre_borrado}")
+                        st.rerun()
+                    else:
+                        st.error("El registro ya no existe.")
                 except Exception as e:
                     st.error(f"❌ Error: {e}")
-    except:
+    except Exception:
         st.error("No se pudo cargar la lista para borrar.")
 
+# ==============================================================================
+# 📁 SECCIÓN 2B: IMPORTAR / EXPORTAR EXCEL
+# ==============================================================================
+with st.sidebar.expander("📁 Importar / Exportar Excel"), perf.span("excel"):
+    # El Excel se genera sólo al hacer clic, no en cada rerun
+    st.download_button("⬇️ Exportar personal", store.export_excel, file_name="empleados.xlsx",
+                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    archivo_excel = st.file_uploader("Importar (reemplaza el personal actual)", type=["xlsx"])
+    if archivo_excel and st.button("📥 Importar"):
+        try:
+            total_importado = store.import_excel(archivo_excel)
+            snapshot.expire()
+            st.toast(f"✅ {total_importado} empleados importados.")
+            st.rerun()
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+
 # ==============================================================================
 # 👀 SECCIÓN 3: MONITOR EN VIVO
 # ==============================================================================
 st.markdown("---")
 
-@st.fragment(run_every=5)
-def panel_en_vivo():
+@st.fragment(run_every=INTERVALO_MONITOR)
+def vigilante():
+    # No dibuja nada: compara la versión compartida (una consulta por proceso, no por
+    # sesión) y sólo si otro usuario cambió los datos vuelve a pintar la página
     try:
-        df = pd.read_excel("empleados.xlsx", engine="openpyxl")
-    except:
+        version = snapshot.version()
+    except Exception:
         return
+    if version != st.session_state.get("version_personal", version):
+        st.rerun()
 
-    # Lógica
-    def evaluar(fila):
-        if fila['Faltas'] > 0 or fila['Retardos'] >= 3:
-            return 'AUDITAR'
-        else:
-            return 'OK'
 
-    df['Estatus'] = df.apply(evaluar, axis=1)
+def panel_en_vivo():
+    try:
+        with perf.span("panel.lectura"):
+            df, version = snapshot.get()
+    except Exception:
+        return
+    st.session_state["version_personal"] = version
+
+    # Lógica: reglas compiladas, evaluadas sobre todo el DataFrame en un paso
+    motor = get_rule_engine()
+    with perf.span("panel.reglas"):
+        evaluacion = evaluar_personal(version, df)
 
     # Métricas
     total = len(df)
-    rojos = len(df[df['Estatus'] == 'AUDITAR'])
+    rojos = motor.flagged(evaluacion)
     cumplimiento = ((total - rojos) / total) * 100 if total > 0 else 0
 
     c1, c2, c3 = st.columns(3)
@@ -122,17 +186,64 @@ def panel_en_vivo():
     c2.metric("⚠️ A Auditar", rojos, delta_color="inverse")
     c3.metric("✅ Cumplimiento", f"{cumplimiento:.1f}%")
 
-    # Tabla
+    # Empleados que cumple cada regla
+    if evaluacion.hits:
+        for columna, (regla, aciertos) in zip(st.columns(len(evaluacion.hits)), evaluacion.hits.items()):
+            columna.metric(f"Regla: {regla}", aciertos)
+
+    with st.expander("📈 Tendencia de asistencia por departamento (12 meses)"), perf.span("panel.tendencia"):
+        tendencia = tendencia_mensual(version)
+        if tendencia.empty:
+            st.info("Aún no hay cambios de asistencia registrados.")
+        else:
+            t1, t2 = st.columns(2)
+            t1.markdown("**Retardos**")
+            t1.line_chart(tendencia, x="mes", y="retardos", color="departamento")
+            t2.markdown("**Faltas**")
+            t2.line_chart(tendencia, x="mes", y="faltas", color="departamento")
+
+    with perf.span("panel.tabla"):
+        tabla_nomina(df, evaluacion.status.cat.rename_categories(motor.labels()))
+
+
+@st.fragment
+def tabla_nomina(df, estatus):
+    # Fragmento: filtrar o cambiar de página sólo vuelve a pintar la tabla
     st.subheader("📋 Nómina Actualizada")
-    def estilo(v):
-        color = '#ffcccc' if v == 'AUDITAR' else '#ccffcc'
-        return f'background-color: {color}; color: black'
+    f1, f2, f3 = st.columns([2, 2, 1])
+    departamentos = ["Todos", *sorted(df["Departamento"].dropna().unique())]
+    depto = f1.selectbox("Departamento", departamentos, key="nomina_depto")
+    filtro_estatus = f2.multiselect("Estatus", list(estatus.cat.categories), key="nomina_estatus")
 
+    mascara = np.ones(len(df), dtype=bool)
+    if depto != "Todos":
+        mascara &= (df["Departamento"] == depto).to_numpy()
+    if filtro_estatus:
+        mascara &= estatus.isin(filtro_estatus).to_numpy()
+    posiciones = np.flatnonzero(mascara)
+
+    paginas = max(1, -(-len(posiciones) // FILAS_POR_PAGINA))
+    if st.session_state.get("nomina_pagina", 1) > paginas:
+        # El filtro dejó menos páginas que la actual
+        st.session_state["nomina_pagina"] = paginas
+    pagina = f3.number_input("Página", min_value=1, max_value=paginas, step=1, key="nomina_pagina")
+    visibles = posiciones[(pagina - 1) * FILAS_POR_PAGINA:pagina * FILAS_POR_PAGINA]
+
+    # Sólo la página visible se arma y se envía; el estatus ya viene como categoría con ícono
     st.dataframe(
-        df.style.applymap(estilo, subset=['Estatus']), 
-        use_container_width=True,
-        # AHORA NO OCULTAMOS EL ÍNDICE para que puedas ver qué número borrar
-        hide_index=False 
+        df.iloc[visibles].assign(Estatus=estatus.iloc[visibles]),
+        width="stretch",
+        # El índice es el ID del registro: el mismo que aparece en la Zona de Peligro
+        hide_index=False,
+        column_config={"Estatus": st.column_config.TextColumn("Estatus", width="small")},
     )
+    st.caption(f"Página {pagina} de {paginas} · {len(posiciones)} empleados")
+
+
+with perf.span("panel"):
+    panel_en_vivo()
+vigilante()
 
-panel_en_vivo()
\ No newline at end of file
+corrida = perf.end()
+if perf.ENABLED and es_admin():
+    perf.render_panel(st.sidebar, corrida)
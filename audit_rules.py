@@ -0,0 +1,142 @@
+"""Motor de reglas de auditoría para el monitor de personal (app.py).
+
+Las reglas se declaran como datos (lista de diccionarios o un JSON) y se
+compilan una vez; la evaluación compara columnas completas contra umbrales
+con NumPy, en un solo paso sobre todo el DataFrame, en lugar de llamar a una
+función de Python por fila.
+
+Cada regla compara una columna (o el puntaje ponderado) con un umbral, que
+puede variar por departamento, y asigna una severidad. El estatus de cada
+empleado es la severidad más alta de las reglas que cumple.
+
+Ejemplo de configuración::
+
+    {
+      "severidades": ["OK", "OBSERVAR", "AUDITAR", "CRÍTICO"],
+      "pesos": {"Faltas": 3, "Retardos": 1},
+      "alerta_desde": "AUDITAR",
+      "reglas": [
+        {"nombre": "Faltas", "columna": "Faltas", "operador": ">", "umbral": 0, "severidad": "AUDITAR"},
+        {"nombre": "Retardos", "columna": "Retardos", "operador": ">=", "umbral": 3,
+         "severidad": "AUDITAR", "por_departamento": {"Mensajeria": 5}},
+        {"nombre": "Reincidencia", "columna": "Puntaje", "operador": ">=", "umbral": 9, "severidad": "CRÍTICO"}
+      ]
+    }
+"""
+import json
+import operator
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+SCORE_COLUMN = "Puntaje"  # suma ponderada de columnas según "pesos"
+DEPARTMENT_COLUMN = "Departamento"
+SEVERITIES = ("OK", "AUDITAR")
+ALERT_SEVERITY = "AUDITAR"  # desde aquí cuenta como alerta, si la configuración no dice otra cosa
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+             "==": operator.eq, "!=": operator.ne}
+
+# Mismo criterio que tenía el tablero: cualquier falta o 3+ retardos
+DEFAULT_CONFIG = {
+    "severidades": list(SEVERITIES),
+    "pesos": {},
+    "reglas": [
+        {"nombre": "Faltas", "columna": "Faltas", "operador": ">", "umbral": 0, "severidad": "AUDITAR"},
+        {"nombre": "Retardos", "columna": "Retardos", "operador": ">=", "umbral": 3, "severidad": "AUDITAR"},
+    ],
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    column: str
+    op: str
+    threshold: float
+    severity: str
+    by_department: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, item):
+        return cls(item["nombre"], item["columna"], item.get("operador", ">="), item["umbral"],
+                   item["severidad"], dict(item.get("por_departamento", {})))
+
+
+@dataclass
+class Evaluation:
+    status: pd.Series        # categórica, ordenada por severidad
+    hits: dict               # regla -> empleados que la cumplen
+    by_severity: dict        # severidad -> empleados con ese estatus
+
+
+class RuleEngine:
+    def __init__(self, config=None):
+        config = config or DEFAULT_CONFIG
+        self.severities = tuple(config.get("severidades", SEVERITIES))
+        self.weights = dict(config.get("pesos", {}))
+        self.rules = [Rule.from_config(item) for item in config["reglas"]]
+        for rule in self.rules:
+            if rule.op not in OPERATORS:
+                raise ValueError(f"Operador no soportado en '{rule.name}': {rule.op}")
+            if rule.severity not in self.severities:
+                raise ValueError(f"Severidad desconocida en '{rule.name}': {rule.severity}")
+        self._rank = {s: k for k, s in enumerate(self.severities)}
+        # Sin "alerta_desde": AUDITAR si existe, si no la segunda severidad más baja
+        default = ALERT_SEVERITY if ALERT_SEVERITY in self._rank else self.severities[min(1, len(self.severities) - 1)]
+        self.alert_from = config.get("alerta_desde", default)
+        if self.alert_from not in self._rank:
+            raise ValueError(f"Severidad desconocida en 'alerta_desde': {self.alert_from}")
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _values(self, df, column):
+        if column == SCORE_COLUMN:
+            score = np.zeros(len(df))
+            for col, weight in self.weights.items():
+                score += weight * df[col].to_numpy(dtype=float)
+            return score
+        return df[column].to_numpy(dtype=float)
+
+    def _thresholds(self, rule, departments):
+        """Umbral por fila: un escalar, o el del departamento vía sus códigos."""
+        if not rule.by_department:
+            return rule.threshold
+        codes, uniques = departments
+        table = np.array([rule.by_department.get(u, rule.threshold) for u in uniques] + [rule.threshold],
+                         dtype=float)
+        return table[codes]  # código -1 (sin departamento) toma el umbral general del final
+
+    def evaluate(self, df):
+        n = len(df)
+        departments = pd.factorize(df[DEPARTMENT_COLUMN]) if DEPARTMENT_COLUMN in df.columns else (
+            np.full(n, -1), [])
+        rank = np.zeros(n, dtype=np.int8)
+        hits = {}
+        for rule in self.rules:
+            mask = OPERATORS[rule.op](self._values(df, rule.column), self._thresholds(rule, departments))
+            hits[rule.name] = int(np.count_nonzero(mask))
+            np.maximum(rank, np.where(mask, self._rank[rule.severity], 0).astype(np.int8), out=rank)
+
+        status = pd.Series(pd.Categorical.from_codes(rank, categories=self.severities, ordered=True),
+                           index=df.index, name="Estatus")
+        counts = np.bincount(rank, minlength=len(self.severities))
+        return Evaluation(status, hits, dict(zip(self.severities, counts.tolist())))
+
+    def labels(self):
+        """Etiqueta con ícono por severidad (🟢 la más baja, 🔴 la más alta, 🟡/🟠 en medio)."""
+        last = len(self.severities) - 1
+        icons = ["🟢" if k == 0 else "🔴" if k == last else "🟡" if k * 2 <= last else "🟠"
+                 for k in range(len(self.severities))]
+        return {s: f"{icon} {s}" for icon, s in zip(icons, self.severities)}
+
+    def flagged(self, evaluation, from_severity=None):
+        """Empleados con estatus igual o peor que ``from_severity`` (por defecto ``alert_from``)."""
+        severity = from_severity or self.alert_from
+        if severity not in self._rank:
+            raise ValueError(f"Severidad desconocida: {severity}")
+        start = self._rank[severity]
+        return sum(evaluation.by_severity[s] for s in self.severities[start:])
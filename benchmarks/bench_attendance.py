@@ -0,0 +1,57 @@
+"""Micro-benchmark de tendencias de asistencia: acumulados vs recorrer la bitácora.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_attendance          # 1, 3 y 5 años de eventos (200 por día)
+    python -m benchmarks.bench_attendance 10 500   # 10 años, 500 eventos por día
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from benchmarks.bench_search import best_of
+from employee_store import SQLiteEmployeeStore
+
+DEPARTAMENTOS = ("Calidad", "RRHH", "Administracion", "Hematologia", "Inmunologia", "Santa Anita",
+                 "Mensajeria", "Recepcion", "Otro")
+
+
+def fill(store, years, per_day, seed=0):
+    """Eventos sintéticos escritos por el mismo camino que un guardado (``_record``)."""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1) - timedelta(days=365 * years)
+    with store._transaction() as conn:
+        for day in range(365 * years):
+            when = start + timedelta(days=day, hours=9)
+            store.clock = lambda: when
+            depts = rng.integers(0, len(DEPARTAMENTOS), per_day)
+            deltas = rng.integers(0, 3, (per_day, 2))
+            for k in range(per_day):
+                store._record(conn, k, DEPARTAMENTOS[depts[k]], int(deltas[k, 0]), int(deltas[k, 1]))
+    store.clock = lambda: datetime(2025, 1, 1)
+
+
+def scan_events(store):
+    """La alternativa sin acumulados: agrupar la bitácora en cada consulta."""
+    return store._query("SELECT substr(registrado, 1, 7), departamento, SUM(retardos), SUM(faltas), COUNT(*) "
+                        "FROM asistencia_eventos WHERE registrado >= '2024-02' GROUP BY 1, 2")
+
+
+def run(years, per_day):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteEmployeeStore(os.path.join(tmp, "empleados.db"))
+        fill(store, years, per_day)
+        events = store._query("SELECT COUNT(*) FROM asistencia_eventos")[0][0]
+        t_rollup = best_of(lambda: store.monthly_trend(12))
+        t_scan = best_of(lambda: scan_events(store), repeat=3)
+        print(f"{years:>5} | {events:>10,} | {t_rollup * 1000:>14.2f} | {t_scan * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    per_day = args[1] if len(args) > 1 else 200
+    print(f"{'años':>5} | {'eventos':>10} | {'acumulados (ms)':>14} | {'bitácora (ms)':>12}")
+    for years in args[:1] or [1, 3, 5]:
+        run(years, per_day)
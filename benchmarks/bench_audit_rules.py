@@ -0,0 +1,52 @@
+"""Micro-benchmark del estatus de auditoría: motor de reglas vs ``df.apply``.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_audit_rules            # 1k, 100k y 1M empleados
+    python -m benchmarks.bench_audit_rules 5000 50000
+"""
+import sys
+
+from audit_rules import RuleEngine
+from benchmarks.bench_search import best_of
+from fixtures import make_staff
+
+DEPARTAMENTOS = ("Calidad", "RRHH", "Administracion", "Hematologia", "Inmunologia", "Santa Anita",
+                 "Mensajeria", "Recepcion", "Otro")
+# Configuración con las tres capacidades: umbral por departamento, puntaje ponderado y severidades
+CONFIG = {
+    "severidades": ["OK", "OBSERVAR", "AUDITAR", "CRÍTICO"],
+    "pesos": {"Faltas": 3, "Retardos": 1},
+    "reglas": [
+        {"nombre": "Faltas", "columna": "Faltas", "operador": ">", "umbral": 0, "severidad": "AUDITAR"},
+        {"nombre": "Retardos", "columna": "Retardos", "operador": ">=", "umbral": 3,
+         "severidad": "AUDITAR", "por_departamento": {"Mensajeria": 5, "Santa Anita": 4}},
+        {"nombre": "Retardos leves", "columna": "Retardos", "operador": ">=", "umbral": 2, "severidad": "OBSERVAR"},
+        {"nombre": "Reincidencia", "columna": "Puntaje", "operador": ">=", "umbral": 9, "severidad": "CRÍTICO"},
+    ],
+}
+
+
+def evaluar(fila):
+    """El criterio original del tablero."""
+    if fila['Faltas'] > 0 or fila['Retardos'] >= 3:
+        return 'AUDITAR'
+    else:
+        return 'OK'
+
+
+def run(n):
+    df = make_staff(n, departments=DEPARTAMENTOS)
+    default, configured = RuleEngine(), RuleEngine(CONFIG)
+    repeat = 1 if n >= 1_000_000 else 5
+    t_apply = best_of(lambda: df.apply(evaluar, axis=1), repeat=repeat)
+    t_default = best_of(lambda: default.evaluate(df))
+    t_config = best_of(lambda: configured.evaluate(df))
+    print(f"{n:>9,} | {t_apply * 1000:>10.1f} | {t_default * 1000:>12.2f} | {t_config * 1000:>12.2f} | "
+          f"{t_apply / t_default:>7.0f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    print(f"{'empleados':>9} | {'apply (ms)':>10} | {'motor (ms)':>12} | {'4 reglas (ms)':>12} | {'mejora':>8}")
+    for size in sizes:
+        run(size)
@@ -0,0 +1,67 @@
+"""Micro-benchmark del filtro del Explorador: índice vs ``str.contains``.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_search            # 10k, 100k y 1M documentos
+    python -m benchmarks.bench_search 10000 50000
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from search_index import SearchIndex
+
+QUERIES = ("pr", "auditoría", "control de", "cal-0042", "zzz-no-existe")
+REPEAT = 5
+WORDS = ("Control", "Documentos", "Auditoría", "Interna", "Compras", "Calibración", "Equipos",
+         "Capacitación", "Personal", "Acciones", "Correctivas", "Revisión", "Dirección",
+         "Muestras", "Laboratorio", "Recepción", "Quejas", "Clientes", "Proveedores", "Riesgos")
+
+
+def make_registry(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prefixes = np.array(["PR", "FO", "MA", "IT", "RG"])[rng.integers(0, 5, n)]
+    areas = np.array(["CAL", "RH", "OPE", "VEN", "DIR"])[rng.integers(0, 5, n)]
+    codes = pd.Series(prefixes) + "-" + pd.Series(areas) + "-" + pd.Series(np.arange(n) % 10000).astype(str).str.zfill(4)
+    picks = rng.integers(0, len(WORDS), (n, 4))
+    words = np.array(WORDS)
+    titles = pd.Series(words[picks[:, 0]]) + " de " + words[picks[:, 1]] + " " + words[picks[:, 2]] + " " + words[picks[:, 3]]
+    status = np.array(["Vigente", "Vigente", "Vigente", "En Revisión", "Obsoleto"])[rng.integers(0, 5, n)]
+    return pd.DataFrame({"id": np.arange(1, n + 1), "codigo": codes, "titulo": titles, "estatus": status})
+
+
+def best_of(fn, repeat=REPEAT):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def contains_filter(df, search, status):
+    """El filtro original del Explorador."""
+    view = df.copy()
+    view = view[view["titulo"].str.contains(search, case=False) | view["codigo"].str.contains(search, case=False)]
+    return view[view["estatus"] == status]
+
+
+def run(n):
+    df = make_registry(n)
+    start = time.perf_counter()
+    index = SearchIndex(df)
+    build = time.perf_counter() - start
+    print(f"\n{n:>9,} documentos · construcción del índice: {build * 1000:,.0f} ms")
+    print(f"{'consulta':>16} | {'índice (ms)':>11} | {'contains (ms)':>13} | {'filas':>7}")
+    for query in QUERIES:
+        t_index = best_of(lambda: df.iloc[index.search(query, "Vigente")])
+        t_scan = best_of(lambda: contains_filter(df, query, "Vigente"), repeat=1 if n >= 1_000_000 else REPEAT)
+        hits = len(index.search(query, "Vigente"))
+        print(f"{query:>16} | {t_index * 1000:>11.2f} | {t_scan * 1000:>13.2f} | {hits:>7,}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        run(size)
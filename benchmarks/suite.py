@@ -0,0 +1,362 @@
+"""Suite de rendimiento de las rutas de datos del tablero, con línea base.
+
+Cada caso genera sus datos (semilla fija) en varios tamaños y mide la
+latencia (mejor de N corridas) y el pico de memoria (tracemalloc, en una
+corrida aparte para no inflar la latencia). Los casos cuyo trabajo corre en
+otro proceso reportan el pico de ese proceso (``peak_mb`` de la función).
+Las rutas del registro (paginar, carga completa, delta) corren contra el
+cliente local ``fake_supabase``. Los resultados se comparan con
+``benchmarks/baseline.json``; si algún caso empeora más de la tolerancia, el
+proceso termina con código 1.
+
+Los tiempos de la línea base se escalan por una carga de calibración fija
+(medida al guardar la línea base y al comparar), así que una máquina más
+lenta o más cargada no se reporta como regresión. El factor nunca baja de 1:
+una máquina más rápida no vuelve más estricta la comparación.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.suite                    # comparar contra la línea base
+    python -m benchmarks.suite --update-baseline  # guardar los resultados como nueva línea base
+    python -m benchmarks.suite --quick            # sólo el tamaño más chico de cada caso
+    python -m benchmarks.suite --only explorador
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from audit_rules import RuleEngine
+from benchmarks.bench_search import WORDS, make_registry
+from cleaning import DOCUMENT_SCHEMA, clean_data_for_upload
+from due_index import DueDateIndex, local_due
+from employee_store import SQLiteEmployeeStore
+from explorer import local_page
+from fake_supabase import FakeSupabase
+from fixtures import make_staff
+from management import option_labels
+from registry import RegistryCache, fetch_pages, to_frame
+from search_index import SearchIndex
+from snapshot import RegistrySnapshot
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPEAT = 5
+TIME_TOLERANCE = 1.0     # 2x: la carga de la máquina varía entre corridas; las regresiones reales
+                         # (volver a iterrows/apply/str.contains) son de 10x o más
+MEMORY_TOLERANCE = 0.25
+MIN_SECONDS = 0.002      # debajo de esto el ruido domina: no se compara el tiempo
+AREAS = ("Calidad", "RRHH", "Operaciones", "Ventas", "Dirección", "Otro")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTA_FRACTION = 0.01  # filas cambiadas entre dos sincronizaciones del caso registro_delta
+# Proceso nuevo que pinta el login de dashboard.py (modo "bare", sin servidor) y sale
+# sin esperar hilos en segundo plano: mide el arranque en frío hasta el formulario.
+# Anota su propio pico de memoria (RSS máximo) en ``rss_path``: el trabajo ocurre en el
+# hijo, tracemalloc en el padre no lo ve
+LOGIN_SCRIPT = """
+import os, runpy, sys
+sys.path.insert(0, {root!r})
+runpy.run_path(os.path.join({root!r}, "dashboard.py"), run_name="__main__")
+sys.stdout.flush()
+try:
+    # VmHWM es de este proceso; ru_maxrss en Linux arrastra el del padre a través del fork + exec
+    with open("/proc/self/status") as status:
+        mb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:")) / 1024
+except OSError:
+    import resource  # macOS: ru_maxrss en bytes
+    mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+with open({rss_path!r}, "w") as f:
+    f.write(str(mb))
+os._exit(0)
+"""
+
+
+@dataclass
+class Result:
+    case: str
+    size: int
+    seconds: float
+    peak_mb: float
+
+    @property
+    def key(self):
+        return f"{self.case}@{self.size}"
+
+
+# --- DATOS GENERADOS ---
+def make_rows(n, seed=0):
+    """Filas como las regresa Supabase (fechas en texto ISO)."""
+    df = make_registry(n, seed)
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 1000, n), unit="D")
+    df["revision"] = (rng.integers(0, 9, n)).astype(str)
+    df["area"] = np.array(AREAS)[rng.integers(0, len(AREAS), n)]
+    df["fecha_emision"] = days.strftime("%Y-%m-%d")
+    df["proxima_revision"] = (days + pd.Timedelta(days=365)).strftime("%Y-%m-%d")
+    df["link_documento"] = "https://fake.supabase.co/storage/v1/object/public/documentos/" + df["codigo"] + ".pdf"
+    return df.to_dict(orient="records")
+
+
+def make_csv_frame(n, seed=0):
+    """El CSV de carga masiva (encabezados en español, fechas día/mes/año, algunas filas malas)."""
+    rows = pd.DataFrame(make_rows(n, seed))
+    rng = np.random.default_rng(seed)
+    sources = {col.name: col.source for col in DOCUMENT_SCHEMA}
+    csv = pd.DataFrame({sources[c]: rows[c] for c in ("codigo", "titulo", "revision", "area", "link_documento")})
+    for col in ("fecha_emision", "proxima_revision"):
+        csv[sources[col]] = pd.to_datetime(rows[col]).dt.strftime("%d/%m/%Y")
+    csv[sources["estatus"]] = rows["estatus"].str.lower()
+    csv[sources["tipo_documento"]] = np.array(["Procedimiento", "Formato", "manual", "Otro"])[rng.integers(0, 4, n)]
+    return csv.astype(str)
+
+
+# --- CASOS: cada uno prepara sus datos (``tmp``: directorio de trabajo) y retorna la función a medir ---
+def case_limpieza(n, tmp):
+    csv = make_csv_frame(n)
+    return lambda: clean_data_for_upload(csv)
+
+
+def case_dataframe(n, tmp):
+    rows = make_rows(n)
+    return lambda: to_frame(rows)
+
+
+def case_explorador(n, tmp):
+    df = to_frame(make_rows(n))
+    index = SearchIndex(df)
+
+    def run():
+        for search in ("", "pr", "control de", "cal-00"):
+            local_page(df, index, search, "Vigente")
+    return run
+
+
+def case_opciones(n, tmp):
+    df = to_frame(make_rows(n))
+    return lambda: option_labels(df)
+
+
+def case_vencimientos(n, tmp):
+    """Panel de vencimientos: rangos con y sin área sobre el índice de la versión."""
+    df = to_frame(make_rows(n))
+    index = DueDateIndex(df)
+
+    def run():
+        for area in (None, "Calidad", "Ventas"):
+            local_due(df, index, "2025-03-01", "2025-03-31", area)
+            local_due(df, index, None, "2025-06-30", area)
+    return run
+
+
+def case_instantanea(n, tmp):
+    """Arranque de un proceso con instantánea: abrir el registro de disco (mmap) en lugar de descargarlo."""
+    snapshot = RegistrySnapshot(os.path.join(tmp, f"registro_{n}.arrow"))
+    snapshot.save(to_frame(make_rows(n)))
+    return snapshot.load
+
+
+def case_personal(n, tmp):
+    """El ciclo de app.py: leer el personal, evaluar las reglas y guardar un cambio."""
+    store = SQLiteEmployeeStore(os.path.join(tmp, f"empleados_{n}.db"))
+    store.replace_all(make_staff(n, departments=AREAS))
+    engine = RuleEngine()
+    counter = iter(range(10 ** 9))
+
+    def run():
+        df = store.all()
+        engine.evaluate(df)
+        store.upsert(df["Nombre"].iat[0], "Calidad", next(counter) % 5, 0)
+    return run
+
+
+def case_arranque(n, tmp):
+    """Arranque en frío: intérprete + streamlit + lo que importe la ruta del login."""
+    rss_path = os.path.join(tmp, "arranque_rss.txt")
+    code = LOGIN_SCRIPT.format(root=ROOT, rss_path=rss_path)
+    peaks = []
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=tmp, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(rss_path, encoding="utf-8") as f:
+            peaks.append(float(f.read()))
+
+    run.peak_mb = lambda: max(peaks)
+    return run
+
+
+def _registry_client(n):
+    return FakeSupabase({"documentos_sgc": make_rows(n)}, track_changes=True)
+
+
+def case_registro_paginas(n, tmp):
+    """Descarga paginada por llave (``fetch_pages``) contra el cliente local."""
+    client = _registry_client(n)
+    return lambda: sum(len(page) for page in fetch_pages(client))
+
+
+def case_registro_carga(n, tmp):
+    """Carga completa de la caché: páginas + DataFrame compacto."""
+    client = _registry_client(n)
+    return lambda: RegistryCache()._full_load(client)
+
+
+def case_registro_delta(n, tmp):
+    """Sincronización delta: ``DELTA_FRACTION`` de filas cambiadas y una baja entre corridas."""
+    client = _registry_client(n)
+    cache = RegistryCache()
+    cache._full_load(client)
+    changed = max(1, int(n * DELTA_FRACTION))
+    counter = iter(range(10 ** 9))
+
+    def run():
+        k = next(counter)
+        client.advance(60)
+        stamp = client.now.isoformat()
+        rows = client.tables["documentos_sgc"]  # cada borrado reemplaza la lista
+        for row in rows[k * changed % len(rows):][:changed]:
+            row["revision"], row["updated_at"] = str(k % 9), stamp
+        client.table("documentos_sgc").delete().eq("id", rows[-1]["id"]).execute()
+        cache._sync_delta(client)
+    return run
+
+
+CASES = {
+    "limpieza_csv": (case_limpieza, (1_000, 10_000, 100_000)),
+    "dataframe_respuesta": (case_dataframe, (1_000, 10_000, 100_000)),
+    "explorador": (case_explorador, (1_000, 10_000, 100_000)),
+    "opciones_gestion": (case_opciones, (1_000, 10_000, 100_000)),
+    "vencimientos": (case_vencimientos, (1_000, 10_000, 100_000)),
+    "instantanea_registro": (case_instantanea, (1_000, 10_000, 100_000)),
+    "ciclo_personal": (case_personal, (100, 1_000, 10_000)),
+    "arranque_login": (case_arranque, (1,)),
+    # El cliente local filtra y ordena en Python: 100k filas medirían al sustituto, no al registro
+    "registro_paginas": (case_registro_paginas, (1_000, 10_000)),
+    "registro_carga": (case_registro_carga, (1_000, 10_000)),
+    "registro_delta": (case_registro_delta, (1_000, 10_000)),
+}
+
+
+# --- MEDICIÓN ---
+def measure(fn, repeat=REPEAT):
+    fn()  # calentamiento (cachés de pandas, páginas de SQLite)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    if hasattr(fn, "peak_mb"):
+        return min(times), fn.peak_mb()  # el trabajo corre en otro proceso
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 2 ** 20
+
+
+def calibrate(repeat=REPEAT):
+    """Tiempo de una carga fija (NumPy + pandas + Python puro) en esta máquina."""
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 1000, 200_000)
+    words = [f"w{i}" for i in range(50_000)]
+
+    def work():
+        np.sort(values)
+        pd.Series(values).astype(str).str.len().sum()
+        sorted(words, key=len)
+
+    return measure(work, repeat)[0]
+
+
+def run_suite(only=None, quick=False, repeat=REPEAT, out=sys.stdout):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (setup, sizes) in CASES.items():
+            if only and name not in only:
+                continue
+            for size in sizes[:1] if quick else sizes:
+                fn = setup(size, tmp)
+                seconds, peak = measure(fn, repeat)
+                result = Result(name, size, seconds, peak)
+                results.append(result)
+                print(f"{name:>20} | {size:>8,} | {seconds * 1000:>10.2f} ms | {peak:>8.1f} MB", file=out)
+    return results
+
+
+def compare(results, baseline, speed=1.0, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Lista de regresiones (texto) contra la línea base; casos nuevos no cuentan.
+
+    ``speed``: calibración actual / calibración de la línea base (>1 = máquina más lenta).
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.key)
+        if not base:
+            continue
+        expected = base["seconds"] * speed
+        if result.seconds > MIN_SECONDS and result.seconds > expected * (1 + time_tolerance):
+            regressions.append(f"{result.key}: {result.seconds * 1000:.2f} ms "
+                               f"(esperado {expected * 1000:.2f} ms según la línea base)")
+        if result.peak_mb > max(base["peak_mb"], 0.1) * (1 + memory_tolerance):
+            regressions.append(f"{result.key}: {result.peak_mb:.1f} MB (línea base {base['peak_mb']:.1f} MB)")
+    return regressions
+
+
+def load_baseline(path=BASELINE):
+    """``(resultados, calibración)``; vacío si no hay línea base."""
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["results"], data["machine"].get("calibration")
+
+
+def save_baseline(results, calibration, path=BASELINE):
+    data = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "pandas": pd.__version__, "numpy": np.__version__, "calibration": calibration},
+        "results": {r.key: {k: v for k, v in asdict(r).items() if k in ("seconds", "peak_mb")}
+                    for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--only", nargs="*", choices=sorted(CASES))
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    calibration = calibrate()
+    print(f"{'caso':>20} | {'tamaño':>8} | {'latencia':>13} | {'pico':>11}")
+    results = run_suite(args.only, args.quick)
+    # Segunda calibración: la carga de la máquina puede cambiar durante la suite
+    calibration = min(calibration, calibrate())
+    if args.update_baseline:
+        save_baseline(results, calibration)
+        print(f"Línea base guardada en {BASELINE}")
+        return 0
+    baseline, base_calibration = load_baseline()
+    speed = max(1.0, calibration / base_calibration) if base_calibration else 1.0
+    print(f"Calibración: {calibration * 1000:.1f} ms (factor {speed:.2f} contra la línea base)")
+    regressions = compare(results, baseline, speed, args.tolerance)
+    for line in regressions:
+        print(f"REGRESIÓN {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
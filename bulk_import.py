@@ -0,0 +1,166 @@
+"""Carga masiva del registro desde CSV por lotes, en paralelo y con upsert.
+
+Reemplaza el antiguo "borrar todo + un solo insert": el CSV se lee por
+trozos, cada lote se envía como ``upsert`` sobre ``codigo`` desde un grupo
+acotado de hilos y, al final, sólo se borran los documentos que ya no
+aparecen en el archivo. El registro nunca queda vacío a mitad de la carga.
+
+Los archivos que dejan de usarse (documentos borrados o cuyo
+``link_documento`` cambió) se liberan al final con ``release_objects``: sólo
+se borran del bucket si ninguna otra fila los referencia.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from cleaning import DOCUMENT_SCHEMA, ValidationReport, clean_data_for_upload
+from registry import TABLE, fetch_pages
+from uploads import BUCKET, release_objects
+
+CHUNK_ROWS = 5000   # filas por trozo leído del CSV
+BATCH_SIZE = 500    # filas por petición de upsert
+MAX_WORKERS = 4     # peticiones simultáneas a Supabase
+DELETE_CHUNK = 200  # ids por petición de borrado (límite de longitud de URL)
+KEY_SOURCE = next(col.source for col in DOCUMENT_SCHEMA if col.key)  # encabezado del código en el CSV
+
+
+@dataclass
+class BatchResult:
+    index: int
+    rows: int
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class ImportReport:
+    batches: list = field(default_factory=list)
+    validation: ValidationReport = field(default_factory=ValidationReport)  # filas rechazadas
+    deleted: int = 0
+    removed_objects: list = field(default_factory=list)
+    storage_error: str = None  # la liberación de archivos falló; las filas ya se escribieron
+
+    @property
+    def upserted(self):
+        return sum(b.rows for b in self.batches if b.ok)
+
+    @property
+    def failed(self):
+        return [b for b in self.batches if not b.ok]
+
+
+def iter_batches(csv_file, clean=clean_data_for_upload, chunk_rows=CHUNK_ROWS,
+                 batch_size=BATCH_SIZE, report=None):
+    """Lee el CSV por trozos, los limpia y genera lotes de registros listos para subir.
+
+    Un código repetido en el archivo (en el mismo trozo o en otro) se carga con
+    su primera aparición; las siguientes quedan como filas rechazadas. Si no,
+    dos lotes con el mismo código irían en paralelo y ganaría cualquiera.
+    """
+    seen = set()
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_rows, dtype=str):
+        df, validation = clean(chunk)
+        repeated = df["codigo"].duplicated() | df["codigo"].isin(seen)
+        if repeated.any():
+            validation = validation.merge(ValidationReport(0, pd.DataFrame({
+                "fila": df.index[repeated] + 2,
+                "columna": KEY_SOURCE,
+                "valor": df.loc[repeated, "codigo"].astype(str).to_numpy(),
+                "motivo": "código repetido en el archivo",
+            })))
+            df = df[~repeated]
+        seen.update(df["codigo"])
+        if report is not None:
+            report.validation = report.validation.merge(validation)
+        records = df.to_dict(orient="records")
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+
+
+def delete_missing(client, keep_codes, page_size=1000):
+    """Borra los documentos cuyo código no está en ``keep_codes``.
+
+    Retorna las filas borradas (``id``, ``codigo``, ``link_documento``) para liberar sus archivos.
+    """
+    stale = [
+        row
+        for page in fetch_pages(client, page_size, columns="id,codigo,link_documento")
+        for row in page
+        if row.get("codigo") not in keep_codes
+    ]
+    stale_ids = [row["id"] for row in stale]
+    for start in range(0, len(stale_ids), DELETE_CHUNK):
+        client.table(TABLE).delete().in_("id", stale_ids[start:start + DELETE_CHUNK]).execute()
+    return stale
+
+
+def _replaced_links(client, batch):
+    """Links actuales que el lote va a sobrescribir (consulta antes del upsert)."""
+    if not any("link_documento" in row for row in batch):
+        return {}
+    codes = [row["codigo"] for row in batch]
+    existing = client.table(TABLE).select("codigo,link_documento").in_("codigo", codes).execute().data or []
+    new = {row["codigo"]: row.get("link_documento") for row in batch}
+    return {row["codigo"]: row["link_documento"] for row in existing
+            if row.get("link_documento") and row["link_documento"] != new.get(row["codigo"])}
+
+
+def import_csv(client, csv_file, clean=clean_data_for_upload, batch_size=BATCH_SIZE,
+               max_workers=MAX_WORKERS, chunk_rows=CHUNK_ROWS, on_batch=None, bucket=BUCKET):
+    """Importa el CSV con upserts concurrentes y concilia los borrados al final.
+
+    ``on_batch(result, report)`` se llama tras cada lote, siempre desde el
+    hilo que invocó ``import_csv`` (seguro para dibujar con Streamlit). Si
+    algún lote falla no se borra nada: una carga parcial no debe podar el
+    registro.
+    """
+    report = ImportReport()
+    seen_codes = set()
+    pending = set()
+    stale_links = []  # se liberan al final, una sola vez
+
+    def send(index, batch):
+        try:
+            replaced = _replaced_links(client, batch)
+            client.table(TABLE).upsert(batch, on_conflict="codigo").execute()
+            stale_links.extend(replaced.values())
+            return BatchResult(index, len(batch))
+        except Exception as e:
+            return BatchResult(index, len(batch), error=str(e))
+
+    def collect(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            pending.discard(future)
+            report.batches.append(future.result())
+            if on_batch:
+                on_batch(future.result(), report)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for index, batch in enumerate(iter_batches(csv_file, clean, chunk_rows, batch_size, report)):
+            seen_codes.update(row["codigo"] for row in batch)
+            # Como máximo 2 lotes en espera por hilo: el CSV no se materializa entero
+            if len(pending) >= max_workers * 2:
+                collect(FIRST_COMPLETED)
+            pending.add(pool.submit(send, index, batch))
+        while pending:
+            collect(FIRST_COMPLETED)
+
+    report.batches.sort(key=lambda b: b.index)
+    # Un código rechazado por validación sigue en el archivo: su documento no se borra
+    seen_codes |= report.validation.rejected_keys
+    if not report.failed and seen_codes:
+        deleted = delete_missing(client, seen_codes)
+        report.deleted = len(deleted)
+        stale_links += [row.get("link_documento") for row in deleted]
+    # Después de escribir y borrar las filas: el conteo de referencias ya no las incluye
+    if stale_links:
+        try:
+            report.removed_objects = release_objects(client, stale_links, bucket)
+        except Exception as e:
+            report.storage_error = str(e)
+    return report
@@ -0,0 +1,166 @@
+"""Esquema declarativo y limpieza del CSV de documentos antes de subirlo.
+
+Cada columna del CSV se describe una sola vez (encabezado, columna en la
+base, tipo, formatos de fecha y valores permitidos). La limpieza hace un
+único paso vectorizado por columna y, en lugar de convertir en silencio los
+valores malos en nulos, separa las filas rechazadas en un reporte.
+"""
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+ESTATUS = ("Vigente", "En Revisión", "Obsoleto")
+TIPOS_DOCUMENTO = ("Procedimiento", "Formato", "Manual", "Instructivo", "Registro", "Externo")
+# Día primero, como se capturan en las hojas del SGC; ISO como respaldo
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+
+
+@dataclass(frozen=True)
+class Column:
+    source: str              # encabezado en el CSV
+    name: str                # columna en documentos_sgc
+    kind: str = "text"       # "text" | "date"
+    formats: tuple = ()
+    allowed: tuple = None
+    required: bool = False
+    default: str = None
+    key: bool = False        # identifica el documento (upsert / conciliación)
+
+
+DOCUMENT_SCHEMA = (
+    Column("Código del Documento", "codigo", required=True, key=True),
+    Column("Título del Documento", "titulo"),
+    Column("Versión Actual", "revision", default="0"),
+    Column("Fecha de Emisión", "fecha_emision", kind="date", formats=DATE_FORMATS),
+    Column("Próxima Revisión", "proxima_revision", kind="date", formats=DATE_FORMATS),
+    Column("Área Aplicable", "area"),
+    Column("Estado", "estatus", allowed=ESTATUS),
+    Column("Tipo de Documento", "tipo_documento", allowed=TIPOS_DOCUMENTO),
+    Column("Enlace al Documento Controlado", "link_documento"),
+    Column("Puesto Responsable", "responsable"),
+)
+
+
+@dataclass
+class ValidationReport:
+    total: int = 0
+    # Una fila por problema: fila del CSV (1 = encabezado), columna, valor y motivo
+    rejected: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=["fila", "columna", "valor", "motivo"]))
+    # Llaves (códigos) de filas rechazadas: el documento existe en el archivo aunque no se cargue
+    rejected_keys: set = field(default_factory=set)
+
+    @property
+    def rejected_rows(self):
+        return self.rejected["fila"].nunique()
+
+    @property
+    def accepted(self):
+        return self.total - self.rejected_rows
+
+    def summary(self):
+        """Conteo de problemas por columna y motivo."""
+        return self.rejected.groupby(["columna", "motivo"]).size().rename("filas").reset_index()
+
+    def merge(self, other):
+        frames = [f for f in (self.rejected, other.rejected) if not f.empty]
+        rejected = pd.concat(frames, ignore_index=True) if frames else self.rejected
+        return ValidationReport(self.total + other.total, rejected,
+                                self.rejected_keys | other.rejected_keys)
+
+
+def _fold(text):
+    """Minúsculas sin acentos ni espacios sobrantes, para comparar valores permitidos."""
+    text = unicodedata.normalize("NFKD", str(text).strip().casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _text(values):
+    """Texto sin espacios sobrantes; vacío -> nulo."""
+    values = values.astype("string").str.strip()
+    return values.mask(values == "")
+
+
+def _parse_dates(values, formats):
+    """Fechas en ISO (YYYY-MM-DD) como objeto; nulo si no hay valor o no se pudo leer.
+
+    Las fechas de una hoja se repiten mucho: se parsean y formatean sólo los
+    valores distintos (un paso vectorizado por formato, aplicado a lo que el
+    anterior no resolvió) y el resultado se reparte por código.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    pending = pd.Series(True, index=uniques.index)
+    for fmt in formats:
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(uniques[pending], format=fmt, errors="coerce")
+        pending &= parsed.isna()
+    iso = parsed.to_numpy().astype("datetime64[D]").astype(str).astype(object)
+    iso[parsed.isna().to_numpy()] = None
+    # El código -1 (valor vacío) toma el centinela nulo del final
+    iso = np.append(iso, None)
+    return pd.Series(iso[codes], index=values.index, dtype=object)
+
+
+def _canonical(values, allowed):
+    """Mapea variantes (mayúsculas, acentos) al valor permitido; lo demás -> nulo."""
+    lookup = {_fold(v): v for v in allowed}
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([lookup.get(_fold(u)) for u in uniques] + [None], dtype=object)
+    return pd.Series(mapped[codes], index=values.index, dtype=object)
+
+
+def clean_data_for_upload(df, schema=DOCUMENT_SCHEMA):
+    """Renombra, tipa y valida el CSV. Retorna ``(df_limpio, ValidationReport)``.
+
+    Las filas con algún problema no van en ``df_limpio``; quedan en el reporte.
+    """
+    out = {}
+    problems = []
+    bad = pd.Series(False, index=df.index)
+
+    def reject(mask, col, motivo):
+        nonlocal bad
+        if mask.any():
+            bad |= mask
+            problems.append(pd.DataFrame({
+                "fila": mask.index[mask] + 2,
+                "columna": col.source,
+                "valor": df.loc[mask, col.source].astype(str).to_numpy(),
+                "motivo": motivo,
+            }))
+
+    for col in schema:
+        if col.source not in df.columns:
+            if col.required:
+                raise ValueError(f"Falta la columna obligatoria '{col.source}'.")
+            continue
+        values = _text(df[col.source])
+        present = values.notna()
+
+        if col.kind == "date":
+            parsed = _parse_dates(values, col.formats)
+            reject(present & parsed.isna(), col, "fecha inválida")
+            out[col.name] = parsed
+            continue
+
+        if col.allowed:
+            canonical = _canonical(values, col.allowed)
+            reject(present & canonical.isna(), col, "valor no permitido")
+            values = canonical
+        if col.required:
+            reject(~present, col, "requerido")
+        if col.default is not None:
+            values = values.fillna(col.default)
+        out[col.name] = values.astype(object).where(values.notna(), None)
+
+    clean = pd.DataFrame(out, index=df.index)
+    keys = {v for col in schema if col.key and col.name in clean
+            for v in clean.loc[bad, col.name].dropna()}
+    rejected = (pd.concat(problems, ignore_index=True) if problems
+                else ValidationReport().rejected)
+    return clean[~bad], ValidationReport(len(df), rejected, keys)
@@ -1,11 +1,19 @@
 import streamlit as st
-import pandas as pd
-from supabase import create_client, Client
+import importlib
+import os
+import threading
 import time
+import perf
+from concurrent.futures import Future
 from datetime import datetime, timedelta
+# pandas, supabase y los módulos de datos no se importan aquí: el login no los
+# necesita y se cargan en segundo plano mientras se muestra (ver arranque)
 
 # --- 1. CONFIGURACIÓN VISUAL ---
 st.set_page_config(page_title="SGC Auditor", page_icon="🛡️", layout="wide", initial_sidebar_state="expanded")
+AREAS = ["Calidad", "RRHH", "Operaciones", "Ventas", "Dirección", "Otro"]
+MODULOS_DATOS = ("pandas", "resilient", "registry", "bulk_import", "cleaning", "search_index", "explorer", "management", "uploads",
+                 "due_index", "snapshot")
 
 # --- LOGIN SYSTEM ---
 def check_password():
@@ -16,6 +24,12 @@ def check_password():
     if st.session_state["password_correct"]:
         return True
 
+    # Mientras el usuario escribe, el cliente y los módulos de datos se preparan
+    try:
+        arranque()
+    except Exception:
+        pass  # sin secretos de Supabase: el error se muestra tras el login
+
     st.markdown("## 🔐 Acceso Restringido")
     st.markdown("Por favor, inicia sesión para acceder al tablero.")
     
@@ -33,6 +47,7 @@ def check_password():
             
             if user_input in secrets_passwords and password_input == secrets_passwords[user_input]:
                 st.session_state["password_correct"] = True
+                st.session_state["usuario"] = user_input
                 st.success("✅ Acceso concedido")
                 time.sleep(0.5)
                 st.rerun()
@@ -42,44 +57,105 @@ def check_password():
     return False
 
 # --- 2. CONEXIÓN ---
+def _conectar(url, key):
+    for modulo in MODULOS_DATOS:
+        importlib.import_module(modulo)
+    from supabase import create_client
+    from resilient import ResilientClient
+    # Un solo cliente para todas las sesiones: lecturas idénticas coalescidas, tope de
+    # concurrencia y reintentos; perf cuenta peticiones y bytes (si hay medición activa)
+    return ResilientClient(perf.instrument(create_client(url, key)))
+
 @st.cache_resource
+def arranque():
+    # Una vez por proceso, en un hilo: importar y crear el cliente no bloquea el login
+    url = st.secrets["SUPABASE_URL"]
+    key = st.secrets["SUPABASE_KEY"]
+    futuro = Future()
+
+    def tarea():
+        try:
+            futuro.set_result(_conectar(url, key))
+        except Exception as e:
+            futuro.set_exception(e)
+
+    threading.Thread(target=tarea, name="arranque-sgc", daemon=True).start()
+    return futuro
+
 def init_connection():
     try:
-        url = st.secrets["SUPABASE_URL"]
-        key = st.secrets["SUPABASE_KEY"]
-        return create_client(url, key)
+        return arranque().result()
     except Exception:
         return None
 
-# --- 3. LIMPIEZA PARA SUBIDA (Upload) ---
-def clean_data_for_upload(df):
-    rename_map = {
-        'Código del Documento': 'codigo',
-        'Título del Documento': 'titulo',
-        'Versión Actual': 'revision',
-        'Fecha de Emisión': 'fecha_emision',
-        'Próxima Revisión': 'proxima_revision',
-        'Área Aplicable': 'area',
-        'Estado': 'estatus',
-        'Tipo de Documento': 'tipo_documento',
-        'Enlace al Documento Controlado': 'link_documento',
-        'Puesto Responsable': 'responsable'
-    }
-    available_cols = {k: v for k, v in rename_map.items() if k in df.columns}
-    df = df[list(available_cols.keys())].rename(columns=available_cols)
-    
-    # Formatear fechas para que Supabase las entienda (YYYY-MM-DD)
-    for date_col in ['fecha_emision', 'proxima_revision']:
-        if date_col in df.columns:
-            df[date_col] = pd.to_datetime(df[date_col], dayfirst=True, errors='coerce')
-            df[date_col] = df[date_col].dt.strftime('%Y-%m-%d').replace('NaT', None)
-            
-    if 'revision' in df.columns:
-        df['revision'] = df['revision'].fillna('0').astype(str)
-    return df
+@st.cache_resource
+def get_registry_cache():
+    # Una sola caché del registro por proceso, compartida por todas las sesiones. Con
+    # SGC_SNAPSHOT=<archivo> arranca desde la instantánea en disco (compartida por las
+    # réplicas de la máquina) y se reconcilia con la base en segundo plano
+    from registry import RegistryCache
+    ruta = os.environ.get("SGC_SNAPSHOT")
+    if not ruta:
+        return RegistryCache()
+    from snapshot import RegistrySnapshot
+    cache = RegistryCache(snapshot=RegistrySnapshot(ruta))
+    cache.load_snapshot()
+    return cache
+
+@st.cache_resource(max_entries=2)
+def get_search_index(version, _df):
+    # Se construye una vez por versión del registro (el DataFrame no se hashea)
+    from search_index import SearchIndex
+    return SearchIndex(_df)
+
+@st.cache_resource(max_entries=2)
+def get_due_index(version, _df):
+    # Fechas de vencimiento ordenadas una vez por versión del registro
+    from due_index import DueDateIndex
+    return DueDateIndex(_df)
+
+@st.cache_resource
+def get_avisos(_client):
+    # Aviso diario por responsable en un hilo del proceso (opcional: SGC_AVISOS_DIR=<carpeta>)
+    carpeta = os.environ.get("SGC_AVISOS_DIR")
+    if not carpeta:
+        return None
+    from expiry_digest import DigestScheduler, write_digest
+    return DigestScheduler(_client, lambda aviso: write_digest(aviso, carpeta)).start()
+
+# --- MEDICIÓN DE RENDIMIENTO ---
+def es_admin():
+    # Los usuarios de la sección [admins] en secrets ven el panel de tiempos
+    return st.session_state.get("usuario") in st.secrets.get("admins", [])
 
-# --- 4. LÓGICA PRINCIPAL DEL DASHBOARD ---
+def medir_ejecucion():
+    # SGC_PERF=1 mide todas las sesiones (sólo bitácora); un admin puede activarlo para la suya
+    return perf.ENABLED or (es_admin() and st.session_state.get("perf_activo", False))
+
+def guardar_medicion(run):
+    st.session_state["perf_ultimo"] = run
+
+def panel_rendimiento():
+    if not es_admin():
+        return
+    st.sidebar.toggle("⏱️ Medir tiempos", key="perf_activo")
+    if medir_ejecucion():
+        perf.render_panel(st.sidebar, st.session_state.get("perf_ultimo"))
+
+# --- 3. LÓGICA PRINCIPAL DEL DASHBOARD ---
+@perf.traced("dashboard", enabled=medir_ejecucion, session=lambda: st.session_state.get("usuario"),
+             on_finish=guardar_medicion)
 def main_dashboard():
+    # Módulos de datos: ya cargados por el arranque en segundo plano (si no, se importan aquí)
+    import pandas as pd
+    from bulk_import import import_csv
+    from cleaning import ESTATUS, TIPOS_DOCUMENTO
+    from due_index import fetch_due, local_due
+    from explorer import PAGE_SIZE, fetch_page, local_page
+    from management import change_area, delete_documents, mark_obsolete, option_labels
+    from resilient import is_transient
+    from uploads import BUCKET, UploadItem, pair_from_filenames, pair_from_manifest, status_frame, upload_batch
+
     st.markdown("""
     <style>
         .stMetric {
@@ -107,28 +183,38 @@ def main_dashboard():
     supabase = init_connection()
 
     if supabase:
-        # Traer datos
-        response = supabase.table("documentos_sgc").select("*").execute()
+        get_avisos(supabase)
+        # Traer datos (desde la caché; sólo va a la base si expiró o hubo escrituras)
+        registry_cache = get_registry_cache()
+        if st.sidebar.button("🔄 Actualizar Datos"):
+            # Pide sólo los cambios desde la última sincronización
+            registry_cache.expire()
+        if registry_cache.pending:
+            st.sidebar.caption("🗂️ Mostrando la copia local del registro; sincronizando con la base…")
+        # KPIs desde la vista agregada: el primer pintado no descarga filas
+        try:
+            with perf.span("resumen"):
+                resumen = registry_cache.summary(supabase)
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            # Ya se reintentó (o el cortacircuitos está abierto): aviso en lugar del error crudo
+            st.warning("⏳ La base de datos no responde en este momento. Intenta de nuevo en unos segundos.")
+            st.button("🔄 Reintentar")
+            st.stop()
         
-        if response.data:
-            df = pd.DataFrame(response.data)
-            
-            # Convirtiendo fechas
-            if "proxima_revision" in df.columns:
-                df["proxima_revision"] = pd.to_datetime(df["proxima_revision"]).dt.date
-            if "fecha_emision" in df.columns:
-                df["fecha_emision"] = pd.to_datetime(df["fecha_emision"]).dt.date
-            
+        if resumen.total:
             # --- CALCULAR HEALTH SCORE ---
-            total_docs = len(df)
-            vigentes = len(df[df["estatus"] == "Vigente"])
+            total_docs = resumen.total
+            vigentes = resumen.vigentes
             score = int((vigentes / total_docs) * 100) if total_docs > 0 else 0
             
-            # --- PESTAÑAS ---
-            tab1, tab2, tab3 = st.tabs(["📊 Tablero Gerencial", "🔎 Explorador", "⚙️ Carga"])
+            # --- PESTAÑAS --- (ejecución diferida: sólo corre la pestaña abierta)
+            tab1, tab2, tab3 = st.tabs(["📊 Tablero Gerencial", "🔎 Explorador", "⚙️ Carga"],
+                                       key="vista_principal", on_change="rerun")
             
             # === TAB 1: GRÁFICOS ===
-            with tab1:
+            with tab1, perf.span("tablero"):
                 st.markdown("### 🏥 Salud del Sistema")
                 bar_color = "green" if score > 80 else "orange" if score > 50 else "red"
                 st.progress(score, text=f"Índice de Cumplimiento: {score}%")
@@ -136,92 +222,155 @@ def main_dashboard():
                 k1, k2, k3, k4 = st.columns(4)
                 k1.metric("Documentos", total_docs)
                 k2.metric("Vigentes", vigentes)
-                pendientes = len(df[df["estatus"] != "Vigente"])
-                k3.metric("Atención Requerida", pendientes, delta_color="inverse")
-                k4.metric("Áreas", df["area"].nunique())
+                k3.metric("Atención Requerida", resumen.pendientes, delta_color="inverse")
+                k4.metric("Áreas", resumen.areas)
 
                 c1, c2 = st.columns(2)
-                c1.bar_chart(df["estatus"].value_counts(), color="#ff4b4b")
-                c2.bar_chart(df["area"].value_counts())
+                c1.bar_chart(resumen.by_status, color="#ff4b4b")
+                c2.bar_chart(resumen.by_area)
+
+                # --- VENCIMIENTOS --- (en el tablero, bajo los indicadores; sólo consulta con el panel abierto)
+                vencimientos = st.expander("⏰ Vencimientos", key="vencimientos", on_change="rerun")
+                with vencimientos, perf.span("vencimientos"):
+                    if vencimientos.open:
+                        hoy = datetime.now().date()
+                        v1, v2, v3 = st.columns([2, 2, 1])
+                        rango = v1.date_input("Vencen entre", (hoy, hoy + timedelta(days=30)), key="venc_rango")
+                        v_area = v2.selectbox("Área", ["Todas", *AREAS], key="venc_area")
+                        incluir_vencidos = v3.checkbox("Incluir vencidos", key="venc_vencidos")
+                        if len(rango) == 2:
+                            inicio = None if incluir_vencidos else rango[0]
+                            area = None if v_area == "Todas" else v_area
+                            # Con el registro fresco en memoria: búsqueda binaria en el índice;
+                            # si no, consulta por rango en Supabase
+                            local = registry_cache.peek()
+                            if local is not None:
+                                df, data_version = local
+                                por_vencer = local_due(df, get_due_index(data_version, df), inicio, rango[1], area)
+                            else:
+                                por_vencer = fetch_due(supabase, inicio, rango[1], area)
+                            st.caption(f"{len(por_vencer)} documentos")
+                            st.dataframe(
+                                por_vencer,
+                                column_order=("proxima_revision", "codigo", "titulo", "area", "responsable", "estatus"),
+                                column_config={"proxima_revision": st.column_config.DateColumn("Vencimiento", format="DD MMM YYYY")},
+                                hide_index=True,
+                                width="stretch",
+                            )
 
             # === TAB 2: TABLA EXPLORADOR ===
-            with tab2:
-                # --- ZONA DE GESTIÓN (ELIMINAR) ---
-                with st.expander("🗑️ Zona de Gestión (Eliminar)"):
-                    if not df.empty:
-                        # Opciones para el selectbox
-                        doc_options = [f"ID: {row['id']} | {row['titulo']}" for index, row in df.iterrows()]
-                        selected_doc = st.selectbox("Seleccionar documento a eliminar:", doc_options)
-                        
-                        if st.button("🔥 Eliminar Documento Definitivamente", type="primary"):
-                            try:
-                                # Paso 1: Parsear ID
-                                # El formato es "ID: [id] | [titulo]"
-                                doc_id = int(selected_doc.split(' | ')[0].replace('ID: ', ''))
-                                
-                                # Paso 2: Recuperar link para obtener nombre de archivo
-                                # Consultamos de nuevo por seguridad para tener el link exacto
-                                data_response = supabase.table("documentos_sgc").select("link_documento").eq("id", doc_id).execute()
-                                
-                                if data_response.data:
-                                    link = data_response.data[0].get("link_documento", "")
-                                    
-                                    # Paso 3: Borrar archivo del Bucket (si existe link)
-                                    if link:
-                                        # Extraer nombre archivo de la URL
-                                        # Ejemplo: .../documentos_sgc/codigo_fecha.pdf
-                                        file_name_to_del = link.split('/')[-1]
-                                        
-                                        try:
-                                            supabase.storage.from_('documentos').remove([file_name_to_del])
-                                        except Exception as e_storage:
-                                            # Si falla borrar el archivo (ej. ya no existe), avisamos pero seguimos para borrar registro
-                                            st.warning(f"No se pudo borrar el archivo físico (posiblemente ya no existe): {e_storage}")
-                                    
-                                    # Paso 4: Borrar Registro en BD
-                                    supabase.table("documentos_sgc").delete().eq("id", doc_id).execute()
-                                    
-                                    st.success("✅ Documento eliminado correctamente")
-                                    time.sleep(1)
-                                    st.rerun()
+            with tab2, perf.span("explorador"):
+                # Sólo corre con la pestaña abierta; la tabla trae una página a la vez
+                if tab2.open:
+                    # --- ZONA DE GESTIÓN (ELIMINAR) ---
+                    # Necesita el registro completo: se carga sólo al expandirla
+                    zona_gestion = st.expander("🗂️ Zona de Gestión", key="zona_gestion", on_change="rerun")
+                    with zona_gestion, perf.span("gestion"):
+                        if zona_gestion.open:
+                            df, version = registry_cache.get_versioned(supabase)
+                            if not df.empty:
+                                # Selección por filtro: estatus + área + texto, con el índice del Explorador
+                                g1, g2, g3 = st.columns(3)
+                                g_texto = g1.text_input("Buscar", key="gestion_texto")
+                                g_estatus = g2.selectbox("Estatus", ["Todos", *ESTATUS], key="gestion_estatus")
+                                g_area = g3.selectbox("Área", ["Todas", *sorted(df["area"].dropna().unique())], key="gestion_area")
+                                posiciones = get_search_index(version, df).search(
+                                    g_texto, None if g_estatus == "Todos" else g_estatus)
+                                candidatos = df.iloc[posiciones]
+                                if g_area != "Todas":
+                                    candidatos = candidatos[candidatos["area"] == g_area]
+                                etiquetas = option_labels(candidatos)
+
+                                todos = st.checkbox(f"Aplicar a los {len(candidatos)} documentos filtrados", key="gestion_todos")
+                                if todos:
+                                    ids = candidatos["id"].tolist()
                                 else:
-                                    st.error("No se encontró el registro en la base de datos.")
-                            except Exception as e:
-                                st.error(f"Error al eliminar: {e}")
-                    else:
-                        st.info("No hay documentos disponibles para eliminar.")
-
-                with st.expander("🔍 Filtros", expanded=True):
-                    c1, c2 = st.columns(2)
-                    search = c1.text_input("Buscar", "")
-                    f_status = c2.selectbox("Filtrar Estatus", ["Todos", "Vigente", "Obsoleto"])
-
-                df_view = df.copy()
-                if search:
-                    df_view = df_view[df_view["titulo"].str.contains(search, case=False) | df_view["codigo"].str.contains(search, case=False)]
-                if f_status != "Todos":
-                    df_view = df_view[df_view["estatus"] == f_status]
-
-                # Tabla Interactiva
-                st.data_editor(
-                    df_view,
-                    column_order=("estatus", "codigo", "titulo", "revision", "area", "link_documento", "proxima_revision"),
-                    column_config={
-                        "estatus": st.column_config.TextColumn("Estado", width="medium"),
-                        "link_documento": st.column_config.LinkColumn("Enlace", display_text="Abrir 🔗"),
-                        "proxima_revision": st.column_config.DateColumn("Vencimiento", format="DD MMM YYYY"),
-                        "revision": st.column_config.TextColumn("Rev.", width="small")
-                    },
-                    hide_index=True,
-                    use_container_width=True,
-                    disabled=True
-                )
+                                    ids = st.multiselect("Seleccionar documentos:", etiquetas.index.tolist(),
+                                                         format_func=etiquetas.get, key="gestion_ids")
+
+                                accion = st.radio("Acción", ["Marcar como obsoleto", "Cambiar área", "Eliminar definitivamente"],
+                                                  horizontal=True, key="gestion_accion")
+                                if accion == "Cambiar área":
+                                    nueva_area = st.selectbox("Nueva área", AREAS, key="gestion_nueva_area")
+
+                                if st.button(f"Aplicar a {len(ids)} documentos", type="primary", disabled=not ids):
+                                    try:
+                                        if accion == "Eliminar definitivamente":
+                                            resultado = delete_documents(supabase, ids)
+                                            registry_cache.delete_ids(resultado.ids)
+                                            if resultado.storage_error:
+                                                # Los registros ya se borraron; los archivos quedan para una limpieza posterior
+                                                st.warning(f"No se pudieron borrar los archivos físicos: {resultado.storage_error}")
+                                        else:
+                                            resultado = (mark_obsolete(supabase, ids) if accion == "Marcar como obsoleto"
+                                                         else change_area(supabase, ids, nueva_area))
+                                            registry_cache.upsert_rows(resultado.rows)
+                                        st.toast(f"✅ {len(resultado.ids)} documentos actualizados")
+                                        # La selección apunta a documentos que ya cambiaron o no existen
+                                        st.session_state.pop("gestion_ids", None)
+                                        if not resultado.storage_error:
+                                            st.rerun()
+                                    except Exception as e:
+                                        st.error(f"Error al aplicar la operación: {e}")
+                            else:
+                                st.info("No hay documentos disponibles.")
+
+                    with st.expander("🔍 Filtros", expanded=True):
+                        c1, c2 = st.columns(2)
+                        search = c1.text_input("Buscar", "")
+                        f_status = c2.selectbox("Filtrar Estatus", ["Todos", "Vigente", "Obsoleto"])
+
+                    status = None if f_status == "Todos" else f_status
+
+                    # Navegación: pila de cursores (último id de cada página); se reinicia al cambiar el filtro
+                    nav = st.session_state.setdefault("explorador_nav", {"filtro": None, "cursores": [None], "total": None})
+                    if nav["filtro"] != (search, f_status):
+                        nav.update(filtro=(search, f_status), cursores=[None], total=None)
+                    cursor = nav["cursores"][-1]
+
+                    # Si el registro ya está fresco en memoria se pagina con el índice local;
+                    # si no, el filtro y la página se resuelven en Supabase
+                    with perf.span("explorador.pagina"):
+                        local = registry_cache.peek()
+                        if local is not None:
+                            df, data_version = local
+                            page = local_page(df, get_search_index(data_version, df), search, status, cursor)
+                        else:
+                            page = fetch_page(supabase, search, status, cursor, with_count=nav["total"] is None)
+                    if page.total is not None:
+                        nav["total"] = page.total
+
+                    # Tabla Interactiva (sólo la página visible)
+                    with perf.span("explorador.tabla"):
+                        st.data_editor(
+                            page.rows,
+                            column_order=("estatus", "codigo", "titulo", "revision", "area", "link_documento", "proxima_revision"),
+                            column_config={
+                                "estatus": st.column_config.TextColumn("Estado", width="medium"),
+                                "link_documento": st.column_config.LinkColumn("Enlace", display_text="Abrir 🔗"),
+                                "proxima_revision": st.column_config.DateColumn("Vencimiento", format="DD MMM YYYY"),
+                                "revision": st.column_config.TextColumn("Rev.", width="small")
+                            },
+                            hide_index=True,
+                            use_container_width=True,
+                            disabled=True
+                        )
+
+                    total = nav["total"] or 0
+                    n1, n2, n3 = st.columns([1, 3, 1])
+                    if n1.button("◀ Anterior", disabled=len(nav["cursores"]) == 1):
+                        nav["cursores"].pop()
+                        st.rerun()
+                    n2.caption(f"Página {len(nav['cursores'])} de {max(1, -(-total // PAGE_SIZE))} · {total} documentos")
+                    if n3.button("Siguiente ▶", disabled=page.next_cursor is None):
+                        nav["cursores"].append(page.next_cursor)
+                        st.rerun()
 
             # === TAB 3: CARGA ===
-            with tab3:
+            with tab3, perf.span("carga"):
                 st.markdown("### 📤 Carga de Documentos")
                 
-                tab_single, tab_bulk = st.tabs(["📄 Documento Único", "📦 Carga Masiva (CSV)"])
+                tab_single, tab_multi, tab_bulk = st.tabs(["📄 Documento Único", "🗂️ Varios Archivos", "📦 Carga Masiva (CSV)"])
                 
                 # --- SUBIDA ÚNICA ---
                 with tab_single:
@@ -232,12 +381,12 @@ def main_dashboard():
                         c1, c2, c3 = st.columns(3)
                         nombre_doc = c1.text_input("Nombre del Documento")
                         codigo_doc = c2.text_input("Código")
-                        area_doc = c3.selectbox("Área", ["Calidad", "RRHH", "Operaciones", "Ventas", "Dirección", "Otro"])
+                        area_doc = c3.selectbox("Área", AREAS)
 
                         # Fila 2: Detalles
                         c4, c5, c6 = st.columns(3)
-                        tipo_doc = c4.selectbox("Tipo de Documento", ['Procedimiento', 'Formato', 'Manual', 'Instructivo', 'Registro', 'Externo'])
-                        estado_doc = c5.selectbox("Estado", ['Vigente', 'En Revisión', 'Obsoleto'])
+                        tipo_doc = c4.selectbox("Tipo de Documento", TIPOS_DOCUMENTO)
+                        estado_doc = c5.selectbox("Estado", ESTATUS)
                         revision_doc = c6.text_input("No. de Revisión", value="1.0")
 
                         # Fila 3: Responsables y Fechas
@@ -247,73 +396,149 @@ def main_dashboard():
                         vencimiento_doc = c9.date_input("Fecha de Vencimiento / Revisión", value=datetime.now() + timedelta(days=365))
                         
                         uploaded_file = st.file_uploader("Seleccionar Archivo (PDF, PNG, JPG)")
+                        reemplazar_doc = st.checkbox("Reemplazar si el código ya existe (nueva versión o metadatos)")
                         
                         btn_subir = st.form_submit_button("Subir Documento 🚀")
                         
                         if btn_subir:
                             if uploaded_file and nombre_doc and codigo_doc:
+                                nuevo_registro = {
+                                    # Campos básicos
+                                    "titulo": nombre_doc,
+                                    "codigo": codigo_doc,
+                                    "area": area_doc,
+
+                                    # Campos nuevos mapeados
+                                    "tipo_documento": tipo_doc,
+                                    "estatus": estado_doc,       # 'Estado' -> estatus
+                                    "revision": revision_doc,    # 'rev' -> revision
+                                    "responsable": responsable_doc,
+                                    "fecha_emision": fecha_emision_doc.strftime('%Y-%m-%d'),
+                                    "proxima_revision": vencimiento_doc.strftime('%Y-%m-%d') # 'vencimiento' -> proxima_revision
+                                }
+                                # Misma ruta que varios archivos: el código repetido se detecta antes de
+                                # subir y, si el registro falla, el archivo subido se retira del bucket.
+                                # Al reemplazar, el mismo contenido reutiliza el objeto y uno nuevo libera el anterior
+                                item = UploadItem(uploaded_file, nuevo_registro)
                                 try:
-                                    # 1. Preparar archivo
-                                    file_content = uploaded_file.read()
-                                    file_ext = uploaded_file.name.split('.')[-1]
-                                    file_name = f"{codigo_doc}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
-                                    bucket_name = "documentos"
-                                    
-                                    # 2. Subir a Storage
-                                    supabase.storage.from_(bucket_name).upload(
-                                        path=file_name,
-                                        file=file_content,
-                                        file_options={"content-type": uploaded_file.type}
-                                    )
-                                    
-                                    # 3. Obtener URL Pública
-                                    public_url = supabase.storage.from_(bucket_name).get_public_url(file_name)
-                                    
-                                    # 4. Insertar en Base de Datos
-                                    nuevo_registro = {
-                                        # Campos básicos
-                                        "titulo": nombre_doc,
-                                        "codigo": codigo_doc,
-                                        "area": area_doc,
-                                        "link_documento": public_url,
-                                        
-                                        # Campos nuevos mapeados
-                                        "tipo_documento": tipo_doc,
-                                        "estatus": estado_doc,       # 'Estado' -> estatus
-                                        "revision": revision_doc,    # 'rev' -> revision
-                                        "responsable": responsable_doc,
-                                        "fecha_emision": fecha_emision_doc.strftime('%Y-%m-%d'),
-                                        "proxima_revision": vencimiento_doc.strftime('%Y-%m-%d') # 'vencimiento' -> proxima_revision
-                                    }
-                                    
-                                    supabase.table("documentos_sgc").insert(nuevo_registro).execute()
-                                    
-                                    st.success("✅ Documento cargado exitosamente")
-                                    st.balloons()
-                                    time.sleep(2)
+                                    inserted = upload_batch(supabase, [item], BUCKET, replace=reemplazar_doc)
+                                except Exception as e:  # p. ej. la consulta de códigos existentes
+                                    item.status, item.error = "error", str(e)
+                                if item.status == "registrado":
+                                    registry_cache.upsert_rows(inserted)
+                                    # El aviso sobrevive al rerun: no hace falta esperar
+                                    st.toast("✅ Documento actualizado" if item.replaces else "✅ Documento cargado exitosamente")
                                     st.rerun()
-                                    
-                                except Exception as e:
-                                    st.error(f"❌ Error durante la carga: {e}")
+                                elif item.status == "omitido":
+                                    st.warning(f"⚠️ {codigo_doc}: {item.error}. Marca 'Reemplazar' para subir una nueva versión.")
+                                else:
+                                    st.error(f"❌ Error durante la carga: {item.error}")
                             else:
                                 st.warning("⚠️ Completa todos los campos obligatorios.")
 
-                # --- CARGA MASIVA (Lógica Anterior) ---
+                # --- VARIOS ARCHIVOS (subida en paralelo, un solo insert) ---
+                with tab_multi:
+                    st.info("Sube varios documentos a la vez. Los metadatos salen de un manifiesto CSV "
+                            "(columna 'Archivo' + encabezados de la carga masiva) o del nombre del archivo: "
+                            "`CODIGO.pdf` o `CODIGO__Título.pdf`.")
+                    archivos = st.file_uploader("Seleccionar Archivos", accept_multiple_files=True, key="multi_upload")
+                    origen = st.radio("Metadatos", ["Nombre del archivo", "Manifiesto CSV"], horizontal=True)
+                    reemplazar = st.checkbox("Reemplazar los códigos ya registrados", key="multi_reemplazar")
+
+                    if origen == "Manifiesto CSV":
+                        manifiesto = st.file_uploader("Manifiesto CSV", type=["csv"], key="multi_manifest")
+                    else:
+                        c1, c2, c3 = st.columns(3)
+                        defaults = {
+                            "area": c1.selectbox("Área", AREAS, key="multi_area"),
+                            "tipo_documento": c2.selectbox("Tipo de Documento", TIPOS_DOCUMENTO, key="multi_tipo"),
+                            "estatus": c3.selectbox("Estado", ESTATUS, key="multi_estado"),
+                        }
+                        c4, c5, c6 = st.columns(3)
+                        defaults["revision"] = c4.text_input("No. de Revisión", value="1.0", key="multi_rev")
+                        defaults["responsable"] = c5.text_input("Responsable del Documento", key="multi_resp")
+                        defaults["proxima_revision"] = c6.date_input(
+                            "Fecha de Vencimiento / Revisión", value=datetime.now() + timedelta(days=365),
+                            key="multi_venc").strftime('%Y-%m-%d')
+                        defaults["fecha_emision"] = datetime.now().strftime('%Y-%m-%d')
+
+                    listo = archivos and (origen == "Nombre del archivo" or manifiesto)
+                    if st.button("Subir Archivos 🚀", disabled=not listo):
+                        try:
+                            if origen == "Manifiesto CSV":
+                                items, validacion = pair_from_manifest(archivos, pd.read_csv(manifiesto, dtype=str))
+                                if validacion.rejected_rows:
+                                    st.warning(f"⚠️ {validacion.rejected_rows} filas del manifiesto rechazadas.")
+                                    st.dataframe(validacion.rejected, hide_index=True)
+                            else:
+                                items = pair_from_filenames(archivos, defaults)
+
+                            progreso = st.progress(0.0)
+                            hechos = []
+
+                            def on_item(item):
+                                hechos.append(item)
+                                progreso.progress(len(hechos) / len(items), text=f"{item.name}: {item.status}")
+
+                            insertados = upload_batch(supabase, items, on_item=on_item, replace=reemplazar)
+                            registry_cache.upsert_rows(insertados)
+                            progreso.empty()
+
+                            if len(insertados) == len(items):
+                                st.success(f"✅ {len(insertados)} documentos cargados")
+                            else:
+                                st.warning(f"⚠️ {len(insertados)} de {len(items)} documentos cargados")
+                            st.dataframe(status_frame(items), hide_index=True)
+                        except Exception as e:
+                            st.error(f"❌ Error durante la carga: {e}")
+
+                # --- CARGA MASIVA (Upsert por lotes sobre 'codigo') ---
                 with tab_bulk:
                      st.markdown("### 📥 Actualización Masiva")
+                     st.caption("Los documentos se actualizan por código; sólo se eliminan los que ya no vienen en el archivo.")
                      csv_file = st.file_uploader("Sube tu CSV", type=['csv'], key="csv_upload")
                      if csv_file and st.button("🚀 Procesar CSV"):
+                        progreso = st.empty()
+
+                        def on_batch(result, report):
+                            # Avance por lote (se llama desde el hilo del script)
+                            estado = "✅" if result.ok else "❌"
+                            progreso.text(f"{estado} Lote {result.index + 1}: {result.rows} filas · "
+                                          f"{report.upserted} cargadas, {len(report.failed)} lotes con error")
+
+                        report = None
                         try:
-                            df_raw = pd.read_csv(csv_file)
-                            df_clean = clean_data_for_upload(df_raw)
-                            data = df_clean.where(pd.notnull(df_clean), None).to_dict(orient='records')
-                            supabase.table("documentos_sgc").delete().neq("id", 0).execute()
-                            supabase.table("documentos_sgc").insert(data).execute()
-                            st.success("✅ Actualizado")
-                            time.sleep(1)
-                            st.rerun()
+                            try:
+                                report = import_csv(supabase, csv_file, on_batch=on_batch)
+                            finally:
+                                # La tabla cambió (o quedó a medias): recargar
+                                registry_cache.invalidate()
+
+                            if report.failed:
+                                st.error(f"❌ {len(report.failed)} lotes fallaron; no se eliminó ningún documento. "
+                                         "Corrige el archivo y vuelve a procesarlo.")
+                                for batch in report.failed:
+                                    st.caption(f"Lote {batch.index + 1} ({batch.rows} filas): {batch.error}")
+                            else:
+                                st.success(f"✅ Actualizado: {report.upserted} documentos cargados, "
+                                           f"{report.deleted} eliminados")
+                                if report.storage_error:
+                                    st.warning(f"⚠️ No se pudieron liberar los archivos sin uso: {report.storage_error}")
+                                if not report.validation.rejected_rows and not report.storage_error:
+                                    time.sleep(1)
+                                    st.rerun()
                         except Exception as e:
                             st.error(f"Error: {e}")
+
+                        # Reporte de validación: ninguna fila se descarta en silencio
+                        if report is not None and report.validation.rejected_rows:
+                            st.warning(f"⚠️ {report.validation.rejected_rows} filas rechazadas "
+                                       f"(no se cargaron y sus documentos existentes no se modificaron).")
+                            st.dataframe(report.validation.summary(), hide_index=True)
+                            st.dataframe(report.validation.rejected.head(500), hide_index=True)
+                            st.download_button("⬇️ Descargar filas rechazadas",
+                                               report.validation.rejected.to_csv(index=False),
+                                               file_name="filas_rechazadas.csv", mime="text/csv")
         else:
             st.info("No hay datos en la base de datos.")
     else:
@@ -329,4 +554,5 @@ def main_dashboard():
 # --- EJECUCIÓN ---
 if __name__ == "__main__":
     if check_password():
-        main_dashboard()
\ No newline at end of file
+        main_dashboard()
+        panel_rendimiento()
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""Índice de vencimientos (``proxima_revision``) para el tablero y los avisos.
+
+Se construye una vez por versión del registro: las fechas se ordenan una sola
+vez (en total y dentro de cada área) y "¿qué vence entre A y B?" se responde
+con dos búsquedas binarias, en lugar de comparar la fecha de cada fila en
+cada rerun. Los documentos obsoletos y los que no tienen fecha no entran.
+
+Sin el registro en memoria, ``fetch_due`` hace la misma consulta por rango en
+Supabase (índice parcial ``idx_documentos_sgc_vencimiento`` en schema_sgc.sql).
+"""
+import numpy as np
+import pandas as pd
+
+from registry import TABLE, to_frame
+
+DUE_COLUMN = "proxima_revision"
+DUE_COLUMNS = ("id", "codigo", "titulo", "area", "responsable", "estatus", "proxima_revision")
+INACTIVE_STATUS = "Obsoleto"  # un documento obsoleto ya no se revisa
+FETCH_PAGE_SIZE = 1000        # máximo de filas por respuesta en PostgREST
+
+
+def _day(value):
+    return None if value is None else np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+class DueDateIndex:
+    def __init__(self, df, area_column="area"):
+        if DUE_COLUMN in df.columns:
+            dates = pd.to_datetime(df[DUE_COLUMN], errors="coerce").to_numpy(dtype="datetime64[D]")
+        else:
+            dates = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[D]")
+        active = ~np.isnat(dates)
+        if "estatus" in df.columns:
+            # Como ``estatus <> 'Obsoleto'`` en SQL: sin estatus tampoco entra
+            active &= (df["estatus"].notna() & (df["estatus"] != INACTIVE_STATUS)).to_numpy(dtype=bool)
+        positions = np.flatnonzero(active)
+        order = np.argsort(dates[positions], kind="stable")
+        self._positions = positions[order]
+        self._dates = dates[self._positions]
+
+        # Por área: orden estable por código de área, así cada grupo sigue ordenado por fecha
+        self._area_slices = {}
+        self._area_positions = self._area_dates = np.empty(0, dtype=np.int64)
+        if area_column in df.columns:
+            codes, uniques = pd.factorize(df[area_column].iloc[self._positions])
+            by_area = np.argsort(codes, kind="stable")
+            self._area_positions = self._positions[by_area]
+            self._area_dates = self._dates[by_area]
+            bounds = np.searchsorted(codes[by_area], np.arange(len(uniques) + 1))
+            self._area_slices = {area: (bounds[k], bounds[k + 1]) for k, area in enumerate(uniques)}
+
+    @property
+    def areas(self):
+        return sorted(self._area_slices)
+
+    def _range(self, dates, start, end):
+        lo = 0 if start is None else int(np.searchsorted(dates, _day(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _day(end), side="right"))
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None, area=None):
+        """Posiciones de fila con vencimiento en ``[start, end]`` (None = sin límite), por fecha."""
+        if area is None:
+            lo, hi = self._range(self._dates, start, end)
+            return self._positions[lo:hi]
+        if area not in self._area_slices:
+            return np.empty(0, dtype=np.int64)
+        a, b = self._area_slices[area]
+        lo, hi = self._range(self._area_dates[a:b], start, end)
+        return self._area_positions[a + lo:a + hi]
+
+    def counts_by_area(self, start=None, end=None):
+        """Documentos que vencen en el rango, por área (una búsqueda binaria por área)."""
+        counts = {}
+        for area, (a, b) in self._area_slices.items():
+            lo, hi = self._range(self._area_dates[a:b], start, end)
+            if hi > lo:
+                counts[area] = hi - lo
+        return counts
+
+
+def local_due(df, index, start=None, end=None, area=None):
+    """Documentos que vencen en el rango, armados con el registro en memoria y su índice."""
+    columns = [c for c in DUE_COLUMNS if c in df.columns]
+    return df.iloc[index.between(start, end, area)][columns]
+
+
+def fetch_due(client, start=None, end=None, area=None, page_size=FETCH_PAGE_SIZE):
+    """Los mismos documentos que ``local_due``, por consulta de rango en el servidor."""
+    rows = []
+    while True:
+        query = client.table(TABLE).select(",".join(DUE_COLUMNS)).neq("estatus", INACTIVE_STATUS)
+        if start is not None:
+            query = query.gte(DUE_COLUMN, str(_day(start)))
+        if end is not None:
+            query = query.lte(DUE_COLUMN, str(_day(end)))
+        if area is not None:
+            query = query.eq("area", area)
+        page = query.order(DUE_COLUMN).order("id").range(len(rows), len(rows) + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+    if not rows:
+        return pd.DataFrame(columns=list(DUE_COLUMNS))
+    df = to_frame(rows)
+    # Sin límite inferior el filtro no descarta las filas sin fecha
+    return df[df[DUE_COLUMN].notna()].reset_index(drop=True)
@@ -0,0 +1,366 @@
+"""Almacén de personal para app.py.
+
+Reemplaza el ciclo leer-modificar-reescribir de ``empleados.xlsx``: cada alta,
+cambio o baja es una sola fila dentro de una transacción, así que dos
+usuarios guardando a la vez no se pisan ni corrompen el archivo. El Excel
+queda sólo como formato de importación/exportación; el ``empleados.xlsx``
+heredado se migra una sola vez (``migrate_legacy_excel``) y la migración
+queda registrada en el almacén, no en el archivo.
+
+El backend se elige por URL (``sqlite:///empleados.db`` por defecto); otro
+backend sólo tiene que implementar ``EmployeeStore`` y registrarse en
+``BACKENDS``.
+
+Cada cambio de retardos/faltas queda además en una bitácora de sólo anexado
+(``asistencia_eventos``) y en acumulados diarios y mensuales por
+departamento que se actualizan en la misma transacción; las tendencias se
+leen de los acumulados, nunca recorriendo los eventos.
+
+``EmployeeSnapshot`` comparte un solo DataFrame del personal entre todas las
+sesiones del proceso y sólo lo vuelve a leer cuando cambia la versión del
+almacén.
+"""
+import io
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+DEFAULT_URL = "sqlite:///empleados.db"
+COLUMNS = ("Nombre", "Departamento", "Retardos", "Faltas")
+SEARCH_LIMIT = 50
+# Tabla de acumulados -> columna del periodo (largo del prefijo de la fecha ISO)
+ROLLUPS = {"asistencia_diaria": "dia", "asistencia_mensual": "mes"}
+PERIOD_LENGTH = {"dia": 10, "mes": 7}
+LEGACY_MIGRATION = "empleados.xlsx"  # nombre con que se registra la migración del Excel heredado
+VERSION_CHECK_INTERVAL = 1.0  # segundos entre consultas de versión (compartidas por todas las sesiones)
+
+
+class EmployeeStore(ABC):
+    """Interfaz del almacén. Las filas se identifican por ``id`` (no por posición)."""
+
+    @abstractmethod
+    def all(self):
+        """DataFrame con ``COLUMNS`` e índice ``id``."""
+
+    @abstractmethod
+    def upsert(self, nombre, departamento, retardos, faltas):
+        """Actualiza al empleado con ese nombre o lo crea. Retorna True si se creó."""
+
+    @abstractmethod
+    def delete(self, employee_id):
+        """Borra por id. Retorna True si existía."""
+
+    @abstractmethod
+    def search(self, prefix="", limit=SEARCH_LIMIT):
+        """Hasta ``limit`` empleados cuyo nombre empieza con ``prefix`` (sin distinguir mayúsculas)."""
+
+    @abstractmethod
+    def count(self):
+        """Número de empleados."""
+
+    @abstractmethod
+    def version(self):
+        """Contador que cambia con cada alta, cambio o baja (barato de consultar)."""
+
+    @abstractmethod
+    def replace_all(self, df):
+        """Reemplaza todo el personal (importación) en una sola transacción."""
+
+    @abstractmethod
+    def migration_applied(self, name):
+        """True si la migración ``name`` ya quedó registrada en el almacén."""
+
+    @abstractmethod
+    def apply_migration(self, name, df):
+        """En una transacción: si ``name`` no está registrada, importa ``df`` (sólo si el almacén
+        está vacío) y la registra. Retorna las filas importadas."""
+
+    @abstractmethod
+    def monthly_trend(self, months=12):
+        """Retardos, faltas y eventos por mes (``YYYY-MM``) y departamento, últimos ``months`` meses."""
+
+    @abstractmethod
+    def daily_trend(self, days=30):
+        """Lo mismo por día (``YYYY-MM-DD``)."""
+
+    # --- Excel: sólo importación / exportación ---
+    def import_excel(self, source):
+        df = read_excel(source)
+        self.replace_all(df)
+        return len(df)
+
+    def export_excel(self):
+        buffer = io.BytesIO()
+        self.all().to_excel(buffer, index=False, engine="openpyxl")
+        return buffer.getvalue()
+
+
+class SQLiteEmployeeStore(EmployeeStore):
+    """Un archivo SQLite en modo WAL: lecturas sin bloquear a los escritores."""
+
+    def __init__(self, path, clock=datetime.now):
+        self.path = path
+        self.clock = clock
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS empleados (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nombre TEXT NOT NULL,
+                    departamento TEXT,
+                    retardos INTEGER NOT NULL DEFAULT 0,
+                    faltas INTEGER NOT NULL DEFAULT 0
+                )""")
+            # Búsqueda exacta para el upsert y por prefijo (LIKE 'x%') para la baja
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_empleados_nombre ON empleados (nombre)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_empleados_nombre_nocase ON empleados (nombre COLLATE NOCASE)")
+            # Versión de los datos: la suben triggers, así cuenta también a escritores externos
+            conn.execute("CREATE TABLE IF NOT EXISTS empleados_version (id INTEGER PRIMARY KEY CHECK (id = 1), "
+                         "version INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO empleados_version (id, version) VALUES (1, 0)")
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS tr_empleados_version_{event.lower()} AFTER {event} ON empleados
+                    BEGIN UPDATE empleados_version SET version = version + 1 WHERE id = 1; END""")
+
+            # Bitácora de asistencia: un evento por cambio (diferencia contra lo anterior)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS asistencia_eventos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    registrado TEXT NOT NULL,
+                    empleado_id INTEGER NOT NULL,
+                    departamento TEXT NOT NULL,
+                    retardos INTEGER NOT NULL,
+                    faltas INTEGER NOT NULL
+                )""")
+            for event in ("UPDATE", "DELETE"):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS tr_asistencia_eventos_{event.lower()} BEFORE {event} ON asistencia_eventos
+                    BEGIN SELECT RAISE(ABORT, 'asistencia_eventos es de sólo anexado'); END""")
+            # Migraciones de datos ya aplicadas (p. ej. el Excel heredado)
+            conn.execute("CREATE TABLE IF NOT EXISTS migraciones (nombre TEXT PRIMARY KEY, aplicada TEXT NOT NULL)")
+            # Acumulados por periodo y departamento; la llave primaria es el índice de las tendencias
+            for table, period in ROLLUPS.items():
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        {period} TEXT NOT NULL,
+                        departamento TEXT NOT NULL,
+                        retardos INTEGER NOT NULL DEFAULT 0,
+                        faltas INTEGER NOT NULL DEFAULT 0,
+                        eventos INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY ({period}, departamento)
+                    ) WITHOUT ROWID""")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE toma el candado de escritura al inicio: los escritores se serializan
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _query(self, sql, params=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=["id", *COLUMNS])
+        return df.set_index("id")
+
+    def all(self):
+        return self._frame(self._query(
+            "SELECT id, nombre, departamento, retardos, faltas FROM empleados ORDER BY id"))
+
+    def upsert(self, nombre, departamento, retardos, faltas):
+        nombre = nombre.strip()
+        retardos, faltas = int(retardos), int(faltas)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id, retardos, faltas FROM empleados WHERE nombre = ? ORDER BY id LIMIT 1",
+                               (nombre,)).fetchone()
+            if row:
+                employee_id, antes_retardos, antes_faltas = row
+                conn.execute("UPDATE empleados SET departamento = ?, retardos = ?, faltas = ? WHERE id = ?",
+                             (departamento, retardos, faltas, employee_id))
+            else:
+                antes_retardos = antes_faltas = 0
+                employee_id = conn.execute(
+                    "INSERT INTO empleados (nombre, departamento, retardos, faltas) VALUES (?, ?, ?, ?)",
+                    (nombre, departamento, retardos, faltas)).lastrowid
+            self._record(conn, employee_id, departamento, retardos - antes_retardos, faltas - antes_faltas)
+            return row is None
+
+    def _record(self, conn, employee_id, departamento, retardos, faltas):
+        """Anexa el evento y suma la diferencia a los acumulados (misma transacción)."""
+        if not retardos and not faltas:
+            return
+        registrado = self.clock().isoformat(timespec="seconds")
+        departamento = departamento or ""
+        conn.execute("INSERT INTO asistencia_eventos (registrado, empleado_id, departamento, retardos, faltas) "
+                     "VALUES (?, ?, ?, ?, ?)", (registrado, employee_id, departamento, retardos, faltas))
+        for table, period in ROLLUPS.items():
+            conn.execute(f"""
+                INSERT INTO {table} ({period}, departamento, retardos, faltas, eventos) VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT ({period}, departamento) DO UPDATE SET
+                    retardos = retardos + excluded.retardos,
+                    faltas = faltas + excluded.faltas,
+                    eventos = eventos + 1""",
+                         (registrado[:PERIOD_LENGTH[period]], departamento, retardos, faltas))
+
+    def rebuild_rollups(self):
+        """Recalcula los acumulados desde la bitácora (reparación; no hace falta en operación normal)."""
+        with self._transaction() as conn:
+            for table, period in ROLLUPS.items():
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"""
+                    INSERT INTO {table} ({period}, departamento, retardos, faltas, eventos)
+                    SELECT substr(registrado, 1, {PERIOD_LENGTH[period]}), departamento,
+                           SUM(retardos), SUM(faltas), COUNT(*)
+                    FROM asistencia_eventos GROUP BY 1, 2""")
+
+    def _trend(self, table, period, since):
+        rows = self._query(f"SELECT {period}, departamento, retardos, faltas, eventos FROM {table} "
+                           f"WHERE {period} >= ? ORDER BY {period}, departamento", (since,))
+        return pd.DataFrame(rows, columns=[period, "departamento", "retardos", "faltas", "eventos"])
+
+    def monthly_trend(self, months=12):
+        today = self.clock()
+        index = today.year * 12 + today.month - 1 - (months - 1)
+        return self._trend("asistencia_mensual", "mes", f"{index // 12:04d}-{index % 12 + 1:02d}")
+
+    def daily_trend(self, days=30):
+        since = (self.clock() - timedelta(days=days - 1)).date().isoformat()
+        return self._trend("asistencia_diaria", "dia", since)
+
+    def delete(self, employee_id):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM empleados WHERE id = ?", (int(employee_id),)).rowcount > 0
+
+    def search(self, prefix="", limit=SEARCH_LIMIT):
+        pattern = prefix.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self._frame(self._query(
+            "SELECT id, nombre, departamento, retardos, faltas FROM empleados "
+            "WHERE nombre LIKE ? ESCAPE '\\' ORDER BY nombre COLLATE NOCASE LIMIT ?", (pattern, int(limit))))
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM empleados")[0][0]
+
+    def version(self):
+        return self._query("SELECT version FROM empleados_version WHERE id = 1")[0][0]
+
+    def replace_all(self, df):
+        # Una importación reemplaza el padrón; no es un cambio de asistencia y no genera eventos
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM empleados")
+            self._insert_all(conn, df)
+
+    @staticmethod
+    def _insert_all(conn, df):
+        rows = [(str(n).strip(), d, int(r), int(f)) for n, d, r, f in df[list(COLUMNS)].itertuples(index=False)]
+        conn.executemany("INSERT INTO empleados (nombre, departamento, retardos, faltas) VALUES (?, ?, ?, ?)", rows)
+
+    def migration_applied(self, name):
+        return bool(self._query("SELECT 1 FROM migraciones WHERE nombre = ?", (name,)))
+
+    def apply_migration(self, name, df):
+        # BEGIN IMMEDIATE: dos procesos arrancando a la vez no importan dos veces
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM migraciones WHERE nombre = ?", (name,)).fetchone():
+                return 0
+            empty = conn.execute("SELECT COUNT(*) FROM empleados").fetchone()[0] == 0
+            if empty:
+                self._insert_all(conn, df)
+            conn.execute("INSERT INTO migraciones (nombre, aplicada) VALUES (?, ?)",
+                         (name, self.clock().isoformat(timespec="seconds")))
+        return len(df) if empty else 0
+
+
+class EmployeeSnapshot:
+    """DataFrame del personal compartido por todas las sesiones del proceso.
+
+    La versión del almacén se consulta como mucho una vez por
+    ``min_interval``, sin importar cuántas sesiones pregunten; el DataFrame
+    se vuelve a leer sólo si la versión cambió. Es de sólo lectura: quien
+    necesite columnas nuevas debe trabajar sobre una copia (``assign``).
+    """
+
+    def __init__(self, store, min_interval=VERSION_CHECK_INTERVAL, clock=time.monotonic):
+        self.store = store
+        self.min_interval = min_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self._snapshot = (None, None)   # (df, versión con la que se leyó)
+
+    def version(self):
+        with self._lock:
+            now = self.clock()
+            if self._checked_at is None or now - self._checked_at >= self.min_interval:
+                self._version = self.store.version()
+                self._checked_at = now
+            return self._version
+
+    def get(self):
+        """``(df, version)``; relee el almacén sólo si la versión cambió."""
+        version = self.version()
+        with self._lock:
+            df, loaded = self._snapshot
+            if df is None or loaded != version:
+                self._snapshot = (self.store.all(), version)
+            return self._snapshot
+
+    def expire(self):
+        """Tras una escritura propia: la próxima consulta ve la versión nueva sin esperar."""
+        with self._lock:
+            self._checked_at = None
+
+
+def read_excel(source):
+    """Personal de un Excel (``COLUMNS``), sin filas sin nombre y con conteos enteros."""
+    df = pd.read_excel(source, engine="openpyxl")
+    missing = [c for c in COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en el Excel: {', '.join(missing)}")
+    df = df[list(COLUMNS)].dropna(subset=["Nombre"])
+    df["Nombre"] = df["Nombre"].astype(str).str.strip()
+    df[["Retardos", "Faltas"]] = df[["Retardos", "Faltas"]].fillna(0).astype(int)
+    return df
+
+
+def migrate_legacy_excel(store, path, name=LEGACY_MIGRATION):
+    """Migración única del Excel heredado: lo importa si el almacén está vacío y lo
+    registra en el almacén, así que no se vuelve a leer aunque el almacén se vacíe
+    después. El archivo no se toca. Retorna las filas importadas."""
+    if store.migration_applied(name) or not os.path.exists(path):
+        return 0
+    return store.apply_migration(name, read_excel(path))
+
+
+BACKENDS = {"sqlite": lambda location: SQLiteEmployeeStore(location)}
+
+
+def open_store(url=DEFAULT_URL):
+    """Abre el almacén indicado por la URL, p. ej. ``sqlite:///ruta/empleados.db``."""
+    scheme, sep, location = url.partition(":///")
+    if not sep or scheme not in BACKENDS:
+        raise ValueError(f"Almacén de personal no soportado: {url}")
+    return BACKENDS[scheme](location)
@@ -0,0 +1,148 @@
+"""Aviso diario de vencimientos por responsable.
+
+Una consulta por rango (``fetch_due``: sólo los documentos vencidos o por
+vencer, no el registro completo) se agrupa por ``responsable``. El
+``DigestScheduler`` lo genera una vez al día en un hilo de fondo del proceso,
+fuera de cualquier sesión de Streamlit; ``write_digest`` lo deja como un CSV
+por responsable en ``<carpeta>/<fecha>/``. Volver a generar el mismo día
+sobrescribe los mismos archivos, así que un reinicio no duplica avisos.
+
+Uso sin servidor (p. ej. desde cron):
+    SUPABASE_URL=... SUPABASE_KEY=... python -m expiry_digest avisos/ --dias 30
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from due_index import DUE_COLUMN, fetch_due
+
+HORIZON_DAYS = 30
+SEND_HOUR = 7              # el aviso del día se genera a partir de esta hora
+POLL_SECONDS = 300
+NO_OWNER = "Sin responsable"
+DIGEST_COLUMNS = ("codigo", "titulo", "area", "proxima_revision", "dias", "situacion")
+
+logger = logging.getLogger("sgc.avisos")
+
+
+@dataclass
+class Digest:
+    day: date
+    horizon_days: int
+    by_owner: dict            # responsable -> DataFrame (vencidos primero, luego por fecha)
+
+    @property
+    def total(self):
+        return sum(len(df) for df in self.by_owner.values())
+
+
+def build_digest(due, day, horizon_days=HORIZON_DAYS):
+    """Agrupa por responsable los documentos vencidos o que vencen en ``horizon_days`` días."""
+    if due.empty:
+        return Digest(day, horizon_days, {})
+    days = (due[DUE_COLUMN] - pd.Timestamp(day)).dt.days
+    owners = due["responsable"].astype(object) if "responsable" in due else pd.Series(None, index=due.index)
+    frame = due.assign(
+        responsable=owners.where(owners.notna() & (owners.astype(str).str.strip() != ""), NO_OWNER),
+        dias=days,
+        situacion=pd.Categorical.from_codes((days >= 0).astype("int8"), ["Vencido", "Por vencer"]),
+    )
+    by_owner = {owner: group.loc[:, list(DIGEST_COLUMNS)].reset_index(drop=True)
+                for owner, group in frame.groupby("responsable", sort=True)}
+    return Digest(day, horizon_days, by_owner)
+
+
+def daily_digest(client, day, horizon_days=HORIZON_DAYS):
+    """Consulta por rango (hasta ``day + horizon_days``, vencidos incluidos) y agrupa."""
+    return build_digest(fetch_due(client, end=day + timedelta(days=horizon_days)), day, horizon_days)
+
+
+def _slug(name):
+    return re.sub(r"[^\w-]+", "_", name).strip("_") or "responsable"
+
+
+def write_digest(digest, directory):
+    """Un CSV por responsable en ``<directory>/<fecha>/``; retorna las rutas."""
+    folder = os.path.join(directory, digest.day.isoformat())
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for owner, df in digest.by_owner.items():
+        path = os.path.join(folder, f"{_slug(owner)}.csv")
+        df.to_csv(path, index=False, date_format="%Y-%m-%d")
+        paths.append(path)
+    return paths
+
+
+class DigestScheduler:
+    """Genera el aviso una vez al día (a partir de ``hour``) en un hilo de fondo."""
+
+    def __init__(self, client, deliver, hour=SEND_HOUR, horizon_days=HORIZON_DAYS,
+                 clock=datetime.now, poll=POLL_SECONDS):
+        self.client = client
+        self.deliver = deliver
+        self.hour = hour
+        self.horizon_days = horizon_days
+        self.clock = clock
+        self.poll = poll
+        self.last_day = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_pending(self):
+        """Si ya toca y aún no se generó el de hoy: genera, entrega y retorna el aviso."""
+        now = self.clock()
+        if now.hour < self.hour or self.last_day == now.date():
+            return None
+        digest = daily_digest(self.client, now.date(), self.horizon_days)
+        self.deliver(digest)
+        self.last_day = now.date()
+        logger.info("Aviso de vencimientos %s: %d documentos, %d responsables",
+                    digest.day, digest.total, len(digest.by_owner))
+        return digest
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_pending()
+            except Exception:
+                # Un fallo de red no detiene el hilo: se reintenta en la siguiente vuelta
+                logger.exception("No se pudo generar el aviso de vencimientos")
+            if self._stop.wait(self.poll):
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="avisos-vencimiento", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("carpeta")
+    parser.add_argument("--dias", type=int, default=HORIZON_DAYS)
+    args = parser.parse_args(argv)
+
+    from supabase import create_client
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    digest = daily_digest(client, date.today(), args.dias)
+    for path in write_digest(digest, args.carpeta):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Páginas del Explorador: filtro y paginación del lado del servidor.
+
+El Explorador pide a Supabase sólo la página visible (paginación por llave
+``id > cursor``), con el texto y el estatus aplicados en la consulta y el
+conteo total sólo al cambiar de filtro. Si el proceso ya tiene el registro
+fresco en memoria, la misma página se arma con el índice local sin tocar la
+base: el texto se normaliza igual (``search_term``) y el índice busca
+subcadenas sobre ``codigo | titulo`` como el ILIKE sobre ``busqueda``, así
+que el resultado no depende de cuál de los dos caminos respondió. En ambos
+casos el cursor es el último ``id`` mostrado, así que la navegación es la
+misma aunque la caché cambie entre páginas.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from registry import TABLE, to_frame
+from resilient import is_transient
+from search_index import fold
+
+PAGE_SIZE = 50
+EXPLORER_COLUMNS = ("id", "estatus", "codigo", "titulo", "revision", "area",
+                    "link_documento", "proxima_revision")
+# Columna generada en schema_sgc.sql: lower(unaccent(codigo || ' | ' || titulo)) con índice trigram
+SEARCH_COLUMN = "busqueda"
+# Comodines de LIKE y caracteres reservados de la sintaxis de filtros de PostgREST -> espacio
+_RESERVED = str.maketrans({c: " " for c in '%_*,()"\\'})
+
+
+@dataclass
+class Page:
+    rows: pd.DataFrame
+    total: int = None        # None si no se pidió el conteo
+    next_cursor: int = None  # id del último registro; None si no hay más páginas
+
+
+def search_term(search, folded=True):
+    """Texto de búsqueda tal como se compara: sin acentos ni mayúsculas, sin caracteres reservados."""
+    return " ".join((fold(search) if folded else search).translate(_RESERVED).split())
+
+
+def _pattern(search, folded=True):
+    term = search_term(search, folded)
+    return f"*{term}*" if term else None
+
+
+def fetch_page(client, search="", status=None, cursor=None, page_size=PAGE_SIZE, with_count=True):
+    """Una página filtrada en el servidor, ordenada por id."""
+    pattern = _pattern(search)
+
+    def run(text_filter):
+        query = client.table(TABLE).select(",".join(EXPLORER_COLUMNS), count="exact" if with_count else None)
+        if pattern:
+            query = text_filter(query)
+        if status:
+            query = query.eq("estatus", status)
+        if cursor is not None:
+            query = query.gt("id", cursor)
+        # Una fila extra indica si hay página siguiente sin otra consulta
+        return query.order("id").limit(page_size + 1).execute()
+
+    try:
+        response = run(lambda q: q.ilike(SEARCH_COLUMN, pattern))
+    except Exception as e:
+        if not pattern or is_transient(e):
+            raise
+        # Sin la columna 'busqueda' (migración pendiente): ILIKE directo, distingue acentos
+        raw = _pattern(search, folded=False)
+        response = run(lambda q: q.or_(f"titulo.ilike.{raw},codigo.ilike.{raw}"))
+
+    rows = response.data or []
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    frame = to_frame(rows) if rows else pd.DataFrame(columns=list(EXPLORER_COLUMNS))
+    return Page(frame, response.count, rows[-1]["id"] if has_next else None)
+
+
+def local_page(df, index, search="", status=None, cursor=None, page_size=PAGE_SIZE):
+    """La misma página que ``fetch_page``, armada con el registro en memoria y su índice."""
+    positions = index.search(search_term(search), status)
+    total = len(positions)
+    ids = df["id"].to_numpy()[positions]
+    # El registro en caché está ordenado por id: el cursor se ubica por búsqueda binaria
+    start = 0 if cursor is None else int(np.searchsorted(ids, cursor, side="right"))
+    chunk = positions[start:start + page_size]
+    has_next = start + page_size < total
+    rows = df.iloc[chunk]
+    return Page(rows, total, int(ids[start + page_size - 1]) if has_next else None)
@@ -0,0 +1,307 @@
+"""Sustituto local del cliente de Supabase para pruebas y benchmarks.
+
+Implementa el subconjunto de la API de postgrest/storage que usa el tablero
+(select/insert/upsert/update/delete con filtros, orden y límite) sobre
+listas de diccionarios en memoria. Cuenta los viajes de ida y vuelta en
+``client.round_trips`` para poder afirmar cuántas consultas hizo un flujo.
+
+Con ``track_changes=True`` simula los triggers de ``schema_sgc.sql``: cada
+escritura sella ``updated_at`` con ``client.now`` y cada borrado deja una
+lápida en ``<tabla>_bajas``.
+
+``client.max_rows`` imita el tope de filas por respuesta de PostgREST
+(``db-max-rows``, 1000 en Supabase): un select sin paginar se trunca en
+silencio, igual que en el servidor.
+
+Para probar la capa de reintentos (resilient.py) se puede inyectar latencia
+(``client.latency``, segundos por petición, fuera del candado: las peticiones
+se solapan) y fallos (``client.failures``: excepciones que lanzan las
+siguientes peticiones, en orden). ``client.max_in_flight`` registra cuántas
+peticiones llegaron a estar en curso a la vez.
+"""
+import copy
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, client, name):
+        self._client = client
+        self._name = name
+        self._op = "select"
+        self._columns = "*"
+        self._payload = None
+        self._on_conflict = None
+        self._count = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = 0
+        self._error = None
+
+    # --- Operaciones ---
+    def select(self, *columns, count=None, head=None):
+        self._op = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        return self
+
+    def insert(self, json, **kwargs):
+        self._op = "insert"
+        self._payload = json
+        return self
+
+    def upsert(self, json, on_conflict="", **kwargs):
+        self._op = "upsert"
+        self._payload = json
+        self._on_conflict = on_conflict or "id"
+        return self
+
+    def update(self, json, **kwargs):
+        self._op = "update"
+        self._payload = json
+        return self
+
+    def delete(self, **kwargs):
+        self._op = "delete"
+        return self
+
+    # --- Filtros ---
+    def _add(self, fn):
+        self._filters.append(fn)
+        return self
+
+    def eq(self, col, val):
+        return self._add(lambda r: r.get(col) == val)
+
+    def neq(self, col, val):
+        return self._add(lambda r: r.get(col) != val)
+
+    def gt(self, col, val):
+        return self._add(lambda r: r.get(col) is not None and r.get(col) > val)
+
+    def gte(self, col, val):
+        return self._add(lambda r: r.get(col) is not None and r.get(col) >= val)
+
+    def lt(self, col, val):
+        return self._add(lambda r: r.get(col) is not None and r.get(col) < val)
+
+    def lte(self, col, val):
+        return self._add(lambda r: r.get(col) is not None and r.get(col) <= val)
+
+    def in_(self, col, values):
+        values = set(values)
+        return self._add(lambda r: r.get(col) in values)
+
+    def is_(self, col, val):
+        target = None if val in (None, "null") else val
+        return self._add(lambda r: r.get(col) is target)
+
+    def _check_column(self, col):
+        rows = self._client.tables.get(self._name) or []
+        if rows and not any(col in r for r in rows):
+            # Como PostgREST: columna inexistente -> error al ejecutar
+            self._error = f"column {self._name}.{col} does not exist"
+
+    @staticmethod
+    def _like(pattern):
+        needle = pattern.replace("*", "").replace("%", "").lower()
+        return lambda value: needle in str(value or "").lower()
+
+    def ilike(self, col, pattern):
+        self._check_column(col)
+        match = self._like(pattern)
+        return self._add(lambda r: match(r.get(col)))
+
+    def or_(self, filters):
+        """Sólo 'col.ilike.patrón' y 'col.eq.valor' separados por comas."""
+        preds = []
+        for part in filters.split(","):
+            col, op, val = part.split(".", 2)
+            if op == "ilike":
+                preds.append((col, self._like(val)))
+            else:
+                preds.append((col, lambda v, val=val: str(v) == val))
+        return self._add(lambda r: any(pred(r.get(col)) for col, pred in preds))
+
+    def order(self, col, desc=False, **kwargs):
+        self._order.append((col, desc))
+        return self
+
+    def limit(self, n, **kwargs):
+        self._limit = n
+        return self
+
+    def range(self, start, end, **kwargs):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # --- Ejecución ---
+    def _matches(self, row):
+        return all(fn(row) for fn in self._filters)
+
+    def _project(self, row):
+        if self._columns == "*":
+            return dict(row)
+        cols = [c.strip() for c in self._columns.split(",")]
+        return {c: row.get(c) for c in cols}
+
+    def execute(self):
+        client = self._client
+        with client._lock:
+            client.in_flight += 1
+            client.max_in_flight = max(client.max_in_flight, client.in_flight)
+            failure = client.failures.pop(0) if client.failures else None
+        try:
+            if client.latency:
+                time.sleep(client.latency)
+            with client._lock:
+                if failure is not None:
+                    client.round_trips += 1
+                    raise failure
+                return self._execute()
+        finally:
+            with client._lock:
+                client.in_flight -= 1
+
+    def _execute(self):
+        self._client.round_trips += 1
+        if self._error:
+            raise RuntimeError(self._error)
+        rows = self._client.tables.setdefault(self._name, [])
+
+        if self._op == "select":
+            found = [r for r in rows if self._matches(r)]
+            for col, desc in reversed(self._order):
+                found.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            total = len(found)
+            limit = self._limit if self._client.max_rows is None else min(self._limit or self._client.max_rows,
+                                                                           self._client.max_rows)
+            end = None if limit is None else self._offset + limit
+            found = found[self._offset:end]
+            count = total if self._count else None
+            self._client.rows_fetched += len(found)
+            return FakeResponse([self._project(r) for r in found], count)
+
+        if self._op in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            written = []
+            for item in payload:
+                item = copy.deepcopy(item)
+                existing = None
+                if self._op == "upsert":
+                    key = self._on_conflict
+                    existing = next((r for r in rows if r.get(key) == item.get(key)), None)
+                if existing is not None:
+                    existing.update(item)
+                    self._client._touch(self._name, existing)
+                    written.append(dict(existing))
+                else:
+                    item.setdefault("id", next(self._client._ids))
+                    self._client._touch(self._name, item)
+                    rows.append(item)
+                    written.append(dict(item))
+            return FakeResponse(written)
+
+        if self._op == "update":
+            written = []
+            for r in rows:
+                if self._matches(r):
+                    r.update(copy.deepcopy(self._payload))
+                    self._client._touch(self._name, r)
+                    written.append(dict(r))
+            return FakeResponse(written)
+
+        if self._op == "delete":
+            removed = [r for r in rows if self._matches(r)]
+            self._client.tables[self._name] = [r for r in rows if not self._matches(r)]
+            for r in removed:
+                self._client._bury(self._name, r)
+            return FakeResponse([dict(r) for r in removed])
+
+        raise ValueError(f"Operación no soportada: {self._op}")
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self._client = client
+        self._objects = client.buckets.setdefault(name, {})
+        self._name = name
+
+    def upload(self, path, file, file_options=None):
+        self._client.round_trips += 1
+        if path in self._objects:
+            raise ValueError(f"The resource already exists: {path}")
+        self._objects[path] = file if isinstance(file, bytes) else file.read()
+        return {"path": path}
+
+    def exists(self, path):
+        self._client.round_trips += 1
+        return path in self._objects
+
+    def remove(self, paths):
+        self._client.round_trips += 1
+        removed = [p for p in paths if self._objects.pop(p, None) is not None]
+        return [{"name": p} for p in removed]
+
+    def get_public_url(self, path):
+        return f"https://fake.supabase.co/storage/v1/object/public/{self._name}/{path}"
+
+
+class FakeStorage:
+    def __init__(self, client):
+        self._client = client
+
+    def from_(self, name):
+        return FakeBucket(self._client, name)
+
+
+class FakeSupabase:
+    """Cliente en memoria con la forma de ``supabase.Client``."""
+
+    def __init__(self, tables=None, track_changes=False):
+        self.tables = {name: [dict(r) for r in rows] for name, rows in (tables or {}).items()}
+        self.buckets = {}
+        self.round_trips = 0
+        self.rows_fetched = 0
+        self.max_rows = None
+        self.latency = 0.0
+        self.failures = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.RLock()
+        self.track_changes = track_changes
+        self.now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        start = max((r.get("id", 0) for rows in self.tables.values() for r in rows), default=0)
+        self._ids = itertools.count(start + 1)
+        for name, rows in self.tables.items():
+            for row in rows:
+                if "updated_at" not in row:
+                    self._touch(name, row)
+        self.storage = FakeStorage(self)
+
+    def advance(self, seconds):
+        """Adelanta el reloj del servidor simulado."""
+        self.now += timedelta(seconds=seconds)
+
+    def _touch(self, name, row):
+        if self.track_changes and not name.endswith("_bajas"):
+            row["updated_at"] = self.now.isoformat()
+
+    def _bury(self, name, row):
+        if self.track_changes and not name.endswith("_bajas"):
+            tombstones = self.tables.setdefault(f"{name}_bajas", [])
+            tombstones[:] = [t for t in tombstones if t["id"] != row["id"]]
+            tombstones.append({"id": row["id"], "deleted_at": self.now.isoformat()})
+
+    def table(self, name):
+        return FakeQuery(self, name)
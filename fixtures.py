@@ -0,0 +1,52 @@
+"""Datos generados que comparten las pruebas y los benchmarks.
+
+``make_rows`` arma filas de ``documentos_sgc`` como las regresa Supabase y
+``make_staff`` una plantilla de personal para el motor de reglas. Cada prueba
+ajusta sólo las columnas que le importan en vez de copiar su propio generador.
+"""
+import numpy as np
+import pandas as pd
+
+DEPARTAMENTOS = ("Calidad", "RRHH", "Mensajeria", None)
+
+
+def make_rows(n, **columns):
+    """``n`` documentos con ids desde 1 y códigos ``PR-001``, ``PR-002``...
+
+    Cada columna en ``columns`` agrega o sobrescribe un campo: un valor fijo,
+    una función del id o una lista con un valor por fila.
+    """
+    rows = []
+    for i in range(1, n + 1):
+        row = {"id": i, "codigo": f"PR-{i:03d}", "titulo": f"Documento {i}", "estatus": "Vigente",
+               "area": "Calidad", "fecha_emision": "2024-01-15", "proxima_revision": "2025-01-15"}
+        for name, value in columns.items():
+            if callable(value):
+                row[name] = value(i)
+            elif isinstance(value, list):
+                row[name] = value[i - 1]
+            else:
+                row[name] = value
+        rows.append(row)
+    return rows
+
+
+def make_staff(n, seed=0, departments=DEPARTAMENTOS):
+    """Plantilla de ``n`` empleados con retardos y faltas aleatorios (reproducibles por ``seed``)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Nombre": [f"Empleado {i}" for i in range(n)],
+        "Departamento": np.array(departments, dtype=object)[rng.integers(0, len(departments), n)],
+        "Retardos": rng.poisson(1.5, n),
+        "Faltas": rng.binomial(2, 0.1, n),
+    })
+
+
+class FakeClock:
+    """Reloj manual: las pruebas mueven ``now`` en vez de dormir."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,75 @@
+"""Operaciones por lote de la Zona de Gestión: eliminar, marcar obsoleto y cambiar área.
+
+Cada operación hace una consulta ``in_`` por bloque de ids (no una por
+documento) y una sola mutación por bloque; al eliminar, los archivos se
+liberan en lote con ``release_objects`` (sólo los que ninguna fila usa).
+"""
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from bulk_import import DELETE_CHUNK
+from registry import TABLE
+from uploads import BUCKET, release_objects
+
+OBSOLETO = "Obsoleto"
+
+
+@dataclass
+class BatchOutcome:
+    ids: list = field(default_factory=list)    # ids afectados (encontrados en la base)
+    rows: list = field(default_factory=list)   # filas actualizadas, para parchear la caché
+    removed_objects: list = field(default_factory=list)
+    storage_error: str = None                  # el borrado de archivos falló; las filas ya se borraron
+
+
+def option_labels(df):
+    """Etiqueta ``ID: <id> | <titulo>`` por id, armada en un solo paso vectorizado."""
+    if df.empty:
+        return pd.Series(dtype=object)
+    labels = "ID: " + df["id"].astype(str) + " | " + df["titulo"].fillna("").astype(str)
+    return pd.Series(labels.to_numpy(), index=df["id"].to_numpy())
+
+
+def _chunks(ids):
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    for start in range(0, len(ids), DELETE_CHUNK):
+        yield ids[start:start + DELETE_CHUNK]
+
+
+def delete_documents(client, ids, bucket=BUCKET):
+    """Borra las filas y libera sus archivos."""
+    outcome = BatchOutcome()
+    links = []
+    for chunk in _chunks(ids):
+        found = client.table(TABLE).select("id,link_documento").in_("id", chunk).execute().data or []
+        if not found:
+            continue
+        found_ids = [row["id"] for row in found]
+        client.table(TABLE).delete().in_("id", found_ids).execute()
+        outcome.ids += found_ids
+        links += [row.get("link_documento") for row in found]
+    # Después de borrar las filas: el conteo de referencias ya no las incluye
+    try:
+        outcome.removed_objects = release_objects(client, links, bucket)
+    except Exception as e:
+        outcome.storage_error = str(e)
+    return outcome
+
+
+def update_documents(client, ids, changes):
+    """Aplica los mismos cambios a todos los ids (una mutación por bloque)."""
+    outcome = BatchOutcome()
+    for chunk in _chunks(ids):
+        rows = client.table(TABLE).update(changes).in_("id", chunk).execute().data or []
+        outcome.rows += rows
+        outcome.ids += [row["id"] for row in rows]
+    return outcome
+
+
+def mark_obsolete(client, ids):
+    return update_documents(client, ids, {"estatus": OBSOLETO})
+
+
+def change_area(client, ids, area):
+    return update_documents(client, ids, {"area": area})
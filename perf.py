@@ -0,0 +1,203 @@
+"""Instrumentación ligera por ejecución del script: tramos de tiempo y contadores.
+
+Cada ejecución (rerun) de una página abre un ``Run``; dentro de él,
+``span("nombre")`` mide un tramo y ``count("nombre", n)`` suma a un contador.
+Las peticiones HTTP del cliente de Supabase se cuentan solas (peticiones y
+bytes, separadas en base de datos y storage) con ``instrument(client)``.
+
+Sin un ``Run`` activo, ``span`` regresa un contexto vacío compartido y
+``count`` no hace nada: el costo desactivado es una lectura de ContextVar.
+
+Al cerrar, cada ejecución se escribe como una línea JSON en el logger
+``sgc.perf``; con ``SGC_PERF_LOG`` (o ``SGC_PERF=1``) ese logger va a un archivo.
+
+Las llamadas hechas desde hilos de un ThreadPoolExecutor no heredan el
+``Run`` (no copian el contexto), así que no se atribuyen a la ejecución.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+ENABLED = os.environ.get("SGC_PERF") == "1"
+LOG_PATH = os.environ.get("SGC_PERF_LOG") or ("sgc_perf.jsonl" if ENABLED else None)
+
+logger = logging.getLogger("sgc.perf")
+_current = contextvars.ContextVar("sgc_perf_run", default=None)
+_NOOP = nullcontext()
+
+
+class Run:
+    def __init__(self, page, session=None, clock=time.perf_counter):
+        self.page = page
+        self.session = session
+        self.clock = clock
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self._start = clock()
+        self.seconds = None
+        self.spans = []           # (nombre, profundidad, segundos), en orden de inicio
+        self.counters = Counter()
+        self._depth = 0
+
+    @contextmanager
+    def span(self, name):
+        slot = len(self.spans)
+        self.spans.append((name, self._depth, None))
+        self._depth += 1
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.spans[slot] = (name, self._depth, self.clock() - start)
+
+    def finish(self):
+        self.seconds = self.clock() - self._start
+
+    def record(self):
+        """Registro para la bitácora estructurada."""
+        return {
+            "page": self.page,
+            "session": self.session,
+            "started_at": self.started_at,
+            "ms": round((self.seconds or 0) * 1000, 2),
+            "spans": [{"name": n, "depth": d, "ms": round(s * 1000, 2) if s is not None else None}
+                      for n, d, s in self.spans],
+            "counters": dict(self.counters),
+        }
+
+    def frame(self):
+        """Tramos como tabla para el panel (sangría por profundidad)."""
+        import pandas as pd  # sólo el panel lo necesita: el login no carga pandas
+        return pd.DataFrame({
+            "tramo": ["\u2003" * d + n for n, d, _ in self.spans],
+            "ms": [round(s * 1000, 1) if s is not None else None for _, _, s in self.spans],
+        })
+
+
+def span(name):
+    run = _current.get()
+    return run.span(name) if run is not None else _NOOP
+
+
+def count(name, value=1):
+    run = _current.get()
+    if run is not None:
+        run.counters[name] += value
+
+
+def current():
+    return _current.get()
+
+
+def _configure_log():
+    if LOG_PATH and not logger.handlers:
+        handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+@contextmanager
+def run(page, session=None, enabled=None, on_finish=None):
+    """Abre la ejecución de una página; ``enabled=None`` usa ``SGC_PERF``."""
+    if not (ENABLED if enabled is None else enabled):
+        yield None
+        return
+    current_run = Run(page, session)
+    token = _current.set(current_run)
+    try:
+        yield current_run
+    finally:
+        _current.reset(token)
+        current_run.finish()
+        _configure_log()
+        logger.info(json.dumps(current_run.record(), ensure_ascii=False))
+        if on_finish:
+            on_finish(current_run)
+
+
+def traced(page, enabled=None, session=None, on_finish=None):
+    """Decorador: la función completa es una ejecución. Los argumentos pueden ser callables
+    (se evalúan en cada llamada, p. ej. para leer ``st.session_state``)."""
+    def resolve(value):
+        return value() if callable(value) else value
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with run(page, resolve(session), resolve(enabled), on_finish):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin(page, session=None, enabled=None):
+    """Para scripts sin función principal (app.py): abre la ejecución hasta ``end()``.
+
+    Si la anterior quedó abierta porque ``st.rerun`` cortó el script, se
+    cierra y se registra primero.
+    """
+    end()
+    if not (ENABLED if enabled is None else enabled):
+        return None
+    current_run = Run(page, session)
+    _current.set(current_run)
+    return current_run
+
+
+def end():
+    current_run = _current.get()
+    if current_run is None:
+        return None
+    _current.set(None)
+    current_run.finish()
+    _configure_log()
+    logger.info(json.dumps(current_run.record(), ensure_ascii=False))
+    return current_run
+
+
+def render_panel(container, current_run, title="⏱️ Rendimiento (última ejecución)"):
+    """Panel con los tramos y contadores de una ejecución (``container``: p. ej. ``st.sidebar``)."""
+    box = container.expander(title)
+    if current_run is None:
+        box.caption("Sin mediciones todavía.")
+        return
+    c = current_run.counters
+    box.metric("Total", f"{(current_run.seconds or 0) * 1000:,.0f} ms")
+    box.caption(f"Base de datos: {c['db.peticiones']} peticiones · {c['db.bytes'] / 1024:,.1f} KB  \n"
+                f"Storage: {c['storage.peticiones']} peticiones · {c['storage.bytes'] / 1024:,.1f} KB")
+    box.dataframe(current_run.frame(), hide_index=True)
+    otros = {k: v for k, v in c.items() if not k.startswith(("db.", "storage."))}
+    if otros:
+        box.json(otros)
+
+
+# --- HTTP: peticiones y bytes del cliente de Supabase ---
+def _count_response(kind, response):
+    current_run = _current.get()
+    if current_run is None:
+        return
+    response.read()  # los hooks corren antes de leer el cuerpo
+    current_run.counters[f"{kind}.peticiones"] += 1
+    current_run.counters[f"{kind}.bytes"] += len(response.content)
+
+
+_HOOKS = {"postgrest": functools.partial(_count_response, "db"),
+          "storage": functools.partial(_count_response, "storage")}
+
+
+def instrument(client):
+    """Agrega el conteo a las sesiones HTTP de base de datos y storage del cliente (idempotente)."""
+    for attr, hook in _HOOKS.items():
+        session = getattr(getattr(client, attr, None), "session", None)
+        hooks = getattr(session, "event_hooks", None)
+        if isinstance(hooks, dict) and hook not in hooks.get("response", []):
+            session.event_hooks = {**hooks, "response": [*hooks.get("response", []), hook]}
+    return client
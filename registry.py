@@ -0,0 +1,475 @@
+"""Capa de acceso a datos del registro de documentos controlados (documentos_sgc).
+
+Descarga la tabla por páginas (paginación por llave: ``id > último id``), la
+convierte a un DataFrame tipado y la mantiene en una caché con TTL. Las rutas
+de escritura del tablero parchean o invalidan la caché para que una recarga
+que no cambió datos nunca toque la base.
+
+Cuando la tabla tiene ``updated_at`` y la tabla de lápidas ``documentos_sgc_bajas``
+(ver ``schema_sgc.sql``), al expirar el TTL sólo se piden las filas cambiadas
+y borradas desde la última marca de agua, no la tabla completa.
+
+Los KPIs del Tablero Gerencial salen de la vista ``documentos_sgc_resumen``
+(conteos por estatus y área), así que no requieren descargar filas.
+
+Con una instantánea en disco (``snapshot.RegistrySnapshot``) un proceso nuevo
+arranca con el último registro guardado, lo entrega de inmediato y lo
+reconcilia con la base en un hilo de fondo; cada sincronización que cambia el
+registro vuelve a guardar la instantánea.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import perf
+from resilient import is_transient
+
+TABLE = "documentos_sgc"
+TOMBSTONE_TABLE = "documentos_sgc_bajas"
+SUMMARY_VIEW = "documentos_sgc_resumen"
+PAGE_SIZE = 1000
+CACHE_TTL = 60  # segundos; con sincronización delta refrescar es barato
+# Margen hacia atrás al pedir cambios: una transacción larga puede confirmar
+# filas con un updated_at anterior a la marca ya vista. Las filas ya vistas que
+# vuelven en el margen se descartan sin tocar el registro.
+WATERMARK_OVERLAP = pd.Timedelta(seconds=30)
+# Una instantánea sin sincronizar por más tiempo que la retención de lápidas
+# (ver schema_sgc.sql) podría perder borrados: se recarga completa.
+TOMBSTONE_RETENTION = 7 * 24 * 3600  # segundos
+DATE_COLUMNS = ("fecha_emision", "proxima_revision")
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+CATEGORY_COLUMNS = ("estatus", "area", "tipo_documento", "responsable", "revision")
+TEXT_COLUMNS = ("codigo", "titulo", "link_documento")
+DROP_COLUMNS = ("busqueda",)
+# Columnas que se descargan: ``select("*")`` traería también ``busqueda`` (sólo sirve al
+# ILIKE del servidor), que el registro descarta
+REGISTRY_COLUMNS = ("id", "codigo", "titulo", "revision", "estatus", "area", "tipo_documento", "responsable",
+                    "fecha_emision", "proxima_revision", "link_documento", "created_at", "updated_at")
+
+logger = logging.getLogger("sgc.registro")
+
+
+# --- 1. LECTURA PAGINADA ---
+def fetch_pages(client, page_size=PAGE_SIZE, columns="*", since=None, strict=False):
+    """Genera páginas de filas ordenadas por id usando paginación por llave.
+
+    Con ``since`` sólo trae filas con ``updated_at >= since`` (``>`` si ``strict``).
+    """
+    last_id = None
+    while True:
+        query = client.table(TABLE).select(columns).order("id").limit(page_size)
+        if since is not None:
+            query = query.gt("updated_at", since) if strict else query.gte("updated_at", since)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+        perf.count("registro.filas", len(page))
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
+def fetch_tombstones(client, since, strict=False, page_size=PAGE_SIZE):
+    """Ids borrados desde ``since`` según la tabla de lápidas, por páginas.
+
+    PostgREST corta cada respuesta (1000 filas por defecto): se pide por rangos
+    en orden ``deleted_at, id`` hasta recibir una página incompleta.
+    """
+    rows = []
+    while True:
+        query = client.table(TOMBSTONE_TABLE).select("id", "deleted_at")
+        query = query.gt("deleted_at", since) if strict else query.gte("deleted_at", since)
+        query = query.order("deleted_at").order("id").range(len(rows), len(rows) + page_size - 1)
+        page = query.execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def _max_timestamp(rows, column):
+    stamps = [row[column] for row in rows if row.get(column)]
+    return max(pd.Timestamp(s) for s in stamps) if stamps else None
+
+
+def _unseen(df, rows):
+    """Filas que no están en ``df`` con el mismo ``updated_at`` (las del margen ya aplicadas se descartan)."""
+    if not rows or df is None or df.empty or "updated_at" not in df.columns:
+        return list(rows)
+    known = df.loc[df["id"].isin([row["id"] for row in rows]), ["id", "updated_at"]]
+    known = dict(zip(known["id"].tolist(), known["updated_at"].tolist()))
+    return [row for row in rows
+            if row["id"] not in known or pd.Timestamp(row.get("updated_at")) != known[row["id"]]]
+
+
+# --- 2. CONVERSIÓN A DATAFRAME ---
+def to_frame(rows):
+    """Convierte filas crudas de Supabase en un DataFrame compacto y tipado (ver ``compact``)."""
+    return compact(pd.DataFrame(rows))
+
+
+def compact(df):
+    """Tipos compactos para el registro; es la única conversión, la consumen todas las pestañas.
+
+    - Campos con pocos valores distintos (estatus, área, tipo...): categóricos,
+      un código entero por fila en lugar de una cadena de Python.
+    - Fechas y marcas de tiempo: ``datetime64``.
+    - Texto libre (código, título, enlace): el tipo ``str`` de pandas 3
+      (respaldado por Arrow, faltantes como NaN); requirements.txt fija
+      ``pandas>=3``: en pandas 2 ``astype("str")`` deja objetos y vuelve los
+      faltantes el texto ``"nan"``.
+    - La columna de búsqueda del servidor se descarta: el índice local la recalcula.
+
+    Las columnas que ya tienen su tipo no se tocan, así que volver a compactar
+    tras un ``concat`` sólo convierte lo que el ``concat`` dejó como objeto.
+    """
+    columns = {}
+    for col, series in df.items():
+        if col in DROP_COLUMNS:
+            continue
+        dtype = series.dtype
+        if col in CATEGORY_COLUMNS and not isinstance(dtype, pd.CategoricalDtype):
+            # factorize + from_codes: lo mismo que astype("category"), con menos costo fijo por columna
+            codes, uniques = pd.factorize(series, sort=True)
+            series = pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=col)
+        elif col in TEXT_COLUMNS and dtype == object:
+            series = series.astype("str")
+        elif col in DATE_COLUMNS and not pd.api.types.is_datetime64_any_dtype(dtype):
+            series = pd.to_datetime(series, errors="coerce", format="ISO8601")
+        elif col in TIMESTAMP_COLUMNS and not pd.api.types.is_datetime64_any_dtype(dtype):
+            series = pd.to_datetime(series, errors="coerce", format="ISO8601", utc=True)
+        columns[col] = series
+    # Un solo DataFrame al final: asignar columna por columna cuesta más que convertirlas
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def apply_changes(df, changed_rows=(), deleted_ids=()):
+    """Retorna un DataFrame nuevo con filas reemplazadas/agregadas (por id) y borradas."""
+    if deleted_ids and not df.empty:
+        df = df[~df["id"].isin(list(deleted_ids))]
+    if changed_rows:
+        new = to_frame(changed_rows)
+        if not df.empty and "id" in df.columns:
+            df = df[~df["id"].isin(new["id"])]
+        df = pd.concat([df, new], ignore_index=True) if not df.empty else new
+        # Categorías distintas en cada lado: el concat las deja como objeto
+        df = compact(df.sort_values("id"))
+    return df.reset_index(drop=True)
+
+
+# --- 3. RESUMEN (KPIs) ---
+@dataclass(frozen=True)
+class RegistrySummary:
+    """Conteos por estatus y área: todo lo que necesita el Tablero Gerencial."""
+    counts: pd.DataFrame  # columnas: estatus, area, documentos
+
+    @property
+    def total(self):
+        return int(self.counts["documentos"].sum())
+
+    @property
+    def vigentes(self):
+        return int(self.counts.loc[self.counts["estatus"] == "Vigente", "documentos"].sum())
+
+    @property
+    def pendientes(self):
+        return self.total - self.vigentes
+
+    @property
+    def areas(self):
+        return self.counts["area"].nunique()
+
+    @property
+    def by_status(self):
+        return self.counts.groupby("estatus")["documentos"].sum().sort_values(ascending=False)
+
+    @property
+    def by_area(self):
+        return self.counts.groupby("area")["documentos"].sum().sort_values(ascending=False)
+
+
+def fetch_summary(client):
+    """Lee la vista agregada (unas decenas de filas en lugar de la tabla completa)."""
+    rows = client.table(SUMMARY_VIEW).select("estatus", "area", "documentos").execute().data or []
+    counts = pd.DataFrame(rows, columns=["estatus", "area", "documentos"])
+    return RegistrySummary(counts.astype({"documentos": "int64"}))
+
+
+def summary_from_frame(df):
+    """Mismo resumen que la vista, calculado sobre un registro ya cargado."""
+    if df.empty:
+        return RegistrySummary(pd.DataFrame({"estatus": [], "area": [], "documentos": []}))
+    counts = df.groupby(["estatus", "area"], dropna=False, observed=True).size()
+    return RegistrySummary(counts.rename("documentos").reset_index())
+
+
+# --- 4. CACHÉ CON TTL ---
+class RegistryCache:
+    """Caché del registro compartida entre sesiones.
+
+    El DataFrame entregado nunca se modifica en sitio: cada parche construye
+    uno nuevo, así que las sesiones que aún lo están leyendo no se ven afectadas.
+
+    La marca de agua es el mayor ``updated_at``/``deleted_at`` recibido: sólo
+    marcas del servidor, nunca el reloj de este equipo, así que un reloj local
+    adelantado no salta cambios. Cada delta pide desde la marca menos
+    ``WATERMARK_OVERLAP``; las filas del margen que ya se tenían se descartan
+    sin cambiar el registro. Cuando pasó el margen (en el reloj monotónico)
+    desde que se vio la marca y una sincronización ya cubrió ese margen, todo
+    lo anterior a la marca está confirmado y se pide sólo lo posterior: una
+    ráfaga de escrituras seguida de silencio no se descarga en cada refresco.
+    Si la tabla aún no tiene ``updated_at`` no hay marca y cada refresco es
+    una carga completa, como antes de la migración.
+
+    Un registro cargado de la instantánea está "pendiente": ``get``, ``peek`` y
+    ``summary`` lo entregan tal cual mientras un hilo de fondo lo reconcilia
+    (delta desde la marca de agua guardada). Si la base no responde se sigue
+    entregando la instantánea y se reintenta en la siguiente lectura.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, page_size=PAGE_SIZE, clock=time.monotonic,
+                 wall_clock=lambda: datetime.now(timezone.utc), snapshot=None):
+        self.ttl = ttl
+        self.page_size = page_size
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._df = None
+        self._loaded_at = None
+        self._watermark = None
+        self._watermark_seen_at = None  # reloj monotónico cuando se recibió la marca
+        self._settled = False           # todo lo anterior a la marca ya se recibió
+        self._summary = None
+        self._summary_at = None
+        # Cambia cada vez que cambia el DataFrame: sirve de llave para derivados (índices)
+        self.version = 0
+        self._versioned = (None, 0)
+        self.snapshot = snapshot
+        self._saved_version = 0
+        self._saved_mark = None
+        self._pending = False
+        self._reconciling = threading.Lock()
+        self.columns = ",".join(REGISTRY_COLUMNS)
+
+    @property
+    def pending(self):
+        """True mientras se entrega la instantánea de disco sin reconciliar."""
+        return self._pending
+
+    def _set_frame(self, df):
+        self._df = df
+        self.version += 1
+        self._versioned = (df, self.version)
+
+    def _is_fresh(self):
+        return self._df is not None and self._clock() - self._loaded_at < self.ttl
+
+    def summary(self, client):
+        """KPIs del registro sin descargar filas.
+
+        Si el proceso ya tiene el registro fresco se agrega en memoria; si no,
+        se consulta la vista ``documentos_sgc_resumen`` (con su propio TTL).
+        Sin la vista (migración pendiente) se recurre a la carga completa.
+        """
+        if self._pending:
+            self._reconcile_in_background(client)
+        if self._is_fresh() or self._pending:
+            return summary_from_frame(self._df)
+        summary, summary_at = self._summary, self._summary_at
+        if summary is not None and self._clock() - summary_at < self.ttl:
+            return summary
+        try:
+            summary = fetch_summary(client)
+        except Exception as e:
+            if is_transient(e):
+                raise  # la base no responde: la carga completa tampoco respondería
+            return summary_from_frame(self.get(client))
+        with self._lock:
+            self._summary, self._summary_at = summary, self._clock()
+        return summary
+
+    def get(self, client):
+        """Retorna el registro; sólo consulta la base si la caché expiró o se invalidó."""
+        if self._is_fresh():
+            return self._df
+        if self._pending:
+            self._reconcile_in_background(client)
+            return self._df
+        with self._lock:
+            # Otra sesión pudo refrescar mientras esperábamos el candado
+            if not self._is_fresh():
+                self._refresh(client)
+            return self._df
+
+    def peek(self):
+        """``(df, version)`` si el registro está fresco (o pendiente de reconciliar) en memoria;
+        si no, None (no consulta)."""
+        df, version = self._versioned
+        if df is None or not (self._is_fresh() or self._pending):
+            return None
+        return df, version
+
+    def get_versioned(self, client):
+        """Como ``get`` pero retorna ``(df, version)`` leídos juntos (sin carrera con escrituras)."""
+        self.get(client)
+        return self._versioned
+
+    def _refresh(self, client):
+        """Delta o carga completa (con el candado tomado); guarda la instantánea si cambió."""
+        if self._can_sync_delta():
+            try:
+                self._sync_delta(client)
+            except Exception as e:
+                if is_transient(e):
+                    raise
+                # p. ej. falta la tabla de lápidas: volvemos a la carga completa
+                self._full_load(client)
+        else:
+            self._full_load(client)
+        self._loaded_at = self._clock()
+        self._pending = False
+        self._save_snapshot()
+
+    def load_snapshot(self):
+        """Carga la instantánea de disco como registro pendiente; True si había una utilizable."""
+        if self.snapshot is None:
+            return False
+        loaded = self.snapshot.load()
+        if loaded is None:
+            return False
+        df, watermark, saved_at = loaded
+        age = (pd.Timestamp(self._wall_clock()) - saved_at).total_seconds()
+        with self._lock:
+            if self._df is not None:
+                return False
+            self._set_frame(df)
+            self._saved_version, self._saved_mark = self.version, watermark
+            # La instantánea guarda hasta dónde se recibió todo: se sigue desde ahí
+            self._set_watermark(watermark, settled=watermark is not None)
+            # Vencida desde que se guardó: decide si aún alcanza un delta (retención de lápidas)
+            self._loaded_at = self._clock() - max(age, self.ttl)
+            self._pending = True
+        return True
+
+    def _reconcile_in_background(self, client):
+        if not self._reconciling.acquire(blocking=False):
+            return  # ya hay una reconciliación en curso
+        threading.Thread(target=self._reconcile, args=(client,), name="registro-reconciliar",
+                         daemon=True).start()
+
+    def _reconcile(self, client):
+        try:
+            with self._lock:
+                if self._pending:
+                    self._refresh(client)
+        except Exception:
+            logger.warning("No se pudo reconciliar la instantánea con la base", exc_info=True)
+        finally:
+            self._reconciling.release()
+
+    def _complete_through(self):
+        """Marca hasta la que ya se recibió todo (la que se guarda en la instantánea)."""
+        if self._watermark is None or self._settled:
+            return self._watermark
+        return self._watermark - WATERMARK_OVERLAP
+
+    def _save_snapshot(self):
+        mark = self._complete_through()
+        if self.snapshot is None or self._df is None or (self.version == self._saved_version
+                                                         and mark == self._saved_mark):
+            return
+        try:
+            self.snapshot.save(self._df, mark, self._wall_clock())
+        except Exception:
+            # Sin disco la caché en memoria sigue sirviendo
+            logger.warning("No se pudo guardar la instantánea del registro", exc_info=True)
+            return
+        self._saved_version, self._saved_mark = self.version, mark
+
+    def _can_sync_delta(self):
+        return (self._df is not None and self._watermark is not None
+                and self._clock() - self._loaded_at < TOMBSTONE_RETENTION)
+
+    def _fetch_rows(self, client, since=None, strict=False):
+        try:
+            return [row for page in fetch_pages(client, self.page_size, self.columns, since, strict) for row in page]
+        except Exception as e:
+            if is_transient(e) or self.columns == "*":
+                raise
+            # Tabla anterior a la migración (p. ej. sin updated_at): se piden todas las columnas
+            self.columns = "*"
+            return [row for page in fetch_pages(client, self.page_size, self.columns, since, strict) for row in page]
+
+    def _set_watermark(self, watermark, settled=False):
+        self._watermark = watermark
+        self._watermark_seen_at = self._clock()
+        self._settled = settled
+
+    def _full_load(self, client):
+        with perf.span("registro.descarga"):
+            rows = self._fetch_rows(client)
+        with perf.span("registro.dataframe"):
+            self._set_frame(to_frame(rows))
+        self._set_watermark(_max_timestamp(rows, "updated_at"))
+
+    def _sync_delta(self, client):
+        started = self._clock()
+        # Asentada: todo lo anterior a la marca ya se recibió, basta lo posterior
+        since, strict = self._complete_through().isoformat(), self._settled
+        with perf.span("registro.delta"):
+            changed = self._fetch_rows(client, since, strict)
+            deleted = fetch_tombstones(client, since, strict, self.page_size)
+
+        changed = _unseen(self._df, changed)
+        deleted_ids = [t["id"] for t in deleted]
+        if deleted_ids and not self._df.empty:
+            deleted_ids = self._df.loc[self._df["id"].isin(deleted_ids), "id"].tolist()
+        if deleted_ids or changed:
+            self._set_frame(apply_changes(self._df, changed, deleted_ids))
+
+        stamps = [s for s in (_max_timestamp(changed, "updated_at"), _max_timestamp(deleted, "deleted_at"))
+                  if s is not None and s > self._watermark]
+        if stamps:
+            self._set_watermark(max(stamps))
+        elif started - self._watermark_seen_at >= WATERMARK_OVERLAP.total_seconds():
+            # Al empezar esta sincronización el servidor ya iba al menos un margen
+            # después de la marca, y ésta pidió desde la marca menos el margen
+            self._settled = True
+
+    def expire(self):
+        """Marca la caché como vencida conservando la instantánea (siguiente lectura = delta)."""
+        with self._lock:
+            self._loaded_at = None if self._df is None else self._loaded_at - self.ttl
+            self._summary = None
+
+    def invalidate(self):
+        """Descarta el contenido; la siguiente lectura recarga desde la base."""
+        with self._lock:
+            self._set_frame(None)
+            self._loaded_at = None
+            self._set_watermark(None)
+            self._summary = None
+            self._pending = False
+
+    def upsert_rows(self, rows):
+        """Parchea la caché con filas recién insertadas o actualizadas (por id)."""
+        if not rows:
+            return
+        with self._lock:
+            self._summary = None
+            if self._df is None:
+                return
+            self._set_frame(apply_changes(self._df, changed_rows=rows))
+
+    def delete_ids(self, ids):
+        """Quita de la caché las filas borradas en la base."""
+        with self._lock:
+            self._summary = None
+            if self._df is None or self._df.empty:
+                return
+            self._set_frame(apply_changes(self._df, deleted_ids=list(ids)))
@@ -0,0 +1,225 @@
+"""Cliente de Supabase compartido entre sesiones: lecturas coalescidas, tope de
+concurrencia, reintentos con espera aleatoria y cortacircuitos.
+
+``ResilientClient`` envuelve al cliente del proceso. ``client.table(...)``
+devuelve una consulta que sólo registra la cadena de llamadas
+(``select(...).eq(...).order(...)``); al ``execute()``:
+
+- Lecturas (``select``) idénticas en vuelo al mismo tiempo, de cualquier
+  sesión, se resuelven con una sola petición (single-flight): las demás
+  esperan y reciben la misma respuesta, que debe tratarse como de sólo lectura.
+- Como mucho ``max_concurrency`` peticiones van a la base a la vez.
+- Los errores transitorios (red, tiempo agotado, 429/5xx, conexión de
+  PostgREST con la base) se reintentan con espera exponencial con jitter
+  completo, sólo en llamadas idempotentes: ``select``, ``update``, ``upsert``
+  y ``delete``. Un ``insert`` nunca se repite.
+- Tras ``BREAKER_THRESHOLD`` fallos transitorios seguidos, el cortacircuitos
+  se abre: durante ``BREAKER_COOLDOWN`` segundos las llamadas fallan al
+  instante con ``ServiceUnavailable`` en lugar de apilar esperas; después
+  pasa una llamada de prueba y, si responde, se cierra.
+
+Los errores no transitorios (columna o vista inexistente, permisos) pasan tal
+cual y no cuentan para el cortacircuitos: los respaldos de registry/explorer
+siguen funcionando igual. El resto de atributos (``storage``, ``postgrest``...)
+se delegan al cliente original.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import perf
+
+MAX_CONCURRENCY = 8
+RETRIES = 3               # reintentos después del primer intento
+BASE_DELAY = 0.2          # segundos; la espera máxima del intento k es BASE_DELAY * 2**k
+MAX_DELAY = 3.0
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+IDEMPOTENT = {"select": True, "update": True, "upsert": True, "delete": True, "insert": False}
+RETRY_STATUS = {"408", "429", "500", "502", "503", "504", "520"}
+# PGRST000-003: PostgREST no pudo conectarse con la base o agotó el pool; 40001/40P01: serialización/bloqueo
+RETRY_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "40001", "40P01"}
+
+try:
+    import httpx
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:  # pragma: no cover - httpx llega con supabase
+    TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+
+class ServiceUnavailable(ConnectionError):
+    """El cortacircuitos está abierto: Supabase falló varias veces seguidas."""
+
+
+def is_transient(exc):
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    code = getattr(exc, "code", None)
+    return code is not None and (str(code) in RETRY_STATUS or str(code) in RETRY_CODES)
+
+
+def _freeze(value):
+    """Versión hasheable de los argumentos de una consulta (llave del single-flight)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+class SingleFlight:
+    """Una sola ejecución por llave a la vez; las llamadas concurrentes comparten el resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            perf.count("supabase.coalescidas")
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "cerrado"
+        return "abierto" if self.clock() - self.opened_at < self.cooldown else "semiabierto"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self.clock() - self.opened_at < self.cooldown or self._probing:
+                raise ServiceUnavailable("Supabase no responde; se reintentará en unos segundos")
+            self._probing = True  # semiabierto: pasa sólo esta llamada de prueba
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._probing = False
+
+    def release(self):
+        """La llamada de prueba terminó con un error no transitorio: la base sí respondió."""
+        self.record_success()
+
+
+class _Query:
+    """Cadena de llamadas de una consulta; se ejecuta contra el cliente real en ``execute``."""
+
+    def __init__(self, owner, table, calls=()):
+        self._owner = owner
+        self._table = table
+        self._calls = calls
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return _Query(self._owner, self._table, self._calls + ((name, args, kwargs),))
+        return method
+
+    def execute(self):
+        return self._owner._execute(self._table, self._calls)
+
+
+class ResilientClient:
+    def __init__(self, client, max_concurrency=MAX_CONCURRENCY, retries=RETRIES, base_delay=BASE_DELAY,
+                 max_delay=MAX_DELAY, breaker=None, sleep=time.sleep, rng=None):
+        self.client = client
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.flights = SingleFlight()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def table(self, name):
+        return _Query(self, name)
+
+    from_ = table
+
+    def _build(self, table, calls):
+        query = self.client.table(table)
+        for name, args, kwargs in calls:
+            query = getattr(query, name)(*args, **kwargs)
+        if callable(getattr(query, "retry", None)):
+            query = query.retry(False)  # los reintentos son de esta capa (con jitter y cortacircuitos)
+        return query
+
+    def _send(self, table, calls):
+        idempotent = IDEMPOTENT.get(calls[0][0] if calls else "select", False)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                with self._slots:
+                    response = self._build(table, calls).execute()
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if not idempotent or attempt >= self.retries:
+                    raise
+                perf.count("supabase.reintentos")
+                # Jitter completo: las sesiones que fallaron juntas no reintentan juntas
+                self._sleep(self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                attempt += 1
+            else:
+                self.breaker.record_success()
+                return response
+
+    def _execute(self, table, calls):
+        if calls and calls[0][0] == "select":
+            key = (table, _freeze(calls))
+            return self.flights.do(key, lambda: self._send(table, calls))
+        return self._send(table, calls)
@@ -140,6 +140,7 @@ CREATE TRIGGER tr_prescriptions_update BEFORE UPDATE ON prescriptions FOR EACH R
 CREATE TRIGGER tr_lab_results_update BEFORE UPDATE ON lab_results FOR EACH ROW EXECUTE PROCEDURE handle_updated_at();
 
 -- 5. ROW LEVEL SECURITY (RLS)
+-- Índices de llaves foráneas/fechas y políticas con el rol evaluado una vez por consulta: schema_rendimiento.sql
 ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.patients ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.appointments ENABLE ROW LEVEL SECURITY;
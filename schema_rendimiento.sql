@@ -0,0 +1,88 @@
+-- CRM MÉDICO - MIGRACIÓN DE RENDIMIENTO (sobre schema.sql)
+-- Índices para llaves foráneas y fechas, y políticas RLS que evalúan el rol
+-- una vez por consulta en lugar de una vez por fila.
+-- Idempotente: se puede ejecutar varias veces desde el SQL Editor de Supabase.
+-- Medición antes/después: python -m benchmarks.bench_schema <dsn de un Postgres local>
+
+-- 1. ÍNDICES DE LLAVES FORÁNEAS
+-- Postgres no indexa las llaves foráneas: sin índice, cada consulta por
+-- paciente o por médico recorre la tabla completa, y borrar un paciente
+-- (ON DELETE CASCADE) recorre todas las tablas que lo referencian.
+-- Los índices compuestos (llave, fecha) sirven también para la llave sola.
+CREATE INDEX IF NOT EXISTS idx_patients_insurer_id ON public.patients (insurer_id);
+
+-- Historial del paciente (más recientes primero) y agenda del médico
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_date ON public.appointments (patient_id, appointment_date DESC);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date ON public.appointments (doctor_id, appointment_date);
+
+CREATE INDEX IF NOT EXISTS idx_medical_records_patient_created ON public.medical_records (patient_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_medical_records_doctor_created ON public.medical_records (doctor_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_medical_records_appointment_id ON public.medical_records (appointment_id);
+
+CREATE INDEX IF NOT EXISTS idx_prescriptions_patient_created ON public.prescriptions (patient_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_prescriptions_doctor_id ON public.prescriptions (doctor_id);
+CREATE INDEX IF NOT EXISTS idx_prescriptions_appointment_id ON public.prescriptions (appointment_id);
+
+CREATE INDEX IF NOT EXISTS idx_lab_results_patient_date ON public.lab_results (patient_id, result_date DESC);
+CREATE INDEX IF NOT EXISTS idx_lab_results_doctor_id ON public.lab_results (doctor_id);
+
+-- 2. ÍNDICES POR FECHA
+-- Citas activas (programadas o confirmadas): la agenda sólo mira éstas, que
+-- son una fracción pequeña de la tabla; el índice parcial no crece con el
+-- histórico de citas completadas, canceladas o no asistidas.
+CREATE INDEX IF NOT EXISTS idx_appointments_active_doctor_date ON public.appointments (doctor_id, appointment_date)
+    WHERE status IN ('scheduled', 'confirmed');
+CREATE INDEX IF NOT EXISTS idx_appointments_active_date ON public.appointments (appointment_date)
+    WHERE status IN ('scheduled', 'confirmed');
+
+-- Insumos por vencer (los que no tienen caducidad no entran)
+CREATE INDEX IF NOT EXISTS idx_inventory_expiry_date ON public.inventory (expiry_date)
+    WHERE expiry_date IS NOT NULL;
+
+-- 3. ROL DEL USUARIO PARA LAS POLÍTICAS RLS
+-- STABLE: dentro de una consulta el resultado no cambia. Las políticas la
+-- llaman envuelta en (SELECT ...): el planificador la ejecuta una sola vez
+-- como InitPlan y compara el resultado en cada fila, en lugar de repetir la
+-- búsqueda en profiles (y la lectura del JWT) por fila.
+-- SECURITY DEFINER: lee profiles sin pasar por su propio RLS.
+CREATE OR REPLACE FUNCTION public.auth_has_role(roles public.user_role[])
+RETURNS BOOLEAN
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = ''
+AS $$
+    SELECT EXISTS (SELECT 1 FROM public.profiles WHERE id = auth.uid() AND role = ANY (roles));
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.auth_has_role(public.user_role[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.auth_has_role(public.user_role[]) TO authenticated;
+
+-- 4. POLÍTICAS (mismas reglas que schema.sql)
+DROP POLICY IF EXISTS "Users can edit their own profile" ON public.profiles;
+CREATE POLICY "Users can edit their own profile" ON public.profiles
+    FOR UPDATE USING ((SELECT auth.uid()) = id);
+
+DROP POLICY IF EXISTS "Medical staff can manage patients" ON public.patients;
+CREATE POLICY "Medical staff can manage patients" ON public.patients
+    FOR ALL USING ((SELECT public.auth_has_role('{admin,doctor,nurse}')));
+
+DROP POLICY IF EXISTS "Doctors and Admin can manage medical records" ON public.medical_records;
+CREATE POLICY "Doctors and Admin can manage medical records" ON public.medical_records
+    FOR ALL USING ((SELECT public.auth_has_role('{admin,doctor}')));
+
+DROP POLICY IF EXISTS "Staff can view inventory" ON public.inventory;
+CREATE POLICY "Staff can view inventory" ON public.inventory
+    FOR SELECT USING ((SELECT auth.role()) = 'authenticated');
+
+DROP POLICY IF EXISTS "Admin can manage inventory" ON public.inventory;
+CREATE POLICY "Admin can manage inventory" ON public.inventory
+    FOR ALL USING ((SELECT public.auth_has_role('{admin}')));
+
+-- appointments, prescriptions y lab_results tienen RLS activo sin políticas:
+-- sólo el service_role (que omite RLS) las lee. Cuando se les agreguen
+-- políticas, usar el mismo patrón: USING ((SELECT public.auth_has_role('{...}'))).
+
+-- 5. ESTADÍSTICAS
+ANALYZE public.patients, public.appointments, public.medical_records, public.prescriptions,
+        public.lab_results, public.inventory;
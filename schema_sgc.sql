@@ -0,0 +1,94 @@
+-- SGC - REGISTRO DE DOCUMENTOS CONTROLADOS (PostgreSQL / Supabase)
+-- Migración idempotente sobre la tabla existente public.documentos_sgc.
+-- Se puede ejecutar varias veces desde el SQL Editor de Supabase.
+
+-- 1. FUNCIÓN PARA UPDATED_AT (misma que en schema.sql)
+CREATE OR REPLACE FUNCTION handle_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 2. SINCRONIZACIÓN INCREMENTAL (marca de agua por updated_at)
+ALTER TABLE public.documentos_sgc ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_updated_at ON public.documentos_sgc (updated_at);
+
+DROP TRIGGER IF EXISTS tr_documentos_sgc_update ON public.documentos_sgc;
+CREATE TRIGGER tr_documentos_sgc_update BEFORE UPDATE ON public.documentos_sgc FOR EACH ROW EXECUTE PROCEDURE handle_updated_at();
+
+-- Lápidas: cada borrado deja el id y la hora, para que los clientes con una
+-- instantánea local puedan retirar la fila sin volver a leer la tabla completa.
+CREATE TABLE IF NOT EXISTS public.documentos_sgc_bajas (
+    id BIGINT PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_bajas_deleted_at ON public.documentos_sgc_bajas (deleted_at);
+
+CREATE OR REPLACE FUNCTION handle_documentos_sgc_baja()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.documentos_sgc_bajas (id, deleted_at)
+    VALUES (OLD.id, NOW())
+    ON CONFLICT (id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tr_documentos_sgc_delete ON public.documentos_sgc;
+CREATE TRIGGER tr_documentos_sgc_delete AFTER DELETE ON public.documentos_sgc FOR EACH ROW EXECUTE PROCEDURE handle_documentos_sgc_baja();
+
+ALTER TABLE public.documentos_sgc_bajas ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Tombstones are readable" ON public.documentos_sgc_bajas;
+CREATE POLICY "Tombstones are readable" ON public.documentos_sgc_bajas FOR SELECT USING (true);
+
+-- Mantenimiento (opcional): las lápidas sólo sirven a clientes con instantáneas
+-- recientes; una caché más vieja que esto hace carga completa de todos modos.
+-- DELETE FROM public.documentos_sgc_bajas WHERE deleted_at < NOW() - INTERVAL '7 days';
+
+-- 3. CARGA MASIVA POR UPSERT
+-- La carga por CSV hace upsert con ON CONFLICT (codigo): el código debe ser
+-- único. Si hay duplicados previos, depúralos antes de crear el índice.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_documentos_sgc_codigo ON public.documentos_sgc (codigo);
+
+-- 4. RESUMEN PARA EL TABLERO GERENCIAL
+-- Conteos por estatus y área: el tablero pide unas decenas de filas en lugar
+-- de la tabla completa. security_invoker aplica el RLS de quien consulta.
+CREATE OR REPLACE VIEW public.documentos_sgc_resumen
+WITH (security_invoker = true) AS
+SELECT estatus, area, COUNT(*)::INTEGER AS documentos
+FROM public.documentos_sgc
+GROUP BY estatus, area;
+
+-- 5. EXPLORADOR PAGINADO EN EL SERVIDOR
+-- Texto de búsqueda normalizado (minúsculas, sin acentos) con índice trigram:
+-- el ILIKE '%texto%' del Explorador usa el índice en lugar de recorrer la tabla.
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- unaccent() no es IMMUTABLE; este envoltorio con diccionario fijo sí puede usarse en una columna generada
+CREATE OR REPLACE FUNCTION public.sgc_unaccent(TEXT)
+RETURNS TEXT AS $$
+    SELECT extensions.unaccent('extensions.unaccent'::regdictionary, $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+ALTER TABLE public.documentos_sgc ADD COLUMN IF NOT EXISTS busqueda TEXT
+    GENERATED ALWAYS AS (lower(public.sgc_unaccent(coalesce(codigo, '') || ' | ' || coalesce(titulo, '')))) STORED;
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_busqueda_trgm ON public.documentos_sgc USING gin (busqueda extensions.gin_trgm_ops);
+-- Filtro por estatus + paginación por llave (id > cursor ORDER BY id)
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_estatus_id ON public.documentos_sgc (estatus, id);
+
+-- 6. ARCHIVOS DIRECCIONADOS POR CONTENIDO
+-- Los archivos se guardan como <sha256>.<ext>: varias filas pueden apuntar al
+-- mismo objeto. Antes de borrar un objeto se cuentan las filas que aún lo
+-- referencian por link_documento; este índice hace ese conteo por búsqueda.
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_link ON public.documentos_sgc (link_documento);
+
+-- 7. VENCIMIENTOS
+-- "¿Qué vence entre A y B?" (tablero y avisos diarios por responsable) es una
+-- consulta por rango sobre proxima_revision de los documentos no obsoletos:
+-- el índice parcial deja fuera los obsoletos y la lee ya ordenada por fecha.
+CREATE INDEX IF NOT EXISTS idx_documentos_sgc_vencimiento
+    ON public.documentos_sgc (proxima_revision, id)
+    WHERE estatus <> 'Obsoleto';
@@ -0,0 +1,139 @@
+"""Índice de búsqueda en memoria para el Explorador.
+
+Se construye una vez por versión de los datos y responde el filtro del
+Explorador (texto sobre ``codigo``/``titulo`` + estatus) con búsquedas en el
+índice en lugar de recorrer todo el DataFrame en cada tecla:
+
+- El texto se normaliza (minúsculas, sin acentos) una sola vez, unido como
+  la columna ``busqueda`` del servidor: ``codigo || ' | ' || titulo``. Así
+  una consulta encuentra lo mismo aquí que con el ILIKE de Supabase.
+- Consultas de 3+ caracteres: índice de trigramas; se intersectan las listas
+  de cada trigrama de la consulta y sólo se verifican esos candidatos.
+- Consultas de 1-2 caracteres: los trigramas que empiezan con la consulta
+  son un rango contiguo del mismo índice; sólo las apariciones en los dos
+  últimos caracteres de un texto no inician trigrama y se revisan aparte.
+- Estatus: máscaras booleanas precalculadas por valor.
+
+Las búsquedas retornan posiciones de fila; el llamador toma ``df.iloc[pos]``
+sin copiar el resto del DataFrame.
+"""
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+TEXT_COLUMNS = ("codigo", "titulo")
+# Mismo separador que la columna generada ``busqueda`` (schema_sgc.sql)
+FIELD_SEP = " | "
+
+
+def fold(text):
+    """Minúsculas, sin acentos, en ASCII (mismo criterio que el índice)."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return text.encode("ascii", "ignore").decode("ascii")
+
+
+def _fold_series(values):
+    return (values.fillna("").astype(str).str.lower().str.normalize("NFKD")
+            .str.encode("ascii", "ignore").str.decode("ascii"))
+
+
+def _trigram_codes(buf):
+    """Código entero de cada trigrama de un arreglo de bytes."""
+    return (buf[:-2].astype(np.int64) << 16) | (buf[1:-1].astype(np.int64) << 8) | buf[2:]
+
+
+class SearchIndex:
+    def __init__(self, df, text_columns=TEXT_COLUMNS, status_column="estatus"):
+        self.size = len(df)
+        folded = [_fold_series(df[c]) if c in df.columns else pd.Series("", index=df.index)
+                  for c in text_columns]
+        texts = folded[0]
+        for part in folded[1:]:
+            texts = texts + FIELD_SEP + part
+        self._texts = texts.tolist()
+
+        self._build_trigrams()
+
+        self._status_masks = {}
+        if status_column in df.columns:
+            codes, values = pd.factorize(df[status_column])
+            self._status_masks = {value: codes == k for k, value in enumerate(values)}
+
+    # --- Construcción ---
+    def _build_trigrams(self):
+        lengths = np.fromiter(map(len, self._texts), dtype=np.int64, count=self.size)
+        buf = np.frombuffer("\x00".join(self._texts).encode("ascii") + b"\x00", dtype=np.uint8)
+        doc_of = np.repeat(np.arange(self.size, dtype=np.int64), lengths + 1)
+        # Últimos dos caracteres de cada texto (0 si es más corto): consultas cortas
+        ends = np.cumsum(lengths + 1) - 1
+        self._tail = (np.where(lengths >= 2, buf[np.maximum(ends - 2, 0)], 0),
+                      np.where(lengths >= 1, buf[np.maximum(ends - 1, 0)], 0))
+        if len(buf) < 3:
+            self._gram_codes = np.empty(0, dtype=np.int64)
+            self._gram_offsets = np.zeros(1, dtype=np.int64)
+            self._gram_docs = np.empty(0, dtype=np.int32)
+            return
+        # Trigramas que no cruzan de un documento al siguiente
+        valid = (buf[:-2] != 0) & (buf[1:-1] != 0) & (buf[2:] != 0)
+        # Llave (trigrama, documento) ordenada y sin repetidos: listas de
+        # documentos contiguas por trigrama (ordenar + diff es más rápido que np.unique)
+        keys = (_trigram_codes(buf)[valid] << 32) | doc_of[:-2][valid]
+        keys.sort()
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        codes = keys >> 32
+        starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+        self._gram_docs = (keys & 0xFFFFFFFF).astype(np.int32)
+        self._gram_codes = codes[starts]
+        self._gram_offsets = np.append(starts, len(codes))
+
+    # --- Consultas ---
+    def _trigram_search(self, query):
+        grams = np.unique(_trigram_codes(np.frombuffer(query.encode("ascii"), dtype=np.uint8)))
+        slots = np.searchsorted(self._gram_codes, grams)
+        if (slots >= len(self._gram_codes)).any() or (self._gram_codes[slots] != grams).any():
+            return np.empty(0, dtype=np.int64)
+        postings = sorted((self._gram_docs[self._gram_offsets[s]:self._gram_offsets[s + 1]] for s in slots),
+                          key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if not len(candidates):
+                break
+        if len(query) == 3:
+            return candidates.astype(np.int64)
+        # Tener todos los trigramas no garantiza la subcadena: verificar candidatos
+        texts = self._texts
+        return np.array([i for i in candidates.tolist() if query in texts[i]], dtype=np.int64)
+
+    def _substring_search(self, query):
+        """1-2 caracteres: documentos con algún trigrama que empieza con la consulta, más
+        los que la tienen al final del texto."""
+        q = query.encode("ascii")
+        if b"\x00" in q:
+            return np.empty(0, dtype=np.int64)
+        shift = 8 * (3 - len(q))
+        lo = int.from_bytes(q, "big") << shift
+        a, b = np.searchsorted(self._gram_codes, (lo, lo + (1 << shift)))
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._gram_docs[self._gram_offsets[a]:self._gram_offsets[b]]] = True
+        last2, last = self._tail
+        if len(q) == 1:
+            mask |= (last2 == q[0]) | (last == q[0])
+        else:
+            mask |= (last2 == q[0]) & (last == q[1])
+        return np.flatnonzero(mask)
+
+    def search(self, query="", status=None):
+        """Posiciones (ordenadas) de las filas que cumplen el texto y el estatus."""
+        query = " ".join(fold(query or "").split())
+        if query:
+            positions = self._trigram_search(query) if len(query) >= 3 else self._substring_search(query)
+        else:
+            positions = np.arange(self.size, dtype=np.int64)
+        if status is not None:
+            mask = self._status_masks.get(status)
+            if mask is None:
+                return np.empty(0, dtype=np.int64)
+            positions = positions[mask[positions]]
+        return positions
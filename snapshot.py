@@ -0,0 +1,87 @@
+"""Instantánea del registro en disco, compartida por los procesos del servidor.
+
+El registro ya tipado (ver ``registry.compact``) se guarda como un archivo
+Arrow IPC sin compresión. Al leerlo se abre con ``mmap`` en sólo lectura y el
+DataFrame apunta directo a las páginas del archivo: las columnas numéricas,
+de fecha y los códigos de las categóricas no se copian, y el texto queda en
+arreglos de Arrow sobre el mismo mapa. Varias réplicas en la misma máquina
+comparten esas páginas en la caché del sistema operativo en lugar de tener
+cada una su copia, y un proceso recién levantado tiene el registro en unos
+milisegundos sin esperar a Supabase.
+
+Escritura atómica: se escribe a un temporal en la misma carpeta, se hace
+``fsync`` y se renombra encima (``os.replace``). Quien ya tenía mapeada la
+versión anterior la sigue leyendo completa hasta soltarla; quien abre después
+ve la nueva. Nunca se lee un archivo a medio escribir.
+
+Junto con los datos se guarda la marca de agua de la sincronización (hasta
+qué ``updated_at`` del servidor ya se recibió todo), así que al arrancar
+desde la instantánea basta una sincronización delta.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+
+METADATA_KEY = b"sgc"
+FORMAT_VERSION = 1
+
+logger = logging.getLogger("sgc.instantanea")
+
+
+class RegistrySnapshot:
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, df, watermark=None, saved_at=None):
+        """Escribe ``df`` (y la marca de agua) reemplazando la instantánea de forma atómica."""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = {
+            "format": FORMAT_VERSION,
+            "watermark": None if watermark is None else pd.Timestamp(watermark).isoformat(),
+            "saved_at": pd.Timestamp(saved_at or datetime.now(timezone.utc)).isoformat(),
+            "rows": len(df),
+        }
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               METADATA_KEY: json.dumps(meta).encode()})
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        # Temporal único por proceso e hilo: dos réplicas escribiendo a la vez no se pisan
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            fd = os.open(tmp, os.O_RDONLY)
+            try:
+                os.fsync(fd)  # en disco antes del rename: un corte no deja un archivo vacío
+            finally:
+                os.close(fd)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def load(self):
+        """``(df, watermark, saved_at)`` leído con mmap; None si no hay instantánea o no sirve."""
+        try:
+            source = pa.memory_map(self.path, "r")
+        except FileNotFoundError:
+            return None
+        try:
+            table = pa.ipc.open_file(source).read_all()
+            meta = json.loads((table.schema.metadata or {})[METADATA_KEY])
+            if meta.get("format") != FORMAT_VERSION:
+                raise ValueError(f"formato {meta.get('format')!r}")
+            # split_blocks: cada columna en su propio bloque, sin consolidar (que copiaría)
+            df = table.to_pandas(split_blocks=True)
+        except Exception as e:
+            logger.warning("Instantánea %s ignorada: %s", self.path, e)
+            return None
+        watermark = meta.get("watermark")
+        return (df, None if watermark is None else pd.Timestamp(watermark),
+                pd.Timestamp(meta["saved_at"]))
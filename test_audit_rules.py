@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from audit_rules import RuleEngine
+from fixtures import make_staff
+
+CONFIG = {
+    "severidades": ["OK", "OBSERVAR", "AUDITAR", "CRÍTICO"],
+    "pesos": {"Faltas": 3, "Retardos": 1},
+    "reglas": [
+        {"nombre": "Faltas", "columna": "Faltas", "operador": ">", "umbral": 0, "severidad": "AUDITAR"},
+        {"nombre": "Retardos", "columna": "Retardos", "operador": ">=", "umbral": 3,
+         "severidad": "AUDITAR", "por_departamento": {"Mensajeria": 5}},
+        {"nombre": "Retardos leves", "columna": "Retardos", "operador": ">=", "umbral": 2, "severidad": "OBSERVAR"},
+        {"nombre": "Reincidencia", "columna": "Puntaje", "operador": ">=", "umbral": 9, "severidad": "CRÍTICO"},
+    ],
+}
+
+
+def evaluar(fila):
+    """El criterio original del tablero (df.apply por fila)."""
+    if fila['Faltas'] > 0 or fila['Retardos'] >= 3:
+        return 'AUDITAR'
+    return 'OK'
+
+
+class TestRuleEngine(unittest.TestCase):
+
+    def test_reglas_por_defecto_igual_que_apply(self):
+        df = make_staff(2000)
+        result = RuleEngine().evaluate(df)
+        self.assertEqual(result.status.astype(str).tolist(), df.apply(evaluar, axis=1).tolist())
+        self.assertEqual(result.by_severity["AUDITAR"], int((df.apply(evaluar, axis=1) == "AUDITAR").sum()))
+
+    def test_umbral_por_departamento_y_severidades(self):
+        df = pd.DataFrame({
+            "Departamento": ["Calidad", "Mensajeria", "Mensajeria", None, "RRHH"],
+            "Retardos": [3, 4, 5, 2, 3],
+            "Faltas": [0, 0, 0, 0, 2],
+        })
+        engine = RuleEngine(CONFIG)
+        result = engine.evaluate(df)
+
+        self.assertEqual(result.status.astype(str).tolist(), ["AUDITAR", "OBSERVAR", "AUDITAR", "OBSERVAR", "CRÍTICO"])
+        self.assertEqual(result.hits, {"Faltas": 1, "Retardos": 3, "Retardos leves": 5, "Reincidencia": 1})
+        self.assertEqual(engine.flagged(result), 3)
+        self.assertTrue(result.status.cat.ordered)
+
+    def test_etiquetas(self):
+        self.assertEqual(list(RuleEngine(CONFIG).labels().values()),
+                         ["🟢 OK", "🟡 OBSERVAR", "🟠 AUDITAR", "🔴 CRÍTICO"])
+        self.assertEqual(RuleEngine().labels(), {"OK": "🟢 OK", "AUDITAR": "🔴 AUDITAR"})
+
+    def test_vacio(self):
+        result = RuleEngine(CONFIG).evaluate(make_staff(0))
+        self.assertEqual(len(result.status), 0)
+        self.assertEqual(result.by_severity["OK"], 0)
+
+    def test_configuracion_invalida(self):
+        bad = dict(CONFIG, reglas=[dict(CONFIG["reglas"][0], severidad="GRAVE")])
+        with self.assertRaises(ValueError):
+            RuleEngine(bad)
+
+    def test_alerta_sin_auditar_en_la_configuracion(self):
+        config = {"severidades": ["VERDE", "AMARILLO", "ROJO"],
+                  "reglas": [{"nombre": "Faltas", "columna": "Faltas", "operador": ">", "umbral": 0,
+                              "severidad": "ROJO"},
+                             {"nombre": "Retardos", "columna": "Retardos", "umbral": 3, "severidad": "AMARILLO"}]}
+        df = pd.DataFrame({"Departamento": ["A", "A", "A"], "Retardos": [0, 3, 0], "Faltas": [0, 0, 1]})
+        engine = RuleEngine(config)
+        result = engine.evaluate(df)
+
+        self.assertEqual(engine.alert_from, "AMARILLO")
+        self.assertEqual(engine.flagged(result), 2)
+        self.assertEqual(engine.flagged(result, "ROJO"), 1)
+        self.assertEqual(RuleEngine(dict(config, alerta_desde="ROJO")).flagged(result), 1)
+        with self.assertRaises(ValueError):
+            engine.flagged(result, "AUDITAR")
+        with self.assertRaises(ValueError):
+            RuleEngine(dict(config, alerta_desde="GRAVE"))
+
+    def test_desde_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "reglas.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(CONFIG, f, ensure_ascii=False)
+            self.assertEqual(len(RuleEngine.from_json(path).rules), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import io
+import os
+import unittest
+
+from benchmarks.bench_schema import explain_sql, summarize
+from benchmarks.suite import CASES, Result, compare, load_baseline, main, run_suite
+
+
+class TestCompare(unittest.TestCase):
+
+    BASE = {"explorador@1000": {"seconds": 0.010, "peak_mb": 2.0}}
+
+    def test_sin_regresion(self):
+        results = [Result("explorador", 1000, 0.015, 2.2)]
+        self.assertEqual(compare(results, self.BASE), [])
+
+    def test_regresion_de_tiempo_y_memoria(self):
+        results = [Result("explorador", 1000, 0.050, 4.0)]
+        regressions = compare(results, self.BASE)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("explorador@1000"))
+
+    def test_maquina_mas_lenta_escala_la_linea_base(self):
+        results = [Result("explorador", 1000, 0.030, 2.0)]
+        self.assertEqual(len(compare(results, self.BASE)), 1)
+        self.assertEqual(compare(results, self.BASE, speed=2.0), [])
+
+    def test_casos_nuevos_y_tiempos_minimos(self):
+        results = [Result("nuevo", 10, 1.0, 100.0), Result("explorador", 1000, 0.0015, 2.0)]
+        self.assertEqual(compare(results, {"explorador@1000": {"seconds": 0.0001, "peak_mb": 2.0}}), [])
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_todos_los_casos_corren(self):
+        results = run_suite(quick=True, repeat=1, out=io.StringIO())
+        self.assertEqual([r.case for r in results], list(CASES))
+        self.assertTrue(all(r.seconds > 0 for r in results))
+
+    def test_linea_base_cubre_todos_los_casos(self):
+        baseline, calibration = load_baseline()
+        self.assertIsNotNone(calibration)
+        expected = {f"{name}@{size}" for name, (_, sizes) in CASES.items() for size in sizes}
+        self.assertEqual(set(baseline), expected)
+
+    @unittest.skipUnless(os.environ.get("SGC_BENCH"), "suite completa: exportar SGC_BENCH=1")
+    def test_sin_regresiones_contra_linea_base(self):
+        self.assertEqual(main([]), 0)
+
+
+class TestExplainSchema(unittest.TestCase):
+
+    EXPLAIN = [{
+        "Plan": {"Node Type": "Limit", "Shared Hit Blocks": 4, "Shared Read Blocks": 1, "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "appointments",
+             "Index Name": "idx_appointments_active_doctor_date", "Plans": [
+                 {"Node Type": "Seq Scan", "Relation Name": "profiles"}]}]},
+        "Planning Time": 0.2,
+        "Execution Time": 0.35,
+    }]
+
+    def test_resumen_del_plan(self):
+        ms, blocks, nodes = summarize(self.EXPLAIN)
+        self.assertEqual(ms, 0.35)
+        self.assertEqual(blocks, 5)
+        self.assertEqual(nodes, ["Index Scan idx_appointments_active_doctor_date", "Seq Scan profiles"])
+
+    def test_consulta_con_rls_corre_como_autenticado(self):
+        sql = explain_sql("SELECT 1", rls=True)
+        self.assertIn("SET LOCAL ROLE authenticated;", sql)
+        self.assertTrue(sql.rstrip().endswith("ROLLBACK;"))
+        self.assertNotIn("ROLE", explain_sql("SELECT 1", rls=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
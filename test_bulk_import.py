@@ -0,0 +1,146 @@
+import io
+import unittest
+
+from bulk_import import import_csv
+from fake_supabase import FakeSupabase
+
+
+HEADER = "Código del Documento,Título del Documento,Estado,Próxima Revisión"
+
+
+def make_csv(codes):
+    lines = [HEADER]
+    lines += [f"{code},Documento {code},Vigente,15/01/2025" for code in codes]
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+class FailingSupabase(FakeSupabase):
+    """Falla los upserts que contienen un código dado."""
+
+    def __init__(self, tables, poison):
+        super().__init__(tables)
+        self.poison = poison
+
+    def table(self, name):
+        query = super().table(name)
+        original = query.upsert
+
+        def upsert(json, **kwargs):
+            if any(row["codigo"] == self.poison for row in json):
+                raise RuntimeError("payload too large")
+            return original(json, **kwargs)
+
+        query.upsert = upsert
+        return query
+
+
+class TestImportCsv(unittest.TestCase):
+
+    def setUp(self):
+        existing = [{"id": i, "codigo": f"PR-{i:03d}", "titulo": "Viejo", "estatus": "Vigente"}
+                    for i in range(1, 11)]
+        self.client = FakeSupabase({"documentos_sgc": existing})
+
+    def test_upsert_por_lotes_y_borra_faltantes(self):
+        """Actualiza por código, agrega nuevos y sólo borra los que faltan en el archivo"""
+        codes = [f"PR-{i:03d}" for i in range(5, 26)]  # 5..10 existen, 11..25 nuevos
+        seen = []
+        report = import_csv(self.client, make_csv(codes), batch_size=4, max_workers=3,
+                            chunk_rows=7, on_batch=lambda r, rep: seen.append(r.index))
+
+        rows = self.client.tables["documentos_sgc"]
+        self.assertEqual(sorted(r["codigo"] for r in rows), codes)
+        self.assertEqual(report.upserted, 21)
+        self.assertEqual(report.deleted, 4)
+        self.assertEqual(sorted(seen), list(range(len(report.batches))))
+        # Los existentes conservan su id (no se borraron y recrearon)
+        self.assertEqual(next(r for r in rows if r["codigo"] == "PR-005")["id"], 5)
+        self.assertEqual(rows[-1]["proxima_revision"], "2025-01-15")
+
+    def test_lote_fallido_no_borra(self):
+        """Si un lote falla, el registro no se poda"""
+        client = FailingSupabase(self.client.tables, poison="PR-020")
+        codes = [f"PR-{i:03d}" for i in range(15, 26)]
+        report = import_csv(client, make_csv(codes), batch_size=5, max_workers=2)
+
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.deleted, 0)
+        self.assertIn("PR-001", {r["codigo"] for r in client.tables["documentos_sgc"]})
+
+    def test_codigos_vacios_y_duplicados(self):
+        csv = io.StringIO(f"{HEADER}\nPR-001,A,Vigente,\n,B,Vigente,\nPR-001,C,Obsoleto,\n")
+        report = import_csv(self.client, csv)
+
+        rows = self.client.tables["documentos_sgc"]
+        self.assertEqual(report.validation.rejected_rows, 2)
+        self.assertEqual([r["titulo"] for r in rows], ["A"])
+        repetida = report.validation.rejected.iloc[-1]
+        self.assertEqual((repetida["fila"], repetida["motivo"]), (4, "código repetido en el archivo"))
+
+    def test_duplicados_entre_trozos(self):
+        """El mismo código en trozos distintos no se sube dos veces en paralelo"""
+        codes = ["PR-001", "PR-002", "PR-003", "PR-001", "PR-004", "PR-002"]
+        client = FakeSupabase({"documentos_sgc": []})
+        upserts = []
+        table = client.table
+
+        def spy(name):
+            query = table(name)
+            original = query.upsert
+            query.upsert = lambda json, **kw: (upserts.extend(r["codigo"] for r in json), original(json, **kw))[1]
+            return query
+
+        client.table = spy
+        report = import_csv(client, make_csv(codes), batch_size=1, chunk_rows=2, max_workers=3)
+
+        self.assertEqual(sorted(upserts), ["PR-001", "PR-002", "PR-003", "PR-004"])
+        self.assertEqual(report.validation.rejected["fila"].tolist(), [5, 7])
+        self.assertEqual(report.validation.accepted, 4)
+
+    def test_fila_rechazada_no_borra_su_documento(self):
+        """Un documento con fecha inválida en el archivo no se carga, pero tampoco se borra"""
+        csv = io.StringIO(f"{HEADER}\nPR-001,A,Vigente,31/02/2025\nPR-002,B,Vigente,\n")
+        report = import_csv(self.client, csv)
+
+        codes = {r["codigo"] for r in self.client.tables["documentos_sgc"]}
+        self.assertEqual(codes, {"PR-001", "PR-002"})
+        self.assertEqual(report.validation.rejected_keys, {"PR-001"})
+
+
+class TestReleaseObjects(unittest.TestCase):
+    """Los archivos que la carga deja sin referencia se borran del bucket; los compartidos no"""
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": [
+            {"id": 1, "codigo": "PR-001", "link_documento": link("viejo.pdf")},
+            {"id": 2, "codigo": "PR-002", "link_documento": link("compartido.pdf")},
+            {"id": 3, "codigo": "PR-003", "link_documento": link("compartido.pdf")},
+            {"id": 4, "codigo": "PR-004", "link_documento": link("borrado.pdf")},
+        ]})
+        self.client.buckets["documentos"] = {"viejo.pdf": b"1", "compartido.pdf": b"2", "borrado.pdf": b"3",
+                                             "nuevo.pdf": b"4"}
+
+    def test_libera_reemplazados_y_borrados(self):
+        csv = io.StringIO("Código del Documento,Título del Documento,Enlace al Documento Controlado\n"
+                          f"PR-001,A,{link('nuevo.pdf')}\nPR-002,B,{link('nuevo.pdf')}\n"
+                          f"PR-003,C,{link('compartido.pdf')}\n")
+        report = import_csv(self.client, csv, batch_size=1)
+
+        self.assertEqual(report.deleted, 1)
+        self.assertEqual(sorted(report.removed_objects), ["borrado.pdf", "viejo.pdf"])
+        self.assertEqual(sorted(self.client.buckets["documentos"]), ["compartido.pdf", "nuevo.pdf"])
+        self.assertIsNone(report.storage_error)
+
+    def test_sin_columna_de_enlace_no_toca_archivos(self):
+        report = import_csv(self.client, make_csv(["PR-001", "PR-002", "PR-003", "PR-004"]))
+
+        self.assertEqual(report.removed_objects, [])
+        self.assertEqual(len(self.client.buckets["documentos"]), 4)
+
+
+def link(name):
+    return f"https://fake.supabase.co/storage/v1/object/public/documentos/{name}"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import pandas as pd
+
+from cleaning import clean_data_for_upload
+
+
+class TestCleanDataForUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "Código del Documento": ["PR-001", " PR-002 ", None, "PR-004", "PR-005"],
+            "Título del Documento": ["Control", "Compras", "Sin código", "Auditoría", "Ventas"],
+            "Versión Actual": ["2", None, "1", "3", "1"],
+            "Próxima Revisión": ["15/01/2025", "2025-03-01", "01/01/2025", "32/13/2025", ""],
+            "Estado": ["vigente", "EN REVISION", "Vigente", "Vigente", "Archivado"],
+            "Columna Ajena": [1, 2, 3, 4, 5],
+        })
+
+    def test_renombra_y_normaliza(self):
+        clean, report = clean_data_for_upload(self.df)
+
+        self.assertEqual(list(clean.columns), ["codigo", "titulo", "revision", "proxima_revision", "estatus"])
+        self.assertEqual(clean["codigo"].tolist(), ["PR-001", "PR-002"])
+        self.assertEqual(clean["proxima_revision"].tolist(), ["2025-01-15", "2025-03-01"])
+        self.assertEqual(clean["estatus"].tolist(), ["Vigente", "En Revisión"])
+        self.assertEqual(clean["revision"].tolist(), ["2", "0"])
+
+    def test_reporte_sin_perdida_silenciosa(self):
+        """Cada fila descartada aparece en el reporte con su motivo"""
+        _, report = clean_data_for_upload(self.df)
+
+        self.assertEqual(report.total, 5)
+        self.assertEqual(report.accepted, 2)
+        motivos = dict(zip(report.rejected["fila"], report.rejected["motivo"]))
+        self.assertEqual(motivos, {4: "requerido", 5: "fecha inválida", 6: "valor no permitido"})
+        self.assertEqual(report.rejected_keys, {"PR-004", "PR-005"})
+
+    def test_fecha_vacia_no_es_error(self):
+        df = pd.DataFrame({"Código del Documento": ["A"], "Fecha de Emisión": [None]})
+        clean, report = clean_data_for_upload(df)
+        self.assertIsNone(clean["fecha_emision"].iloc[0])
+        self.assertEqual(report.rejected_rows, 0)
+
+    def test_falta_columna_obligatoria(self):
+        with self.assertRaises(ValueError):
+            clean_data_for_upload(pd.DataFrame({"Título del Documento": ["X"]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import os
+import subprocess
 import sys
 
 # Simulamos streamlit antes de importar dashboard
@@ -92,5 +94,26 @@ class TestDashboardAuth(unittest.TestCase):
         # No debe pedir inputs de nuevo
         mock_st.text_input.assert_not_called()
 
+
+class TestArranque(unittest.TestCase):
+
+    def test_login_no_importa_modulos_de_datos(self):
+        """El login sólo carga streamlit: pandas, supabase y los módulos de datos quedan para después"""
+        code = (
+            "import sys\n"
+            "from unittest.mock import MagicMock\n"
+            "st = MagicMock()\n"
+            "st.session_state = {}\n"
+            "st.columns.return_value = [MagicMock(), MagicMock()]\n"
+            "st.button.return_value = False\n"
+            "sys.modules['streamlit'] = st\n"
+            "import dashboard\n"
+            "dashboard.check_password()\n"
+            "print(' '.join(m for m in ('pandas', 'numpy', 'supabase', *dashboard.MODULOS_DATOS) if m in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), "")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
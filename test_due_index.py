@@ -0,0 +1,87 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+import fixtures
+from due_index import DueDateIndex, fetch_due, local_due
+from fake_supabase import FakeSupabase
+from registry import to_frame
+
+AREAS = ("Calidad", "RRHH", "Ventas")
+
+
+def make_rows(n):
+    return fixtures.make_rows(
+        n, estatus=lambda i: "Obsoleto" if i % 7 == 0 else "Vigente", area=lambda i: AREAS[i % 3],
+        responsable=lambda i: f"Responsable {i % 4}",
+        # Fechas desordenadas respecto al id; algunas sin fecha
+        proxima_revision=lambda i: None if i % 11 == 0 else f"2025-{(i * 5) % 12 + 1:02d}-{i % 28 + 1:02d}")
+
+
+def brute_force(rows, start=None, end=None, area=None):
+    """Lo que haría recorrer todas las filas: ids ordenados por (fecha, id)."""
+    keep = [r for r in rows if r["proxima_revision"] and r["estatus"] != "Obsoleto"
+            and (start is None or r["proxima_revision"] >= start)
+            and (end is None or r["proxima_revision"] <= end)
+            and (area is None or r["area"] == area)]
+    return [r["id"] for r in sorted(keep, key=lambda r: (r["proxima_revision"], r["id"]))]
+
+
+class TestDueDateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = make_rows(200)
+        self.df = to_frame(self.rows)
+        self.index = DueDateIndex(self.df)
+
+    def ids(self, *args, **kwargs):
+        return self.df["id"].to_numpy()[self.index.between(*args, **kwargs)].tolist()
+
+    def test_rango_igual_que_recorrer(self):
+        for start, end in [("2025-03-01", "2025-03-31"), (None, "2025-02-15"), ("2025-11-20", None),
+                           (None, None), ("2025-05-10", "2025-05-10")]:
+            for area in (None, *AREAS):
+                with self.subTest(start=start, end=end, area=area):
+                    self.assertEqual(self.ids(start, end, area), brute_force(self.rows, start, end, area))
+
+    def test_acepta_fechas_y_timestamps(self):
+        self.assertEqual(self.ids(date(2025, 3, 1), np.datetime64("2025-03-31")),
+                         brute_force(self.rows, "2025-03-01", "2025-03-31"))
+
+    def test_rango_vacio_y_area_desconocida(self):
+        self.assertEqual(self.ids("2026-01-01", "2026-12-31"), [])
+        self.assertEqual(self.ids("2025-06-01", "2025-05-01"), [])
+        self.assertEqual(self.ids(area="Dirección"), [])
+
+    def test_conteos_por_area(self):
+        counts = self.index.counts_by_area("2025-01-01", "2025-06-30")
+        self.assertEqual(counts, {a: len(brute_force(self.rows, "2025-01-01", "2025-06-30", a)) for a in AREAS})
+
+    def test_registro_vacio(self):
+        index = DueDateIndex(to_frame([]))
+        self.assertEqual(len(index.between("2025-01-01", "2025-12-31")), 0)
+        self.assertEqual(index.areas, [])
+
+
+class TestFetchDue(unittest.TestCase):
+
+    def test_servidor_igual_que_indice_local(self):
+        rows = make_rows(120)
+        client = FakeSupabase({"documentos_sgc": rows})
+        df = to_frame(rows)
+        index = DueDateIndex(df)
+        for start, end, area in [("2025-03-01", "2025-08-31", None), (None, "2025-04-30", "RRHH")]:
+            with self.subTest(start=start, end=end, area=area):
+                remote = fetch_due(client, start, end, area, page_size=7)  # varias páginas
+                local = local_due(df, index, start, end, area)
+                self.assertEqual(remote["id"].tolist(), local["id"].tolist())
+                self.assertEqual(remote["id"].tolist(), brute_force(rows, start, end, area))
+
+    def test_sin_resultados(self):
+        client = FakeSupabase({"documentos_sgc": make_rows(10)})
+        self.assertTrue(fetch_due(client, "2030-01-01", "2030-12-31").empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import io
+import os
+import tempfile
+import threading
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from employee_store import (COLUMNS, EmployeeSnapshot, EmployeeStore, SQLiteEmployeeStore, migrate_legacy_excel,
+                            open_store)
+
+
+class TestSQLiteEmployeeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = open_store(f"sqlite:///{os.path.join(self.tmp.name, 'empleados.db')}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_upsert_por_nombre(self):
+        self.assertTrue(self.store.upsert(" Ana López ", "Calidad", 1, 0))
+        self.assertFalse(self.store.upsert("Ana López", "RRHH", 3, 1))
+
+        df = self.store.all()
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df.iloc[0].tolist(), ["Ana López", "RRHH", 3, 1])
+
+    def test_borrar_por_id(self):
+        self.store.upsert("Paco", "Calidad", 0, 0)
+        self.store.replace_all(pd.DataFrame({"Nombre": ["Paco", "Paco"], "Departamento": ["Calidad", "RRHH"],
+                                             "Retardos": [0, 1], "Faltas": [0, 0]}))
+        ids = self.store.all().index.tolist()
+
+        self.assertTrue(self.store.delete(ids[1]))
+        self.assertFalse(self.store.delete(ids[1]))
+        self.assertEqual(self.store.all()["Departamento"].tolist(), ["Calidad"])
+
+    def test_busqueda_por_prefijo(self):
+        for nombre in ["Juan Pérez", "juana Ruiz", "Pedro 100%", "María"]:
+            self.store.upsert(nombre, "Calidad", 0, 0)
+        self.assertEqual(self.store.search("JUA")["Nombre"].tolist(), ["Juan Pérez", "juana Ruiz"])
+        self.assertEqual(self.store.search("Pedro 100%")["Nombre"].tolist(), ["Pedro 100%"])
+        self.assertEqual(len(self.store.search("", limit=2)), 2)
+
+    def test_escritores_concurrentes_no_pierden_cambios(self):
+        def writer(k):
+            for i in range(20):
+                self.store.upsert(f"Empleado {k}-{i}", "Calidad", i, 0)
+
+        threads = [threading.Thread(target=writer, args=(k,)) for k in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.store.count(), 80)
+
+    def test_excel_importar_exportar(self):
+        self.store.upsert("Ana", "Calidad", 2, 1)
+        exported = self.store.export_excel()
+
+        other = SQLiteEmployeeStore(os.path.join(self.tmp.name, "otro.db"))
+        self.assertEqual(other.import_excel(io.BytesIO(exported)), 1)
+        self.assertEqual(other.all().iloc[0].tolist(), ["Ana", "Calidad", 2, 1])
+
+    def test_migracion_del_excel_una_sola_vez(self):
+        legado = os.path.join(self.tmp.name, "empleados.xlsx")
+        pd.DataFrame([["Ana", "Calidad", 2, 1]], columns=COLUMNS).to_excel(legado, index=False)
+
+        self.assertEqual(migrate_legacy_excel(self.store, legado), 1)
+        # El archivo (versionado en el repo) no se toca: la migración queda en la base
+        self.assertTrue(os.path.exists(legado))
+        # Vaciar el almacén después no revive el Excel viejo, tampoco desde otro proceso
+        self.store.replace_all(pd.DataFrame(columns=COLUMNS))
+        other = SQLiteEmployeeStore(self.store.path)
+        self.assertEqual(migrate_legacy_excel(other, legado), 0)
+        self.assertEqual(other.count(), 0)
+
+    def test_excel_heredado_con_almacen_ya_poblado(self):
+        legado = os.path.join(self.tmp.name, "empleados.xlsx")
+        pd.DataFrame([["Viejo", "RRHH", 0, 0]], columns=COLUMNS).to_excel(legado, index=False)
+        self.store.upsert("Ana", "Calidad", 0, 0)
+
+        self.assertEqual(migrate_legacy_excel(self.store, legado), 0)
+        self.assertEqual(self.store.all()["Nombre"].tolist(), ["Ana"])
+        self.assertTrue(self.store.migration_applied("empleados.xlsx"))
+
+    def test_sin_excel_no_registra_la_migracion(self):
+        self.assertEqual(migrate_legacy_excel(self.store, os.path.join(self.tmp.name, "no.xlsx")), 0)
+        self.assertFalse(self.store.migration_applied("empleados.xlsx"))
+
+    def test_version_cambia_con_cada_escritura(self):
+        v0 = self.store.version()
+        self.store.upsert("Ana", "Calidad", 0, 0)
+        v1 = self.store.version()
+        self.store.upsert("Ana", "RRHH", 0, 0)
+        v2 = self.store.version()
+        self.assertTrue(v0 < v1 < v2)
+        # Un escritor externo (otra conexión, sin pasar por el almacén) también cuenta
+        other = SQLiteEmployeeStore(self.store.path)
+        other._query("DELETE FROM empleados")
+        self.assertGreater(self.store.version(), v2)
+
+    def test_backend_desconocido(self):
+        with self.assertRaises(ValueError):
+            open_store("excel:///empleados.xlsx")
+
+    def test_backend_incompleto_no_se_instancia(self):
+        class SoloLectura(EmployeeStore):
+            def all(self):
+                return pd.DataFrame(columns=COLUMNS)
+
+        with self.assertRaises(TypeError):
+            SoloLectura()
+
+
+class CountingStore(SQLiteEmployeeStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.loads = self.version_checks = 0
+
+    def all(self):
+        self.loads += 1
+        return super().all()
+
+    def version(self):
+        self.version_checks += 1
+        return super().version()
+
+
+class TestEmployeeSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CountingStore(os.path.join(self.tmp.name, "empleados.db"))
+        self.store.upsert("Ana", "Calidad", 0, 0)
+        self.now = 0.0
+        self.snapshot = EmployeeSnapshot(self.store, min_interval=1.0, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sesiones_comparten_lectura(self):
+        """50 sesiones consultando sin cambios: una lectura y una consulta de versión"""
+        first = self.snapshot.get()
+        for _ in range(50):
+            self.assertIs(self.snapshot.get()[0], first[0])
+        self.assertEqual(self.store.loads, 1)
+        self.assertEqual(self.store.version_checks, 1)
+
+    def test_relee_solo_si_cambia(self):
+        df, version = self.snapshot.get()
+        self.now += 5
+        self.assertIs(self.snapshot.get()[0], df)     # versión igual: misma instantánea
+        self.store.upsert("Beto", "RRHH", 1, 0)
+        self.assertEqual(self.snapshot.get()[1], version)  # aún dentro del intervalo
+        self.now += 1
+        df2, version2 = self.snapshot.get()
+        self.assertGreater(version2, version)
+        self.assertEqual(len(df2), 2)
+        self.assertEqual(self.store.loads, 2)
+
+    def test_expire_tras_escritura_propia(self):
+        self.snapshot.get()
+        self.store.upsert("Beto", "RRHH", 1, 0)
+        self.snapshot.expire()
+        self.assertEqual(len(self.snapshot.get()[0]), 2)
+
+
+class TestAttendanceHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.now = datetime(2025, 3, 10, 9, 0)
+        self.store = SQLiteEmployeeStore(os.path.join(self.tmp.name, "empleados.db"), clock=lambda: self.now)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_eventos_y_acumulados(self):
+        self.store.upsert("Ana", "Calidad", 1, 0)       # +1 retardo
+        self.store.upsert("Ana", "Calidad", 3, 1)       # +2 retardos, +1 falta
+        self.store.upsert("Ana", "Calidad", 3, 1)       # sin cambio: sin evento
+        self.now += timedelta(days=30)
+        self.store.upsert("Beto", "RRHH", 0, 2)
+
+        events = self.store._query("SELECT departamento, retardos, faltas FROM asistencia_eventos ORDER BY id")
+        self.assertEqual(events, [("Calidad", 1, 0), ("Calidad", 2, 1), ("RRHH", 0, 2)])
+
+        monthly = self.store.monthly_trend(12)
+        self.assertEqual(monthly.values.tolist(), [["2025-03", "Calidad", 3, 1, 2], ["2025-04", "RRHH", 0, 2, 1]])
+        self.assertEqual(self.store.daily_trend(1)["departamento"].tolist(), ["RRHH"])
+
+    def test_ventana_de_meses(self):
+        for month in range(1, 13):
+            self.now = datetime(2024, month, 15)
+            self.store.upsert("Ana", "Calidad", month, 0)
+        self.now = datetime(2025, 2, 1)
+        self.assertEqual(self.store.monthly_trend(3)["mes"].tolist(), ["2024-12"])
+        self.assertEqual(len(self.store.monthly_trend(13)), 11)   # desde 2024-02
+
+    def test_bitacora_de_solo_anexado(self):
+        self.store.upsert("Ana", "Calidad", 1, 0)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.store._query("DELETE FROM asistencia_eventos")
+
+    def test_reconstruir_igual_que_incremental(self):
+        for day in range(90):
+            self.now = datetime(2025, 1, 1) + timedelta(days=day)
+            self.store.upsert(f"Empleado {day % 7}", ["Calidad", "RRHH", None][day % 3], day % 4, day % 2)
+        incremental = self.store.monthly_trend(12), self.store.daily_trend(120)
+        self.store.rebuild_rollups()
+        pd.testing.assert_frame_equal(self.store.monthly_trend(12), incremental[0])
+        pd.testing.assert_frame_equal(self.store.daily_trend(120), incremental[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
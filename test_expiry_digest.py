@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+
+import fixtures
+from expiry_digest import NO_OWNER, DigestScheduler, build_digest, daily_digest, write_digest
+from fake_supabase import FakeSupabase
+from fixtures import FakeClock
+
+
+def make_rows():
+    return fixtures.make_rows(
+        6,
+        titulo=["Vencido", "Por vencer", "Fuera del horizonte", "Obsoleto", "Sin dueño", "De Luis"],
+        estatus=["Vigente", "En Revisión", "Vigente", "Obsoleto", "Vigente", "Vigente"],
+        area=["Calidad", "Calidad", "RRHH", "RRHH", "RRHH", "Ventas"],
+        responsable=["Ana", "Ana", "Ana", "Luis", "", "Luis"],
+        proxima_revision=["2025-02-20", "2025-03-10", "2025-06-01", "2025-03-05", "2025-03-01", "2025-03-30"],
+    )
+
+
+class TestDigest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows()})
+
+    def test_agrupa_por_responsable(self):
+        digest = daily_digest(self.client, date(2025, 3, 1), horizon_days=30)
+        self.assertEqual(sorted(digest.by_owner), ["Ana", "Luis", NO_OWNER])
+        ana = digest.by_owner["Ana"]
+        self.assertEqual(ana["codigo"].tolist(), ["PR-001", "PR-002"])
+        self.assertEqual(ana["dias"].tolist(), [-9, 9])
+        self.assertEqual(ana["situacion"].astype(str).tolist(), ["Vencido", "Por vencer"])
+        self.assertEqual(digest.by_owner["Luis"]["codigo"].tolist(), ["PR-006"])  # el obsoleto no entra
+        self.assertEqual(digest.total, 4)
+
+    def test_no_carga_el_registro_completo(self):
+        self.client.tables["documentos_sgc"] += [
+            {"id": 100 + i, "codigo": f"X-{i}", "titulo": "Lejano", "estatus": "Vigente", "area": "Calidad",
+             "responsable": "Ana", "proxima_revision": "2027-01-01"} for i in range(500)]
+        daily_digest(self.client, date(2025, 3, 1))
+        self.assertEqual(self.client.rows_fetched, 4)
+
+    def test_sin_vencimientos(self):
+        digest = build_digest(pd.DataFrame(), date(2025, 3, 1))
+        self.assertEqual(digest.by_owner, {})
+
+    def test_un_csv_por_responsable(self):
+        digest = daily_digest(self.client, date(2025, 3, 1))
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_digest(digest, tmp)
+            self.assertEqual(sorted(os.path.basename(p) for p in paths), ["Ana.csv", "Luis.csv", "Sin_responsable.csv"])
+            ana = pd.read_csv(os.path.join(tmp, "2025-03-01", "Ana.csv"))
+            self.assertEqual(ana["proxima_revision"].tolist(), ["2025-02-20", "2025-03-10"])
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows()})
+        self.clock = FakeClock(datetime(2025, 3, 1, 6, 30))
+        self.sent = []
+        self.scheduler = DigestScheduler(self.client, self.sent.append, hour=7, clock=self.clock)
+
+    def test_una_vez_al_dia_desde_la_hora(self):
+        self.assertIsNone(self.scheduler.run_pending())  # antes de las 7
+        self.clock.now = datetime(2025, 3, 1, 7, 5)
+        self.assertIsNotNone(self.scheduler.run_pending())
+        self.clock.now = datetime(2025, 3, 1, 18, 0)
+        self.assertIsNone(self.scheduler.run_pending())
+        self.clock.now = datetime(2025, 3, 2, 7, 0)
+        self.scheduler.run_pending()
+        self.assertEqual([d.day for d in self.sent], [date(2025, 3, 1), date(2025, 3, 2)])
+
+    def test_hilo_de_fondo(self):
+        self.clock.now = datetime(2025, 3, 1, 8, 0)
+        self.scheduler.poll = 0.01
+        self.scheduler.start()
+        try:
+            for _ in range(200):
+                if self.sent:
+                    break
+                self.scheduler._stop.wait(0.01)
+        finally:
+            self.scheduler.stop()
+        self.assertEqual(len(self.sent), 1)
+
+    def test_un_fallo_no_detiene_el_hilo(self):
+        self.clock.now = datetime(2025, 3, 1, 8, 0)
+        calls = []
+
+        def deliver(digest):
+            calls.append(digest)
+            if len(calls) == 1:
+                raise OSError("disco lleno")
+
+        scheduler = DigestScheduler(self.client, deliver, hour=7, clock=self.clock, poll=0.01)
+        with self.assertLogs("sgc.avisos", "ERROR"):
+            scheduler.start()
+            try:
+                for _ in range(200):
+                    if len(calls) >= 2:
+                        break
+                    scheduler._stop.wait(0.01)
+            finally:
+                scheduler.stop()
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import fixtures
+from explorer import fetch_page, local_page
+from fake_supabase import FakeSupabase
+from registry import RegistryCache
+from search_index import SearchIndex, fold
+
+
+def make_rows(n, with_search_column=True):
+    rows = fixtures.make_rows(n, titulo=lambda i: "Auditoría Interna" if i % 3 == 0 else "Control",
+                              estatus=lambda i: "Obsoleto" if i % 5 == 0 else "Vigente",
+                              revision="1", link_documento=None, proxima_revision="2025-06-30")
+    if with_search_column:
+        for row in rows:
+            # Lo que calcula la columna generada 'busqueda' en schema_sgc.sql
+            row["busqueda"] = fold(f"{row['codigo']} | {row['titulo']}")
+    return rows
+
+
+def walk(get_page):
+    """Recorre todas las páginas siguiendo el cursor; retorna ids y total."""
+    ids, cursor, total = [], None, None
+    while True:
+        page = get_page(cursor)
+        total = page.total if total is None else total
+        ids += page.rows["id"].tolist()
+        if page.next_cursor is None:
+            return ids, total
+        cursor = page.next_cursor
+
+
+class TestExplorerPages(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows(95)})
+
+    def test_pagina_del_servidor(self):
+        """Sólo viaja la página visible, con el conteo total del filtro"""
+        page = fetch_page(self.client, "auditoria", "Vigente", page_size=10)
+
+        self.assertEqual(len(page.rows), 10)
+        self.assertEqual(page.total, 25)  # múltiplos de 3 que no son de 5
+        self.assertLessEqual(self.client.rows_fetched, 11)
+        self.assertNotIn("busqueda", page.rows.columns)
+
+    def test_recorrido_por_cursor(self):
+        ids, total = walk(lambda c: fetch_page(self.client, "", "Vigente", c, page_size=10))
+        self.assertEqual(total, 76)
+        self.assertEqual(ids, [i for i in range(1, 96) if i % 5])
+
+    def test_sin_columna_busqueda_usa_ilike_directo(self):
+        client = FakeSupabase({"documentos_sgc": make_rows(30, with_search_column=False)})
+        page = fetch_page(client, "Auditoría", page_size=50)
+        self.assertEqual(page.total, 10)
+
+    def test_pagina_local_igual_que_servidor(self):
+        """Con el registro en memoria la página es la misma, sin tocar la base"""
+        df = RegistryCache().get(self.client)
+        index = SearchIndex(df)
+        trips = self.client.round_trips
+
+        local_ids, local_total = walk(lambda c: local_page(df, index, "auditoria", "Vigente", c, page_size=7))
+        remote_ids, remote_total = walk(lambda c: fetch_page(self.client, "auditoria", "Vigente", c, page_size=7))
+
+        self.assertEqual(local_ids, remote_ids)
+        self.assertEqual(local_total, remote_total)
+        self.assertGreater(self.client.round_trips, trips)  # sólo por las páginas remotas
+
+    def test_paridad_local_y_servidor(self):
+        """Consultas cortas, con separador o con reservados: mismas filas por ambos caminos"""
+        rows = make_rows(95)
+        rows[0].update(codigo="PR-001", titulo="Manual de calidad")
+        rows[0]["busqueda"] = fold("PR-001 | Manual de calidad")
+        client = FakeSupabase({"documentos_sgc": rows})
+        df = RegistryCache().get(client)
+        index = SearchIndex(df)
+        for search in ("01", "al", "a", "9", "001 | man", "1 | c", "| audit", " | ", "0(1", "pr-0%1", ""):
+            for status in (None, "Vigente"):
+                local = walk(lambda c: local_page(df, index, search, status, c, page_size=7))
+                remote = walk(lambda c: fetch_page(client, search, status, c, page_size=7))
+                self.assertEqual(local, remote, (search, status))
+        self.assertIn(1, walk(lambda c: local_page(df, index, "01", None, c))[0])
+        self.assertIn(1, walk(lambda c: local_page(df, index, "al", None, c))[0])
+
+    def test_caracteres_reservados(self):
+        page = fetch_page(self.client, "pr-0(0,1)%", page_size=10)
+        self.assertEqual(page.total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import pandas as pd
+
+import fixtures
+from fake_supabase import FakeSupabase
+from management import change_area, delete_documents, mark_obsolete, option_labels
+
+PUBLIC = "https://fake.supabase.co/storage/v1/object/public/documentos/"
+
+
+def make_rows(n):
+    return fixtures.make_rows(n, titulo=lambda i: f"Doc {i}", link_documento=lambda i: f"{PUBLIC}obj{i % 3}.pdf")
+
+
+class TestManagement(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows(450)})
+        self.client.buckets["documentos"] = {f"obj{k}.pdf": b"x" for k in range(3)}
+
+    def test_option_labels(self):
+        df = pd.DataFrame({"id": [7, 9], "titulo": ["Control", None]})
+        labels = option_labels(df)
+        self.assertEqual(labels[7], "ID: 7 | Control")
+        self.assertEqual(labels[9], "ID: 9 | ")
+        self.assertTrue(option_labels(df.iloc[:0]).empty)
+
+    def test_eliminar_por_lote(self):
+        ids = [i for i in range(1, 451) if i % 3 == 0] + [9999]  # todos los que usan obj0.pdf
+        outcome = delete_documents(self.client, ids)
+
+        self.assertEqual(len(outcome.ids), 150)
+        self.assertEqual(len(self.client.tables["documentos_sgc"]), 300)
+        # Sólo obj0.pdf quedó sin referencias
+        self.assertEqual(outcome.removed_objects, ["obj0.pdf"])
+        self.assertEqual(sorted(self.client.buckets["documentos"]), ["obj1.pdf", "obj2.pdf"])
+
+    def test_eliminar_sin_tocar_archivos_compartidos(self):
+        outcome = delete_documents(self.client, [1, 2])
+        self.assertEqual(outcome.removed_objects, [])
+        self.assertEqual(len(self.client.buckets["documentos"]), 3)
+
+    def test_round_trips_por_bloque(self):
+        ids = list(range(1, 451))
+        before = self.client.round_trips
+        mark_obsolete(self.client, ids)
+        # 450 ids en bloques de 200: 3 mutaciones, no 450
+        self.assertEqual(self.client.round_trips - before, 3)
+        self.assertTrue(all(r["estatus"] == "Obsoleto" for r in self.client.tables["documentos_sgc"]))
+
+    def test_cambiar_area(self):
+        outcome = change_area(self.client, [1, 2, 2], "RRHH")
+        self.assertEqual(sorted(outcome.ids), [1, 2])
+        self.assertEqual({r["area"] for r in outcome.rows}, {"RRHH"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import logging
+import time
+import unittest
+
+import httpx
+
+import perf
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+class PerfTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = CaptureHandler()
+        perf.logger.addHandler(self.handler)
+        perf.logger.setLevel(logging.INFO)
+        self.addCleanup(perf.logger.removeHandler, self.handler)
+
+
+class TestRun(PerfTestCase):
+
+    def test_tramos_anidados_y_contadores(self):
+        with perf.run("dashboard", session="ana", enabled=True) as run:
+            with perf.span("resumen"):
+                with perf.span("registro.descarga"):
+                    perf.count("registro.filas", 1000)
+                    perf.count("registro.filas", 500)
+            with perf.span("explorador"):
+                pass
+        self.assertEqual([(n, d) for n, d, _ in run.spans],
+                         [("resumen", 0), ("registro.descarga", 1), ("explorador", 0)])
+        self.assertTrue(all(s is not None for _, _, s in run.spans))
+        self.assertEqual(run.counters["registro.filas"], 1500)
+        self.assertIsNone(perf.current())
+
+        record = self.handler.records[-1]
+        self.assertEqual(record["page"], "dashboard")
+        self.assertEqual(record["session"], "ana")
+        self.assertEqual([s["name"] for s in record["spans"]], ["resumen", "registro.descarga", "explorador"])
+        self.assertEqual(record["counters"], {"registro.filas": 1500})
+        self.assertEqual(list(run.frame()["tramo"]), ["resumen", "\u2003registro.descarga", "explorador"])
+
+    def test_tramo_se_cierra_con_excepcion(self):
+        with perf.run("dashboard", enabled=True) as run:
+            with self.assertRaises(ValueError), perf.span("carga"):
+                raise ValueError
+        self.assertIsNotNone(run.spans[0][2])
+
+    def test_traced_evalua_argumentos_en_cada_llamada(self):
+        finished = []
+        state = {"on": False}
+
+        @perf.traced("app", enabled=lambda: state["on"], on_finish=finished.append)
+        def page():
+            with perf.span("panel"):
+                return perf.current()
+
+        self.assertIsNone(page())
+        state["on"] = True
+        self.assertIs(page(), finished[0])
+        self.assertEqual(finished[0].spans[0][0], "panel")
+
+    def test_begin_cierra_la_ejecucion_interrumpida(self):
+        first = perf.begin("app", enabled=True)
+        perf.count("x")
+        # st.rerun cortó el script antes de end(): la siguiente ejecución la cierra
+        second = perf.begin("app", enabled=True)
+        self.assertIsNotNone(first.seconds)
+        self.assertIs(perf.end(), second)
+        self.assertEqual(len(self.handler.records), 2)
+        self.assertIsNone(perf.end())
+
+
+class TestDisabled(PerfTestCase):
+
+    def test_sin_ejecucion_no_registra(self):
+        with perf.run("dashboard", enabled=False) as run:
+            with perf.span("resumen"):
+                perf.count("registro.filas", 10)
+        self.assertIsNone(run)
+        self.assertEqual(self.handler.records, [])
+
+    def test_costo_desactivado_despreciable(self):
+        n = 100_000
+        start = time.perf_counter()
+        for _ in range(n):
+            with perf.span("x"):
+                perf.count("y")
+        per_call = (time.perf_counter() - start) / n
+        self.assertLess(per_call, 20e-6)
+
+
+class TestHttpCounters(PerfTestCase):
+
+    def make_client(self):
+        def handler(request):
+            return httpx.Response(200, content=b"x" * (10 if "/rest/" in request.url.path else 100))
+
+        class Api:
+            def __init__(self, base):
+                self.session = httpx.Client(base_url=base, transport=httpx.MockTransport(handler))
+
+        class Client:
+            postgrest = Api("https://fake.supabase.co/rest/v1")
+            storage = Api("https://fake.supabase.co/storage/v1")
+
+        return Client()
+
+    def test_cuenta_peticiones_y_bytes_por_tipo(self):
+        client = perf.instrument(perf.instrument(self.make_client()))  # idempotente
+        self.assertEqual(len(client.postgrest.session.event_hooks["response"]), 1)
+        with perf.run("dashboard", enabled=True) as run:
+            client.postgrest.session.get("/documentos_sgc")
+            client.postgrest.session.get("/documentos_sgc")
+            client.storage.session.get("/object/public/documentos/a.pdf")
+        self.assertEqual(run.counters, {"db.peticiones": 2, "db.bytes": 20,
+                                        "storage.peticiones": 1, "storage.bytes": 100})
+
+    def test_sin_ejecucion_no_cuenta(self):
+        client = perf.instrument(self.make_client())
+        self.assertEqual(client.postgrest.session.get("/documentos_sgc").content, b"x" * 10)
+
+    def test_clientes_sin_sesion_http_se_ignoran(self):
+        perf.instrument(object())
+
+
+if __name__ == "__main__":
+    unittest.main()
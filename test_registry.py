@@ -0,0 +1,305 @@
+import unittest
+from datetime import timedelta
+
+import pandas as pd
+
+from fake_supabase import FakeSupabase
+from fixtures import FakeClock, make_rows
+from registry import RegistryCache, apply_changes, fetch_pages, summary_from_frame, to_frame
+
+
+class _Recording:
+    """Anota las columnas de cada ``select`` antes de pasarlo a la consulta real."""
+
+    def __init__(self, query, selects):
+        self._query = query
+        self._selects = selects
+
+    def select(self, *columns, **kwargs):
+        self._selects.append(",".join(columns))
+        return self._query.select(*columns, **kwargs)
+
+
+class TestFetchPages(unittest.TestCase):
+
+    def test_paginacion_por_llave(self):
+        """Recorre toda la tabla en páginas sin repetir ni saltar filas"""
+        client = FakeSupabase({"documentos_sgc": make_rows(25)})
+        pages = list(fetch_pages(client, page_size=10))
+
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        ids = [row["id"] for page in pages for row in page]
+        self.assertEqual(ids, list(range(1, 26)))
+
+    def test_tabla_vacia(self):
+        client = FakeSupabase({"documentos_sgc": []})
+        self.assertEqual(list(fetch_pages(client)), [])
+        self.assertEqual(client.round_trips, 1)
+
+
+class TestCompactFrame(unittest.TestCase):
+
+    def test_tipos_compactos(self):
+        rows = make_rows(3)
+        rows[0].update(busqueda="pr-0001 | documento 1", updated_at="2025-03-01T10:00:00.5+00:00")
+        df = to_frame(rows)
+        for col in ("estatus", "area"):
+            self.assertIsInstance(df[col].dtype, pd.CategoricalDtype)
+        self.assertNotEqual(df["titulo"].dtype, object)
+        self.assertTrue(str(df["fecha_emision"].dtype).startswith("datetime64"))
+        self.assertEqual(str(df["updated_at"].dt.tz), "UTC")
+        self.assertNotIn("busqueda", df.columns)
+
+    def test_menos_memoria_que_objetos(self):
+        rows = make_rows(2000)
+        raw = pd.DataFrame(rows).astype(object)
+        self.assertLess(to_frame(rows).memory_usage(deep=True).sum(), raw.memory_usage(deep=True).sum() / 2)
+
+    def test_parche_con_categorias_nuevas(self):
+        df = to_frame(make_rows(3))
+        nuevo = {**make_rows(1)[0], "id": 9, "estatus": "Obsoleto", "area": "RRHH"}
+        out = apply_changes(df, [nuevo], [2])
+        self.assertIsInstance(out["estatus"].dtype, pd.CategoricalDtype)
+        self.assertEqual(out["estatus"].tolist(), ["Vigente", "Vigente", "Obsoleto"])
+        self.assertEqual(out["area"].value_counts().to_dict(), {"Calidad": 2, "RRHH": 1})
+
+
+class TestRegistryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows(30)})
+        self.clock = FakeClock()
+        self.cache = RegistryCache(ttl=60, page_size=10, clock=self.clock)
+
+    def test_fechas_tipadas(self):
+        df = self.cache.get(self.client)
+        self.assertEqual(len(df), 30)
+        self.assertTrue(str(df["proxima_revision"].dtype).startswith("datetime64"))
+
+    def test_recarga_sin_cambios_no_consulta(self):
+        """Dentro del TTL las recargas no tocan la base"""
+        self.cache.get(self.client)
+        trips = self.client.round_trips
+        for _ in range(5):
+            self.cache.get(self.client)
+        self.assertEqual(self.client.round_trips, trips)
+
+    def test_ttl_expira(self):
+        self.cache.get(self.client)
+        trips = self.client.round_trips
+        self.clock.now = 61
+        self.cache.get(self.client)
+        self.assertGreater(self.client.round_trips, trips)
+
+    def test_parche_insercion_y_borrado(self):
+        """Insertar y borrar parchean la caché sin volver a consultar"""
+        self.cache.get(self.client)
+        trips = self.client.round_trips
+
+        nuevo = self.client.table("documentos_sgc").insert(
+            {"codigo": "PR-9999", "titulo": "Nuevo", "estatus": "Vigente", "area": "RRHH"}).execute()
+        self.cache.upsert_rows(nuevo.data)
+        self.cache.delete_ids([1, 2])
+        df = self.cache.get(self.client)
+
+        self.assertEqual(self.client.round_trips, trips + 1)  # sólo el insert
+        self.assertEqual(len(df), 29)
+        self.assertIn("PR-9999", set(df["codigo"]))
+        self.assertNotIn(1, set(df["id"]))
+
+    def test_no_descarga_la_columna_de_busqueda(self):
+        rows = make_rows(5)
+        for row in rows:
+            row["busqueda"] = f"{row['codigo'].lower()} | {row['titulo'].lower()}"
+        client = FakeSupabase({"documentos_sgc": rows})
+        selects = []
+        table = client.table
+        client.table = lambda name: _Recording(table(name), selects)
+        RegistryCache().get(client)
+        self.assertTrue(selects)
+        self.assertTrue(all("busqueda" not in cols and cols != "*" for cols in selects))
+
+    def test_tabla_sin_migrar_pide_todas_las_columnas(self):
+        """Sin updated_at el select explícito falla (columna inexistente): se recurre a '*'"""
+        self.client.failures = [RuntimeError("column documentos_sgc.updated_at does not exist")]
+        df = self.cache.get(self.client)
+        self.assertEqual(len(df), 30)
+        self.assertEqual(self.cache.columns, "*")
+
+    def test_invalidar_recarga(self):
+        self.cache.get(self.client)
+        self.client.tables["documentos_sgc"] = make_rows(3)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache.get(self.client)), 3)
+
+
+class TestDeltaSync(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": make_rows(200)}, track_changes=True)
+        self.clock = FakeClock()
+        self.cache = RegistryCache(ttl=60, page_size=50, clock=self.clock,
+                                   wall_clock=lambda: self.client.now)
+        self.client.advance(120)
+        self.cache.get(self.client)
+        # La carga completa no sabe si hay transacciones por confirmar dentro del
+        # margen: el primer delta lo vuelve a pedir; a partir de ahí queda asentada
+        self.refresh()
+
+    def refresh(self):
+        self.client.advance(120)
+        self.clock.now += 61
+        fetched = self.client.rows_fetched
+        df = self.cache.get(self.client)
+        return df, self.client.rows_fetched - fetched
+
+    def test_refresco_sin_cambios_no_trae_filas(self):
+        """El costo del refresco depende de los cambios, no del tamaño de la tabla"""
+        self.client.advance(120)
+        _, fetched = self.refresh()
+        self.assertEqual(fetched, 0)
+
+    def test_refresco_trae_solo_cambios(self):
+        self.client.advance(120)
+        table = self.client.table("documentos_sgc")
+        table.update({"estatus": "Obsoleto"}).eq("id", 7).execute()
+        self.client.table("documentos_sgc").insert({"codigo": "PR-NEW", "titulo": "Nuevo"}).execute()
+        self.client.table("documentos_sgc").delete().eq("id", 3).execute()
+
+        df, fetched = self.refresh()
+
+        self.assertEqual(fetched, 3)  # 1 actualizada + 1 nueva + 1 lápida
+        self.assertEqual(len(df), 200)
+        self.assertEqual(df.loc[df["id"] == 7, "estatus"].item(), "Obsoleto")
+        self.assertIn("PR-NEW", set(df["codigo"]))
+        self.assertNotIn(3, set(df["id"]))
+
+    def test_rafaga_no_se_vuelve_a_descargar(self):
+        """Tras una carga masiva la ráfaga se vuelve a pedir una sola vez (el margen) y sin cambiar el registro"""
+        for i in range(1, 101):
+            self.client.table("documentos_sgc").update({"revision": "2"}).eq("id", i).execute()
+        _, first = self.refresh()
+        version = self.cache.version
+        _, second = self.refresh()
+        _, third = self.refresh()
+        self.assertEqual(first, 100)
+        self.assertEqual(second, 100)
+        self.assertEqual(self.cache.version, version)
+        self.assertEqual(third, 0)
+
+    def test_reloj_local_adelantado_no_salta_cambios(self):
+        """La marca de agua sale de las marcas del servidor, no del reloj de este equipo"""
+        self.cache._wall_clock = lambda: self.client.now + timedelta(hours=1)
+        self.client.table("documentos_sgc").update({"estatus": "Obsoleto"}).eq("id", 7).execute()
+        self.refresh()
+        self.client.advance(5)
+        self.client.table("documentos_sgc").update({"estatus": "Obsoleto"}).eq("id", 8).execute()
+        df, _ = self.refresh()
+        self.assertEqual(df.loc[df["id"].isin([7, 8]), "estatus"].tolist(), ["Obsoleto", "Obsoleto"])
+
+    def test_confirmada_tarde_dentro_del_margen(self):
+        """Una fila con updated_at anterior a la marca que se confirma después sigue llegando"""
+        self.client.advance(120)
+        self.client.table("documentos_sgc").update({"revision": "3"}).eq("id", 5).execute()
+        self.refresh()
+        # Transacción larga: se selló 10 s antes de la marca vista pero se confirma ahora
+        late = next(r for r in self.client.tables["documentos_sgc"] if r["id"] == 6)
+        late.update(revision="4", updated_at=(self.client.now - timedelta(seconds=130)).isoformat())
+        df, _ = self.refresh()
+        self.assertEqual(df.loc[df["id"] == 6, "revision"].item(), "4")
+
+    def test_lapidas_por_paginas(self):
+        """Más bajas que el tope de filas por respuesta de PostgREST: no se pierde ninguna"""
+        self.client.max_rows = 50  # = page_size, como PAGE_SIZE y el tope de Supabase
+        self.client.advance(120)
+        self.client.table("documentos_sgc").delete().lte("id", 130).execute()
+        df, _ = self.refresh()
+        self.assertEqual(len(df), 70)
+        self.assertEqual(int(df["id"].min()), 131)
+
+    def test_expire_conserva_instantanea(self):
+        self.client.advance(120)
+        self.client.table("documentos_sgc").delete().eq("id", 10).execute()
+        self.cache.expire()
+        fetched = self.client.rows_fetched
+        df = self.cache.get(self.client)
+        self.assertEqual(self.client.rows_fetched - fetched, 1)
+        self.assertEqual(len(df), 199)
+
+    def test_sin_columna_updated_at_carga_completa(self):
+        """Antes de la migración cada refresco es una carga completa"""
+        client = FakeSupabase({"documentos_sgc": make_rows(20)})
+        cache = RegistryCache(ttl=60, clock=self.clock)
+        cache.get(client)
+        self.clock.now += 61
+        fetched = client.rows_fetched
+        cache.get(client)
+        self.assertEqual(client.rows_fetched - fetched, 20)
+
+
+
+class SummarySupabase(FakeSupabase):
+    """Simula la vista documentos_sgc_resumen agregando en el momento."""
+
+    def table(self, name):
+        if name == "documentos_sgc_resumen":
+            self.tables[name] = summary_from_frame(to_frame(self.tables["documentos_sgc"])).counts.to_dict("records")
+        return super().table(name)
+
+
+class TestSummary(unittest.TestCase):
+
+    def setUp(self):
+        rows = make_rows(40)
+        for row in rows[:10]:
+            row["estatus"] = "Obsoleto"
+        for row in rows[::4]:
+            row["area"] = "RRHH"
+        self.client = SummarySupabase({"documentos_sgc": rows})
+        self.clock = FakeClock()
+        self.cache = RegistryCache(ttl=60, clock=self.clock)
+
+    def test_kpis_sin_descargar_filas(self):
+        """El tablero se calcula con la vista agregada, no con la tabla"""
+        summary = self.cache.summary(self.client)
+
+        self.assertLessEqual(self.client.rows_fetched, 4)
+        self.assertEqual(summary.total, 40)
+        self.assertEqual(summary.vigentes, 30)
+        self.assertEqual(summary.pendientes, 10)
+        self.assertEqual(summary.areas, 2)
+        self.assertEqual(summary.by_status.to_dict(), {"Vigente": 30, "Obsoleto": 10})
+        self.assertEqual(summary.by_area.to_dict(), {"Calidad": 30, "RRHH": 10})
+
+    def test_igual_que_calculo_local(self):
+        remote = self.cache.summary(self.client)
+        local = summary_from_frame(self.cache.get(self.client))
+        self.assertEqual(remote.by_area.to_dict(), local.by_area.to_dict())
+        self.assertEqual(remote.by_status.to_dict(), local.by_status.to_dict())
+
+    def test_escritura_invalida_resumen(self):
+        self.cache.summary(self.client)
+        trips = self.client.round_trips
+        self.cache.summary(self.client)
+        self.assertEqual(self.client.round_trips, trips)
+
+        self.client.table("documentos_sgc").delete().eq("id", 40).execute()
+        self.cache.delete_ids([40])
+        self.assertEqual(self.cache.summary(self.client).total, 39)
+
+    def test_sin_vista_usa_carga_completa(self):
+        client = FakeSupabase({"documentos_sgc": make_rows(5)})
+        client.table = _without_view(client.table)
+        self.assertEqual(RegistryCache().summary(client).total, 5)
+
+
+def _without_view(table):
+    def wrapped(name):
+        if name == "documentos_sgc_resumen":
+            raise RuntimeError('relation "documentos_sgc_resumen" does not exist')
+        return table(name)
+    return wrapped
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+import threading
+import unittest
+
+from fake_supabase import FakeSupabase
+from fixtures import FakeClock, make_rows
+from registry import RegistryCache
+from resilient import CircuitBreaker, ResilientClient, ServiceUnavailable, SingleFlight, is_transient
+
+
+class ApiError(Exception):
+    """Como postgrest.APIError: el código viene en ``code``."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def run_together(n, fn):
+    """Lanza ``n`` hilos que llaman ``fn`` al mismo tiempo; retorna sus resultados."""
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(k):
+        barrier.wait()
+        results[k] = fn(k)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSupabase({"documentos_sgc": make_rows(20)})
+        self.fake.latency = 0.2
+        self.client = ResilientClient(self.fake, sleep=lambda s: None)
+
+    def test_lecturas_identicas_en_vuelo_una_sola_peticion(self):
+        """30 sesiones abren el tablero a la vez: una sola consulta a la base"""
+        results = run_together(30, lambda k: self.client.table("documentos_sgc").select("*").order("id").execute())
+        self.assertEqual(self.fake.round_trips, 1)
+        self.assertEqual(self.client.flights.coalesced, 29)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(len(results[0].data), 20)
+
+    def test_consultas_distintas_no_se_mezclan(self):
+        results = run_together(4, lambda k: self.client.table("documentos_sgc").select("id").eq("id", k + 1).execute())
+        self.assertEqual([r.data for r in results], [[{"id": k + 1}] for k in range(4)])
+        self.assertEqual(self.fake.round_trips, 4)
+
+    def test_escrituras_no_se_coalescen(self):
+        run_together(3, lambda k: self.client.table("documentos_sgc").update({"area": "RRHH"}).eq("id", 1).execute())
+        self.assertEqual(self.fake.round_trips, 3)
+
+    def test_secuenciales_no_comparten_resultado(self):
+        query = self.client.table("documentos_sgc").select("*")
+        self.fake.latency = 0
+        first = query.execute()
+        self.fake.tables["documentos_sgc"].append({"id": 99, "codigo": "N"})
+        self.assertEqual(len(query.execute().data), len(first.data) + 1)
+
+    def test_seguidores_reciben_el_error_del_lider(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def leader_fn():
+            started.set()
+            release.wait()
+            raise ValueError("falló")
+
+        errors = []
+
+        def call(fn):
+            try:
+                flights.do("k", fn)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call, args=(leader_fn,))
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call, args=(lambda: self.fail("no debe ejecutarse"),))
+        follower.start()
+        while flights.coalesced == 0:
+            release.wait(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(errors), 2)
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def test_tope_de_peticiones_simultaneas(self):
+        fake = FakeSupabase({"documentos_sgc": make_rows(20)})
+        fake.latency = 0.05
+        client = ResilientClient(fake, max_concurrency=3)
+        run_together(12, lambda k: client.table("documentos_sgc").select("*").eq("id", k).execute())
+        self.assertEqual(fake.round_trips, 12)
+        self.assertLessEqual(fake.max_in_flight, 3)
+
+
+class TestRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSupabase({"documentos_sgc": make_rows(5)})
+        self.sleeps = []
+        self.client = ResilientClient(self.fake, retries=3, base_delay=0.1, max_delay=1.0, sleep=self.sleeps.append)
+
+    def test_reintenta_errores_transitorios_con_jitter(self):
+        self.fake.failures = [ConnectionError("reset"), TimeoutError(), ApiError("503")]
+        response = self.client.table("documentos_sgc").select("*").execute()
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(self.fake.round_trips, 4)
+        self.assertEqual(len(self.sleeps), 3)
+        for attempt, delay in enumerate(self.sleeps):
+            self.assertLessEqual(0, delay)
+            self.assertLessEqual(delay, 0.1 * 2 ** attempt)
+
+    def test_se_rinde_tras_los_reintentos(self):
+        self.fake.failures = [ConnectionError()] * 4
+        with self.assertRaises(ConnectionError):
+            self.client.table("documentos_sgc").select("*").execute()
+        self.assertEqual(self.fake.round_trips, 4)
+
+    def test_insert_no_se_repite(self):
+        self.fake.failures = [ConnectionError()]
+        with self.assertRaises(ConnectionError):
+            self.client.table("documentos_sgc").insert({"codigo": "PR-100"}).execute()
+        self.assertEqual(self.fake.round_trips, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_upsert_si_se_repite(self):
+        self.fake.failures = [ApiError("PGRST001")]
+        self.client.table("documentos_sgc").upsert({"codigo": "PR-001", "area": "RRHH"}, on_conflict="codigo").execute()
+        self.assertEqual(self.fake.tables["documentos_sgc"][0]["area"], "RRHH")
+
+    def test_error_no_transitorio_pasa_directo(self):
+        """Columna inexistente: sin reintentos, para que el respaldo del llamador actúe"""
+        with self.assertRaises(RuntimeError):
+            self.client.table("documentos_sgc").select("*").ilike("busqueda", "*x*").execute()
+        self.assertEqual(self.fake.round_trips, 1)
+        self.assertEqual(self.client.breaker.failures, 0)
+
+    def test_clasificacion(self):
+        self.assertTrue(is_transient(ApiError(503)))
+        self.assertTrue(is_transient(ApiError("PGRST003")))
+        self.assertFalse(is_transient(ApiError("42703")))
+        self.assertFalse(is_transient(ValueError()))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeSupabase({"documentos_sgc": make_rows(5)})
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=3, cooldown=30, clock=self.clock)
+        self.client = ResilientClient(self.fake, retries=0, breaker=self.breaker)
+
+    def select(self):
+        return self.client.table("documentos_sgc").select("*").execute()
+
+    def fail(self, times):
+        self.fake.failures = [ConnectionError()] * times
+        for _ in range(times):
+            with self.assertRaises(ConnectionError):
+                self.select()
+
+    def test_abre_tras_fallos_seguidos_y_falla_al_instante(self):
+        self.fail(3)
+        self.assertEqual(self.breaker.state, "abierto")
+        trips = self.fake.round_trips
+        with self.assertRaises(ServiceUnavailable):
+            self.select()
+        self.assertEqual(self.fake.round_trips, trips)
+
+    def test_llamada_de_prueba_cierra(self):
+        self.fail(3)
+        self.clock.now = 31
+        self.assertEqual(self.breaker.state, "semiabierto")
+        self.assertEqual(len(self.select().data), 5)
+        self.assertEqual(self.breaker.state, "cerrado")
+
+    def test_prueba_fallida_vuelve_a_abrir(self):
+        self.fail(3)
+        self.clock.now = 31
+        self.fail(1)
+        self.assertEqual(self.breaker.state, "abierto")
+        self.clock.now = 45
+        with self.assertRaises(ServiceUnavailable):
+            self.select()
+
+    def test_exito_reinicia_la_cuenta(self):
+        self.fail(2)
+        self.select()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, "cerrado")
+
+
+class TestRegistryIntegration(unittest.TestCase):
+
+    def test_carga_del_registro_sobrevive_fallos(self):
+        fake = FakeSupabase({"documentos_sgc": make_rows(25)})
+        fake.failures = [ConnectionError(), TimeoutError()]
+        client = ResilientClient(fake, sleep=lambda s: None)
+        df = RegistryCache(page_size=10).get(client)
+        self.assertEqual(len(df), 25)
+
+    def test_resumen_no_cae_a_carga_completa_si_la_base_no_responde(self):
+        fake = FakeSupabase({"documentos_sgc": make_rows(25)})
+        client = ResilientClient(fake, retries=0, breaker=CircuitBreaker(threshold=1), sleep=lambda s: None)
+        fake.failures = [ConnectionError()]
+        with self.assertRaises(ConnectionError):
+            RegistryCache().summary(client)
+        self.assertEqual(fake.rows_fetched, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import pandas as pd
+
+from benchmarks.bench_search import contains_filter, make_registry
+from search_index import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "codigo": ["PR-CAL-001", "FO-RH-002", "MA-DIR-003", None],
+            "titulo": ["Control de Documentos", "Auditoría Interna", "Manual de Calidad", "Sin código"],
+            "estatus": ["Vigente", "Obsoleto", "Vigente", "En Revisión"],
+        })
+        self.index = SearchIndex(self.df)
+
+    def test_sin_acentos_ni_mayusculas(self):
+        self.assertEqual(self.index.search("AUDITORIA").tolist(), [1])
+        self.assertEqual(self.index.search("codigo").tolist(), [3])
+
+    def test_subcadena_en_codigo_o_titulo(self):
+        self.assertEqual(self.index.search("cal").tolist(), [0, 2])
+        self.assertEqual(self.index.search("l de d").tolist(), [0])
+
+    def test_no_cruza_de_codigo_a_titulo(self):
+        """'001 control' no existe como texto continuo en ningún campo"""
+        self.assertEqual(self.index.search("001 control").tolist(), [])
+
+    def test_consultas_cortas_por_subcadena(self):
+        """Como ILIKE '%ab%': también en medio de una palabra, no sólo al inicio"""
+        self.assertEqual(self.index.search("ma").tolist(), [2])
+        self.assertEqual(self.index.search("01").tolist(), [0])
+        self.assertEqual(self.index.search("al").tolist(), [0, 2])
+        self.assertEqual(self.index.search("-").tolist(), [0, 1, 2])
+
+    def test_cortas_igual_que_str_contains(self):
+        df = make_registry(5000)
+        index = SearchIndex(df)
+        for query in ("a", "01", "al", "-r", "z"):
+            expected = contains_filter(df, query, "Vigente").index.tolist()
+            self.assertEqual(df.iloc[index.search(query, "Vigente")].index.tolist(), expected, query)
+
+    def test_cortas_al_final_y_en_textos_minimos(self):
+        """Apariciones que no inician trigrama: al final del texto o en textos de 1-2 letras"""
+        df = pd.DataFrame({"codigo": ["a", "xy", "", None, "abc"], "titulo": ["", "", "q", "zy", "bc"]})
+        index = SearchIndex(df)
+        texts = ["a | ", "xy | ", " | q", " | zy", "abc | bc"]
+        for query in ("a", "y", "q", "xy", "zy", "bc", "c", "b", "|", "| ", " q"):
+            expected = [i for i, t in enumerate(texts) if query in t]
+            self.assertEqual(index.search(query).tolist(), expected, query)
+
+    def test_separador_como_la_columna_del_servidor(self):
+        self.assertEqual(self.index.search("001 | control").tolist(), [0])
+
+    def test_filtro_estatus(self):
+        self.assertEqual(self.index.search("", "Vigente").tolist(), [0, 2])
+        self.assertEqual(self.index.search("cal", "Obsoleto").tolist(), [])
+        self.assertEqual(self.index.search("", "Inexistente").tolist(), [])
+
+    def test_caracteres_de_regex_son_literales(self):
+        """El filtro anterior fallaba con '(' porque str.contains usaba regex"""
+        self.assertEqual(self.index.search("(").tolist(), [])
+
+    def test_igual_que_str_contains(self):
+        df = make_registry(5000)
+        index = SearchIndex(df)
+        for query in ("auditoría", "control de", "l-00", "rh-0012"):
+            expected = contains_filter(df, query, "Vigente").index.tolist()
+            self.assertEqual(df.iloc[index.search(query, "Vigente")].index.tolist(), expected, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import fixtures
+from fake_supabase import FakeSupabase
+from fixtures import FakeClock
+from registry import TOMBSTONE_RETENTION, RegistryCache, to_frame
+from snapshot import RegistrySnapshot
+
+
+def make_rows(n):
+    return fixtures.make_rows(n, updated_at="2024-01-01T00:00:00+00:00")
+
+
+class TestRegistrySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "cache", "registro.arrow")
+        self.snapshot = RegistrySnapshot(self.path)
+
+    def test_ida_y_vuelta_conserva_tipos(self):
+        df = to_frame(make_rows(50))
+        watermark = pd.Timestamp("2024-03-01T12:00:00", tz="UTC")
+        self.snapshot.save(df, watermark)
+        loaded, loaded_watermark, _ = self.snapshot.load()
+        pd.testing.assert_frame_equal(loaded, df)
+        self.assertEqual(loaded_watermark, watermark)
+
+    def test_sin_archivo(self):
+        self.assertIsNone(self.snapshot.load())
+
+    def test_archivo_danado_se_ignora(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as f:
+            f.write(b"no es arrow")
+        with self.assertLogs("sgc.instantanea", "WARNING"):
+            self.assertIsNone(self.snapshot.load())
+
+    def test_reemplazo_atomico(self):
+        """Quien ya leyó la versión anterior la sigue viendo completa tras el reemplazo"""
+        self.snapshot.save(to_frame(make_rows(10)))
+        before, _, _ = self.snapshot.load()
+        self.snapshot.save(to_frame(make_rows(20)))
+        after, _, _ = self.snapshot.load()
+        self.assertEqual(before["codigo"].tolist(), [f"PR-{i:03d}" for i in range(1, 11)])
+        self.assertEqual(len(after), 20)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["registro.arrow"])
+
+    def test_error_al_escribir_no_deja_temporales(self):
+        self.snapshot.save(to_frame(make_rows(5)))
+        with self.assertRaises(Exception):
+            self.snapshot.save(pd.DataFrame({"x": [object()]}))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["registro.arrow"])
+        self.assertEqual(len(self.snapshot.load()[0]), 5)
+
+
+class TestCacheFromSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "registro.arrow")
+        self.client = FakeSupabase({"documentos_sgc": make_rows(200)}, track_changes=True)
+        self.client.advance(120)
+        # Primer proceso: carga completa y deja la instantánea
+        first = self.make_cache()
+        first.get(self.client)
+        self.assertTrue(os.path.exists(self.path))
+        # Un delta después del margen la asienta: la instantánea guarda que ya recibió todo
+        self.client.advance(120)
+        first._clock.now += 61
+        first.get(self.client)
+        self.client.advance(120)
+
+    def make_cache(self):
+        return RegistryCache(ttl=60, page_size=50, clock=FakeClock(), wall_clock=lambda: self.client.now,
+                             snapshot=RegistrySnapshot(self.path))
+
+    def wait_reconcile(self, cache):
+        with cache._reconciling:
+            pass
+
+    def test_proceso_nuevo_entrega_sin_esperar_a_la_base(self):
+        cache = self.make_cache()
+        self.assertTrue(cache.load_snapshot())
+        trips = self.client.round_trips
+        self.client.latency = 0.5
+        df = cache.get(self.client)
+        self.assertEqual(len(df), 200)
+        self.assertTrue(cache.pending)
+        self.assertEqual(cache.peek()[0] is df, True)
+        self.assertEqual(cache.summary(self.client).total, 200)
+        self.assertEqual(self.client.round_trips, trips)  # aún no respondió nada
+        self.wait_reconcile(cache)
+        self.assertFalse(cache.pending)
+
+    def test_reconcilia_con_delta_y_guarda(self):
+        self.client.table("documentos_sgc").update({"estatus": "Obsoleto"}).eq("id", 7).execute()
+        self.client.table("documentos_sgc").delete().eq("id", 3).execute()
+        cache = self.make_cache()
+        cache.load_snapshot()
+        fetched = self.client.rows_fetched
+        cache.get(self.client)
+        self.wait_reconcile(cache)
+
+        df = cache.get(self.client)
+        self.assertEqual(self.client.rows_fetched - fetched, 2)  # 1 actualizada + 1 lápida
+        self.assertEqual(len(df), 199)
+        self.assertEqual(df.loc[df["id"] == 7, "estatus"].item(), "Obsoleto")
+        saved, _, _ = RegistrySnapshot(self.path).load()
+        pd.testing.assert_frame_equal(saved, df)
+
+    def test_sin_cambios_no_reescribe(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        cache = self.make_cache()
+        cache.load_snapshot()
+        cache.get(self.client)
+        self.wait_reconcile(cache)
+        self.assertFalse(cache.pending)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+    def test_base_caida_sigue_entregando_la_instantanea(self):
+        cache = self.make_cache()
+        cache.load_snapshot()
+        self.client.failures = [ConnectionError()]
+        with self.assertLogs("sgc.registro", "WARNING"):
+            cache.get(self.client)
+            self.wait_reconcile(cache)
+        self.assertTrue(cache.pending)
+        self.assertEqual(len(cache.get(self.client)), 200)  # reintenta en segundo plano
+        self.wait_reconcile(cache)
+        self.assertFalse(cache.pending)
+
+    def test_instantanea_vieja_carga_completa(self):
+        """Más vieja que la retención de lápidas: un delta podría perder borrados"""
+        self.client.advance(TOMBSTONE_RETENTION)
+        cache = self.make_cache()
+        cache.load_snapshot()
+        fetched = self.client.rows_fetched
+        cache.get(self.client)
+        self.wait_reconcile(cache)
+        self.assertEqual(self.client.rows_fetched - fetched, 200)
+
+    def test_invalidar_no_vuelve_a_la_instantanea(self):
+        cache = self.make_cache()
+        cache.load_snapshot()
+        cache.invalidate()
+        self.assertFalse(cache.pending)
+        self.assertIsNone(cache.peek())
+        self.assertEqual(len(cache.get(self.client)), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
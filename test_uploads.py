@@ -0,0 +1,221 @@
+import io
+import unittest
+
+import httpx
+import pandas as pd
+
+from fake_supabase import FakeSupabase
+from uploads import (UploadItem, content_name, object_path, pair_from_filenames, pair_from_manifest, put_object,
+                     release_objects, status_frame, upload_batch, upload_resumable)
+
+
+def make_file(name, content=b"%PDF-1.4", type="application/pdf"):
+    f = io.BytesIO(content)
+    f.name, f.type = name, type
+    return f
+
+
+class FailingInsert(FakeSupabase):
+    def table(self, name):
+        query = super().table(name)
+
+        def insert(json, **kwargs):
+            raise RuntimeError("violates row-level security policy")
+
+        query.insert = insert
+        return query
+
+
+class TestPairing(unittest.TestCase):
+
+    def test_nombre_de_archivo(self):
+        items = pair_from_filenames([make_file("PR-001.pdf"), make_file("PR-002__Control de cambios.pdf")],
+                                    {"area": "Calidad"})
+        self.assertEqual([i.record["codigo"] for i in items], ["PR-001", "PR-002"])
+        self.assertEqual(items[1].record["titulo"], "Control de cambios")
+        self.assertEqual(items[0].record["area"], "Calidad")
+
+    def test_manifiesto(self):
+        manifest = pd.DataFrame({
+            "Archivo": ["a.pdf", "b.pdf"],
+            "Código del Documento": ["PR-001", "PR-002"],
+            "Título del Documento": ["A", "B"],
+            "Próxima Revisión": ["15/01/2025", "31/02/2025"],
+        })
+        files = [make_file("a.pdf"), make_file("b.pdf"), make_file("c.pdf")]
+        items, validation = pair_from_manifest(files, manifest)
+
+        self.assertEqual([i.status for i in items], ["pendiente", "omitido", "omitido"])
+        self.assertEqual(items[0].record["proxima_revision"], "2025-01-15")
+        self.assertEqual(items[1].error, "fila del manifiesto rechazada")
+        self.assertEqual(validation.rejected_rows, 1)
+
+
+class TestUploadBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": [{"id": 1, "codigo": "PR-001", "titulo": "Viejo"}]})
+
+    def test_sube_en_paralelo_e_inserta_una_vez(self):
+        files = [make_file(f"PR-{i:03d}.pdf", f"contenido {i}".encode()) for i in range(2, 12)]
+        done = []
+        inserted = upload_batch(self.client, pair_from_filenames(files, {}), max_workers=3, on_item=done.append)
+
+        self.assertEqual(len(inserted), 10)
+        self.assertEqual(len(done), 10)
+        self.assertEqual(len(self.client.buckets["documentos"]), 10)
+        self.assertIn(content_name(io.BytesIO(b"contenido 2"), "x.pdf"), self.client.buckets["documentos"])
+        self.assertTrue(all(r["link_documento"].endswith(".pdf") for r in inserted))
+        # 1 consulta de códigos existentes + 10 × (existe + subida) + 1 insert
+        self.assertEqual(self.client.round_trips, 22)
+
+    def test_omitidos_y_errores_por_archivo(self):
+        files = [make_file("PR-001.pdf"), make_file("PR-002.pdf", b"a"), make_file("PR-002__Otra.pdf", b"b"),
+                 make_file("PR-003.pdf", b"c")]
+        items = pair_from_filenames(files, {})
+        failing = items[3].file
+        failing.read = lambda *a: (_ for _ in ()).throw(OSError("conexión cerrada"))
+        inserted = upload_batch(self.client, items)
+
+        self.assertEqual([i.status for i in items], ["omitido", "registrado", "omitido", "error"])
+        self.assertEqual(items[0].error, "el código ya está registrado")
+        self.assertEqual([r["codigo"] for r in inserted], ["PR-002"])
+
+    def test_insert_fallido_retira_archivos(self):
+        client = FailingInsert(self.client.tables)
+        items = pair_from_filenames([make_file("PR-002.pdf", b"a"), make_file("PR-003.pdf", b"b")], {})
+        inserted = upload_batch(client, items)
+
+        self.assertEqual(inserted, [])
+        self.assertEqual(client.buckets["documentos"], {})
+        self.assertTrue(all(i.status == "error" for i in items))
+
+    def test_documento_individual_ya_registrado_no_sube(self):
+        # El formulario de un documento usa la misma ruta: sin objeto huérfano en el bucket
+        item = UploadItem(make_file("a.pdf"), {"codigo": "PR-001", "titulo": "Nuevo"})
+        inserted = upload_batch(self.client, [item])
+
+        self.assertEqual(inserted, [])
+        self.assertEqual((item.status, item.error), ("omitido", "el código ya está registrado"))
+        self.assertEqual(self.client.buckets.get("documentos", {}), {})
+
+
+class TestReplace(unittest.TestCase):
+    """Nueva versión de un documento ya registrado (p. ej. sólo cambian los metadatos)"""
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": []})
+        upload_batch(self.client, [UploadItem(make_file("a.pdf", b"v1"), {"codigo": "PR-001", "titulo": "Viejo"})])
+        self.old_link = self.client.tables["documentos_sgc"][0]["link_documento"]
+
+    def test_mismo_contenido_reutiliza_el_objeto(self):
+        item = UploadItem(make_file("a.pdf", b"v1"), {"codigo": "PR-001", "titulo": "Nuevo título"})
+        rows = upload_batch(self.client, [item], replace=True)
+
+        self.assertEqual((item.status, item.replaces, item.reused), ("registrado", True, True))
+        self.assertEqual([(r["titulo"], r["link_documento"]) for r in rows], [("Nuevo título", self.old_link)])
+        self.assertEqual(len(self.client.tables["documentos_sgc"]), 1)
+        self.assertEqual(len(self.client.buckets["documentos"]), 1)
+
+    def test_contenido_nuevo_libera_el_anterior(self):
+        item = UploadItem(make_file("a.pdf", b"v2"), {"codigo": "PR-001", "titulo": "Rev. 2"})
+        rows = upload_batch(self.client, [item], replace=True)
+
+        self.assertNotEqual(rows[0]["link_documento"], self.old_link)
+        self.assertEqual(list(self.client.buckets["documentos"]), [content_name(io.BytesIO(b"v2"), "a.pdf")])
+        self.assertEqual(status_frame([item])["detalle"].item(), "reemplaza la versión anterior")
+
+    def test_objeto_anterior_compartido_se_conserva(self):
+        upload_batch(self.client, [UploadItem(make_file("b.pdf", b"v1"), {"codigo": "PR-002"})])
+        upload_batch(self.client, [UploadItem(make_file("a.pdf", b"v2"), {"codigo": "PR-001"})], replace=True)
+
+        self.assertEqual(len(self.client.buckets["documentos"]), 2)
+
+    def test_sin_reemplazo_se_omite(self):
+        item = UploadItem(make_file("a.pdf", b"v2"), {"codigo": "PR-001"})
+        self.assertEqual(upload_batch(self.client, [item]), [])
+        self.assertEqual(item.status, "omitido")
+
+
+class TestContentAddressing(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeSupabase({"documentos_sgc": [{"id": 1, "codigo": "PR-001", "titulo": "Viejo"}]})
+
+    def test_mismo_contenido_no_se_transfiere(self):
+        """Re-subir el mismo PDF (p. ej. con otro nombre) reutiliza el objeto"""
+        first = put_object(self.client, "documentos", make_file("a.pdf", b"igual"), "a.pdf", "application/pdf")
+        again = put_object(self.client, "documentos", make_file("b.PDF", b"igual"), "b.PDF", "application/pdf")
+
+        self.assertFalse(first[2])
+        self.assertTrue(again[2])
+        self.assertEqual(first[:2], again[:2])
+        self.assertEqual(len(self.client.buckets["documentos"]), 1)
+
+    def test_lote_con_archivos_repetidos(self):
+        files = [make_file(f"PR-{i:03d}.pdf", b"igual") for i in range(2, 6)]
+        inserted = upload_batch(self.client, pair_from_filenames(files, {}), max_workers=4)
+
+        self.assertEqual(len(inserted), 4)
+        self.assertEqual(len({r["link_documento"] for r in inserted}), 1)
+        self.assertEqual(len(self.client.buckets["documentos"]), 1)
+
+    def test_release_solo_borra_sin_referencias(self):
+        _, shared, _ = put_object(self.client, "documentos", make_file("a.pdf", b"a"), "a.pdf", None)
+        _, alone, _ = put_object(self.client, "documentos", make_file("b.pdf", b"b"), "b.pdf", None)
+        self.client.tables["documentos_sgc"].append({"id": 2, "codigo": "PR-002", "link_documento": shared})
+        external = "https://intranet.example.com/docs/a.pdf"
+
+        removed = release_objects(self.client, [shared, alone, external])
+
+        self.assertEqual(removed, [object_path(alone)])
+        self.assertEqual(list(self.client.buckets["documentos"]), [object_path(shared)])
+
+    def test_release_con_respuesta_truncada(self):
+        """Muchas filas comparten un objeto: la respuesta llena no debe hacerlo pasar por huérfano"""
+        shared = "https://fake.supabase.co/storage/v1/object/public/documentos/compartido.pdf"
+        lone = "https://fake.supabase.co/storage/v1/object/public/documentos/solo.pdf"
+        client = FakeSupabase({"documentos_sgc": [{"id": i, "codigo": f"PR-{i}", "link_documento": shared}
+                                                  for i in range(1, 6)]
+                               + [{"id": 6, "codigo": "PR-6", "link_documento": lone}]})
+        client.buckets["documentos"] = {"compartido.pdf": b"a", "solo.pdf": b"b", "huerfano.pdf": b"c"}
+        client.max_rows = 3
+        orphan = "https://fake.supabase.co/storage/v1/object/public/documentos/huerfano.pdf"
+        removed = release_objects(client, [shared, lone, orphan], page_size=3)
+
+        self.assertEqual(removed, ["huerfano.pdf"])
+        self.assertEqual(sorted(client.buckets["documentos"]), ["compartido.pdf", "solo.pdf"])
+
+    def test_object_path(self):
+        url = "https://x.supabase.co/storage/v1/object/public/documentos/ab%20c.pdf?"
+        self.assertEqual(object_path(url), "ab c.pdf")
+        self.assertIsNone(object_path("https://intranet.example.com/docs/a.pdf"))
+        self.assertIsNone(object_path(None))
+
+
+class TestResumable(unittest.TestCase):
+
+    def test_sube_por_bloques(self):
+        received = []
+
+        def handler(request):
+            if request.method == "POST":
+                self.assertEqual(request.headers["upload-length"], "25")
+                return httpx.Response(201, headers={"location": "https://x.supabase.co/upload/abc"})
+            self.assertEqual(int(request.headers["upload-offset"]), sum(map(len, received)))
+            received.append(request.content)
+            return httpx.Response(204, headers={"upload-offset": str(sum(map(len, received)))})
+
+        class Client:
+            storage_url = "https://x.supabase.co/storage/v1/"
+            supabase_key = "key"
+
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http:
+            upload_resumable(Client(), "documentos", "PR-001.pdf", io.BytesIO(b"x" * 25),
+                             "application/pdf", 25, chunk_size=10, http=http)
+
+        self.assertEqual([len(c) for c in received], [10, 10, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,306 @@
+"""Carga múltiple de documentos: emparejar archivos con metadatos, subirlos en
+paralelo y registrar todas las filas en un solo insert.
+
+- Metadatos desde un manifiesto CSV (mismos encabezados que la carga masiva
+  más una columna ``Archivo``) o desde el nombre del archivo
+  (``CODIGO.pdf`` o ``CODIGO__Título.pdf``).
+- Subidas concurrentes con un grupo acotado de hilos. Los archivos grandes
+  van por el endpoint reanudable (TUS) de Supabase en bloques, leyendo el
+  archivo por partes en lugar de cargarlo completo en memoria.
+- Objetos direccionados por contenido (``<sha256>.<ext>``): volver a subir
+  el mismo PDF no transfiere ni guarda otra copia. Un objeto sólo se borra
+  cuando ninguna fila lo referencia ya (``release_objects``).
+- Un solo insert al final; si falla, se retiran los objetos que quedaron sin
+  referencia para no dejar huérfanos en el bucket. Cada archivo tiene su
+  propio estado.
+- Reemplazo (``replace=True``): un código ya registrado se actualiza (upsert
+  sobre ``codigo``) en lugar de omitirse. Si el contenido no cambió el objeto
+  se reutiliza tal cual; si cambió, el objeto anterior se libera.
+"""
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import PurePath
+from urllib.parse import unquote
+
+import pandas as pd
+
+from cleaning import clean_data_for_upload
+from registry import PAGE_SIZE, TABLE
+
+BUCKET = "documentos"
+CHUNK_SIZE = 6 * 1024 * 1024  # Supabase exige bloques de 6 MB en subidas reanudables
+MAX_WORKERS = 4
+LINK_CHUNK = 50  # links por consulta de referencias (las URLs son largas)
+MANIFEST_FILE_COLUMN = "Archivo"
+NAME_SEP = "__"  # CODIGO__Título.pdf
+
+
+@dataclass
+class UploadItem:
+    file: object                 # UploadedFile o archivo binario (name, type, read, seek)
+    record: dict = field(default_factory=dict)  # columnas de documentos_sgc
+    status: str = "pendiente"    # pendiente | subido | registrado | omitido | error
+    path: str = None             # objeto en el bucket
+    reused: bool = False         # el contenido ya estaba en el bucket: no se transfirió
+    error: str = None
+    replaces: bool = False       # actualiza un documento ya registrado con ese código
+    previous_link: str = None    # link_documento que tenía ese documento
+
+    @property
+    def name(self):
+        return self.file.name
+
+
+# --- 1. EMPAREJAR ARCHIVOS Y METADATOS ---
+def pair_from_filenames(files, defaults):
+    """Código (y opcionalmente título) desde el nombre: ``CODIGO__Título.ext``."""
+    items = []
+    for f in files:
+        stem = PurePath(f.name).stem
+        codigo, _, titulo = stem.partition(NAME_SEP)
+        record = dict(defaults, codigo=codigo.strip(), titulo=(titulo or codigo).strip())
+        items.append(UploadItem(f, record))
+    return items
+
+
+def pair_from_manifest(files, manifest):
+    """Empareja por la columna ``Archivo`` del manifiesto.
+
+    Retorna ``(items, validation)``; las filas del manifiesto rechazadas y
+    los archivos sin fila quedan como ``omitido`` con su motivo.
+    """
+    if MANIFEST_FILE_COLUMN not in manifest.columns:
+        raise ValueError(f"El manifiesto no tiene la columna '{MANIFEST_FILE_COLUMN}'.")
+    manifest = manifest.copy()
+    manifest[MANIFEST_FILE_COLUMN] = manifest[MANIFEST_FILE_COLUMN].astype(str).str.strip()
+    clean, validation = clean_data_for_upload(manifest)
+    names = manifest[MANIFEST_FILE_COLUMN]
+    records = dict(zip(names[clean.index], clean.to_dict(orient="records")))
+    rejected = set(names[~names.index.isin(clean.index)])
+
+    items = []
+    for f in files:
+        if f.name in records:
+            items.append(UploadItem(f, records[f.name]))
+        else:
+            motivo = "fila del manifiesto rechazada" if f.name in rejected else "no aparece en el manifiesto"
+            items.append(UploadItem(f, status="omitido", error=motivo))
+    return items, validation
+
+
+# --- 2. SUBIDA A STORAGE ---
+def _file_size(fileobj):
+    size = getattr(fileobj, "size", None)
+    if size is None:
+        fileobj.seek(0, 2)
+        size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def upload_resumable(client, bucket, path, fileobj, content_type, size, chunk_size=CHUNK_SIZE, http=None):
+    """Subida TUS al endpoint reanudable de Supabase Storage, bloque por bloque."""
+    import httpx
+
+    endpoint = f"{str(client.storage_url).rstrip('/')}/upload/resumable"
+    auth = {"authorization": f"Bearer {client.supabase_key}", "apikey": client.supabase_key,
+            "tus-resumable": "1.0.0"}
+    metadata = {"bucketName": bucket, "objectName": path, "contentType": content_type or "application/octet-stream"}
+    encoded = ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items())
+
+    owns_http = http is None
+    http = http or httpx.Client(timeout=120)
+    try:
+        created = http.post(endpoint, headers={**auth, "upload-length": str(size), "upload-metadata": encoded})
+        created.raise_for_status()
+        location = created.headers["location"]
+        offset = 0
+        fileobj.seek(0)
+        while offset < size:
+            chunk = fileobj.read(chunk_size)
+            sent = http.patch(location, content=chunk, headers={
+                **auth, "upload-offset": str(offset), "content-type": "application/offset+octet-stream"})
+            sent.raise_for_status()
+            offset = int(sent.headers.get("upload-offset", offset + len(chunk)))
+    finally:
+        if owns_http:
+            http.close()
+
+
+def upload_file(client, bucket, path, fileobj, content_type, chunk_size=CHUNK_SIZE):
+    """Sube un archivo: de una vez si es pequeño, reanudable por bloques si es grande."""
+    size = _file_size(fileobj)
+    if size > chunk_size and hasattr(client, "storage_url"):
+        upload_resumable(client, bucket, path, fileobj, content_type, size, chunk_size)
+    else:
+        client.storage.from_(bucket).upload(path=path, file=fileobj.read(),
+                                            file_options={"content-type": content_type})
+    return client.storage.from_(bucket).get_public_url(path)
+
+
+def content_name(fileobj, filename, chunk_size=CHUNK_SIZE):
+    """Nombre del objeto por contenido: ``<sha256>.<ext>``, leyendo el archivo por bloques."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    ext = PurePath(filename).suffix.lstrip(".").lower() or "bin"
+    return f"{digest.hexdigest()}.{ext}"
+
+
+def put_object(client, bucket, fileobj, filename, content_type):
+    """Guarda el archivo por contenido. Retorna ``(path, url, reused)``.
+
+    Si el objeto ya existe no se transfiere de nuevo.
+    """
+    path = content_name(fileobj, filename)
+    store = client.storage.from_(bucket)
+    if store.exists(path):
+        return path, store.get_public_url(path), True
+    try:
+        return path, upload_file(client, bucket, path, fileobj, content_type), False
+    except Exception:
+        # Otra subida del mismo contenido llegó primero
+        if not store.exists(path):
+            raise
+        return path, store.get_public_url(path), True
+
+
+def object_path(link, bucket=BUCKET):
+    """Ruta del objeto en el bucket a partir de su URL pública; None si el link no es del bucket."""
+    marker = f"/object/public/{bucket}/"
+    if not link or marker not in link:
+        return None
+    return unquote(link.split(marker, 1)[1].split("?", 1)[0]) or None
+
+
+def release_objects(client, links, bucket=BUCKET, page_size=PAGE_SIZE):
+    """Borra del bucket los objetos que ninguna fila referencia ya.
+
+    Llamar después de borrar (o no insertar) las filas: el conteo de
+    referencias es el número de filas con ese ``link_documento``, y se
+    resuelve con consultas por bloque de links. Varias filas pueden compartir
+    un objeto y PostgREST corta cada respuesta: si una llega llena
+    (``page_size`` filas) se vuelve a preguntar sólo por los links que aún no
+    aparecieron, hasta una respuesta incompleta. Un link ausente de una
+    respuesta truncada nunca se toma como huérfano. Retorna las rutas borradas.
+    """
+    links = {link for link in links if object_path(link, bucket)}
+    if not links:
+        return []
+    ordered = sorted(links)
+    still = set()
+    for start in range(0, len(ordered), LINK_CHUNK):
+        pending = ordered[start:start + LINK_CHUNK]
+        while pending:
+            rows = client.table(TABLE).select("link_documento").in_(
+                "link_documento", pending).limit(page_size).execute().data or []
+            found = {row["link_documento"] for row in rows}
+            still |= found
+            if len(rows) < page_size:
+                break
+            # Respuesta llena: cada vuelta encuentra al menos un link más
+            pending = [link for link in pending if link not in found]
+    orphans = links - still
+    paths = sorted(object_path(link, bucket) for link in orphans)
+    if paths:
+        client.storage.from_(bucket).remove(paths)
+    return paths
+
+
+# --- 3. PIPELINE ---
+def _skip_conflicts(client, items, replace=False):
+    """Marca como omitidos los códigos repetidos en el lote o ya registrados (una consulta).
+
+    Con ``replace`` los ya registrados no se omiten: quedan como reemplazos con su link anterior.
+    """
+    seen = set()
+    for item in items:
+        if item.status != "pendiente":
+            continue
+        codigo = item.record.get("codigo")
+        if not codigo:
+            item.status, item.error = "omitido", "sin código"
+        elif codigo in seen:
+            item.status, item.error = "omitido", "código repetido en el lote"
+        seen.add(codigo)
+    codes = [i.record["codigo"] for i in items if i.status == "pendiente"]
+    if codes:
+        existing = client.table(TABLE).select("codigo,link_documento").in_("codigo", codes).execute().data or []
+        taken = {row["codigo"]: row.get("link_documento") for row in existing}
+        for item in items:
+            if item.status != "pendiente" or item.record["codigo"] not in taken:
+                continue
+            if replace:
+                item.replaces, item.previous_link = True, taken[item.record["codigo"]]
+            else:
+                item.status, item.error = "omitido", "el código ya está registrado"
+
+
+def upload_batch(client, items, bucket=BUCKET, max_workers=MAX_WORKERS, on_item=None, replace=False):
+    """Sube los archivos en paralelo y registra las filas en un solo insert.
+
+    ``on_item(item)`` se llama en el hilo del llamador al terminar cada archivo.
+    Con ``replace`` los códigos ya registrados se actualizan (un solo upsert).
+    Retorna las filas insertadas o actualizadas (para parchear la caché del registro).
+    """
+    _skip_conflicts(client, items, replace)
+    pending = [i for i in items if i.status == "pendiente"]
+
+    def send(item):
+        try:
+            item.path, item.record["link_documento"], item.reused = put_object(
+                client, bucket, item.file, item.name, getattr(item.file, "type", None))
+            item.status = "subido"
+        except Exception as e:
+            item.status, item.error, item.path = "error", str(e), None
+        return item
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for future in as_completed([pool.submit(send, item) for item in pending]):
+            if on_item:
+                on_item(future.result())
+
+    uploaded = [i for i in pending if i.status == "subido"]
+    if not uploaded:
+        return []
+    records = [i.record for i in uploaded]
+    try:
+        if replace:
+            response = client.table(TABLE).upsert(records, on_conflict="codigo").execute()
+        else:
+            response = client.table(TABLE).insert(records).execute()
+    except Exception as e:
+        # Sin las filas nuevas, los objetos que nadie más referencia quedan huérfanos
+        try:
+            release_objects(client, [i.record["link_documento"] for i in uploaded], bucket)
+        except Exception:
+            pass
+        for item in uploaded:
+            item.status, item.error = "error", f"registro fallido: {e}"
+        return []
+    for item in uploaded:
+        item.status = "registrado"
+    # Contenido nuevo: el objeto anterior se libera si ya nadie lo usa (el mismo contenido da el mismo link)
+    replaced = [i.previous_link for i in uploaded if i.replaces and i.previous_link != i.record["link_documento"]]
+    if replaced:
+        try:
+            release_objects(client, replaced, bucket)
+        except Exception:
+            pass  # la fila ya apunta al objeto nuevo; el anterior sólo ocupa espacio
+    return response.data or []
+
+
+def status_frame(items):
+    """Tabla de estado por archivo para mostrar en el tablero."""
+    return pd.DataFrame([{"archivo": i.name, "codigo": i.record.get("codigo"), "estado": i.status,
+                          "detalle": i.error or _detail(i)} for i in items])
+
+
+def _detail(item):
+    notes = ("reemplaza la versión anterior" if item.replaces else None,
+             "ya estaba en el bucket" if item.reused else None)
+    return ", ".join(note for note in notes if note)